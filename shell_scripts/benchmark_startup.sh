@@ -0,0 +1,3 @@
+#!/bin/bash
+# measure the import time of the command line entry point (optional argument: budget in microseconds)
+cd /opt/project && python3 -m src.helper.benchmark.startup "$@"
@@ -0,0 +1,57 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, List
+
+
+def measure_multiplexing(channels_n: int, trials: int = 100, length: float = 1, models: dict = None) \
+        -> Dict[str, float]:
+    """
+    Measure the throughput and the cost of the simulation of a star network with the given number of multiplexed
+    channels: every trial generates the pairs of all the channels in a single run of the simulation (see
+    StarNetwork.multiplexed_entangle_nodes).
+    :param channels_n: The number of multiplexed channels of the Repeater and of the Remote Node
+    :param trials: The number of trials (default: 100)
+    :param length: The length of the channels [km] (default: 1)
+    :param models: The models of the channels (default: None, no models)
+    :return: ordered dictionary with the delivered pairs per sim run, the wall time per sim run and per pair [s]
+    """
+    from src.network.StarNetwork import StarNetwork
+
+    network = StarNetwork(models, channels_n=channels_n)
+    network.channels_length = length
+    delivered = 0
+    start = time.perf_counter()
+    for _ in range(trials):
+        results = network.multiplexed_entangle_nodes()
+        if isinstance(results, list):
+            delivered += len(results)
+    wall_time = time.perf_counter() - start
+    return OrderedDict([("channels", channels_n), ("pairs_per_run", delivered / trials),
+                        ("wall_time_per_run", wall_time / trials),
+                        ("wall_time_per_pair", wall_time / delivered if delivered > 0 else float("inf"))])
+
+
+def benchmark_multiplexing(channels: List[int] = [1, 2, 3], trials: int = 100, length: float = 1,
+                           models: dict = None) -> List[Dict[str, float]]:
+    """
+    Measure how the throughput of the delivered pairs per sim run and the cost of the simulation scale with the
+    number of multiplexed channels.
+    :param channels: The numbers of multiplexed channels to measure (default: [1, 2, 3])
+    :param trials: The number of trials of each measure (default: 100)
+    :param length: The length of the channels [km] (default: 1)
+    :param models: The models of the channels (default: None, no models)
+    :return: The list of the measures (see measure_multiplexing)
+    """
+    measures = [measure_multiplexing(channels_n, trials, length, models) for channels_n in channels]
+    print(f"{'channels':>8} {'pairs/run':>10} {'wall/run [ms]':>14} {'wall/pair [ms]':>15}")
+    for measure in measures:
+        print(f"{measure['channels']:>8} {measure['pairs_per_run']:>10.3f} {measure['wall_time_per_run'] * 1e3:>14.3f} "
+              f"{measure['wall_time_per_pair'] * 1e3:>15.3f}")
+    return measures
+
+
+if __name__ == "__main__":
+    # optional arguments: the number of trials and the length of the channels [km]
+    benchmark_multiplexing(trials=int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+                           length=float(sys.argv[2]) if len(sys.argv) > 2 else 1)
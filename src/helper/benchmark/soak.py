@@ -0,0 +1,144 @@
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+# number of trials the growth is reported for
+GROWTH_TRIALS: int = 10000
+
+
+def rss_bytes() -> int:
+    """
+    Get the resident set size of the current process.
+    :return: The resident set size [bytes], the peak one if the current one is not available (not on Linux)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def top_growth(start: tracemalloc.Snapshot, end: tracemalloc.Snapshot, top: int = 10) \
+        -> List[Tuple[str, int, int]]:
+    """
+    Get the allocation sites that grew the most between two snapshots of tracemalloc.
+    :param start: The first snapshot
+    :param end: The last snapshot
+    :param top: The number of allocation sites (default: 10)
+    :return: The list of (site, size growth [bytes], count growth) of the sites that grew, the largest growth first
+    """
+    statistics = end.compare_to(start, "lineno")
+    growth = [(str(stat.traceback), stat.size_diff, stat.count_diff) for stat in statistics if stat.size_diff > 0]
+    return sorted(growth, key=lambda site: site[1], reverse=True)[:top]
+
+
+def per_trials(growth: float, trials: int) -> float:
+    """
+    Scale a growth to GROWTH_TRIALS trials.
+    :param growth: The growth over the trials
+    :param trials: The number of trials
+    :return: The growth per GROWTH_TRIALS trials
+    """
+    return growth * GROWTH_TRIALS / trials if trials > 0 else 0.0
+
+
+def soak(trials: int = GROWTH_TRIALS, models_name: str = "combined", method_name: str = "entangle_nodes",
+         nodes: List[int] = None, length: float = 1000, every: int = 1000, warmup: int = 100,
+         top: int = 10) -> Dict[str, object]:
+    """
+    Run the trials of an Experiment (as its run does, with constant memory statistics and without storing the
+    records) and sample the memory of the process: the resident set size and the memory traced by tracemalloc.
+    The warm-up trials fill the caches (e.g. of the noise models) before the first sample.
+    :param trials: The number of trials (default: GROWTH_TRIALS)
+    :param models_name: The name of the models (default: "combined")
+    :param method_name: The name of the method (default: "entangle_nodes")
+    :param nodes: The nodes to run the method on (default: None, [1, 4] for entangle_nodes and [1, 2, 4] otherwise)
+    :param length: The length of the channels [m] (default: 1000)
+    :param every: The number of trials between two samples (default: 1000)
+    :param warmup: The number of warm-up trials (default: 100)
+    :param top: The number of allocation sites reported (default: 10)
+    :return: ordered dictionary with the samples (trials, rss, traced), the growths per GROWTH_TRIALS trials
+    [bytes] and the allocation sites that grew the most (see top_growth)
+    """
+    from src.helper.main.Experiment import Experiment
+    from src.helper.main.main import select_method, select_models
+    from src.helper.statistics.StreamingStatistics import SweepPointStatistics
+    from src.network.StarNetwork import StarNetwork
+
+    assert (trials > 0 and every > 0 and warmup >= 0)
+    if nodes is None:
+        nodes = [1, 4] if method_name == "entangle_nodes" else [1, 2, 4]
+    network = StarNetwork(select_models(models_name))
+    network.build(nodes)
+    network.channels_length = length
+    experiment = Experiment(network)
+    method = select_method(network, method_name, len(nodes))
+    statistics = SweepPointStatistics(2 if method_name == "protocol_a" else 1)
+
+    samples = []
+    start_time = time.perf_counter()
+    # the methods print every run of the simulation
+    with contextlib.redirect_stdout(io.StringIO()) as stdout:
+        for trial in range(warmup):
+            experiment.run_one_simulation(method, nodes, length, trial)
+        tracemalloc.start()
+        start = tracemalloc.take_snapshot()
+        samples.append((0, rss_bytes(), tracemalloc.get_traced_memory()[0]))
+        for trial in range(1, trials + 1):
+            statistics.add_trial(experiment.run_one_simulation(method, nodes, length, warmup + trial))
+            if trial % every == 0 or trial == trials:
+                samples.append((trial, rss_bytes(), tracemalloc.get_traced_memory()[0]))
+                # the output is not kept
+                stdout.seek(0)
+                stdout.truncate()
+        end = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    _, start_rss, start_traced = samples[0]
+    _, end_rss, end_traced = samples[-1]
+    return OrderedDict([("trials", trials), ("seconds", time.perf_counter() - start_time),
+                        ("fidelity", statistics.fidelity.mean), ("samples", samples),
+                        ("rss_growth", per_trials(end_rss - start_rss, trials)),
+                        ("traced_growth", per_trials(end_traced - start_traced, trials)),
+                        ("top", top_growth(start, end, top))])
+
+
+def benchmark_soak(trials: int = GROWTH_TRIALS, threshold_kib: float = 1024, **kwargs) -> bool:
+    """
+    Run the soak (see soak), show the memory samples and the allocation sites that grew the most, and check the
+    growth of the traced memory.
+    :param trials: The number of trials (default: GROWTH_TRIALS)
+    :param threshold_kib: The maximum growth of the traced memory per GROWTH_TRIALS trials [KiB] (default: 1024)
+    :param kwargs: The other arguments of soak
+    :return: True if the growth is within the threshold, False otherwise
+    """
+    result = soak(trials, **kwargs)
+    print(f"{result['trials']} trials in {result['seconds']:.1f} s, average fidelity {result['fidelity']:.4f}")
+    print(f"{'trials':>8} {'rss [KiB]':>12} {'traced [KiB]':>13}")
+    for trial, rss, traced in result["samples"]:
+        print(f"{trial:>8} {rss / 1024:>12.0f} {traced / 1024:>13.1f}")
+    print(f"Growth per {GROWTH_TRIALS} trials: rss {result['rss_growth'] / 1024:.1f} KiB, "
+          f"traced {result['traced_growth'] / 1024:.1f} KiB")
+    print("Top growing allocation sites:")
+    for site, size, count in result["top"]:
+        print(f"{size / 1024:>10.1f} KiB {count:>+8} blocks  {site}")
+
+    if result["traced_growth"] > threshold_kib * 1024:
+        print(f"The traced memory grows more than {threshold_kib} KiB per {GROWTH_TRIALS} trials")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    # optional arguments: the number of trials, the threshold [KiB per 10k trials] and the name of the method
+    sys.exit(0 if benchmark_soak(int(sys.argv[1]) if len(sys.argv) > 1 else GROWTH_TRIALS,
+                                 float(sys.argv[2]) if len(sys.argv) > 2 else 1024,
+                                 method_name=sys.argv[3] if len(sys.argv) > 3 else "entangle_nodes") else 1)
@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# root folder of the project (the one containing the src package)
+PROJECT_ROOT: str = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+
+# modules that must never be loaded while parsing the arguments, showing the help or running a single simulation
+HEAVY_MODULES: List[str] = ["pandas", "matplotlib", "tqdm"]
+# modules that must never be loaded while parsing the arguments or showing the help
+SIMULATION_MODULES: List[str] = ["netsquid", "numpy"]
+# a single simulation, without the experiment suite (experiment_num=0)
+SINGLE_RUN_CODE: str = "from src.main import main\nmain('combined', 'entangle_nodes', [1, 4], False, 0)"
+
+
+def run_python(code: str, options: List[str] = None) -> subprocess.CompletedProcess:
+    """
+    Run the given code in a fresh python interpreter, from the root of the project.
+    :param code: The python code to run
+    :param options: The list of the interpreter options (e.g., ["-X", "importtime"]) (default: None, no options)
+    :return: The CompletedProcess of the interpreter that has been run
+    """
+    options = [] if options is None else options
+    return subprocess.run([sys.executable] + options + ["-c", code], cwd=PROJECT_ROOT,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def parse_import_times(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Parse the output of `python -X importtime`.
+    :param stderr: The standard error of the interpreter
+    :return: A dictionary of module names to the tuple (self time, cumulative time), both in microseconds
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return times
+
+
+def measure_import_times(module: str = "src.main") -> Dict[str, Tuple[int, int]]:
+    """
+    Measure the import time of every module imported (directly or not) by the given module.
+    :param module: The module to import (default: "src.main")
+    :return: A dictionary of module names to the tuple (self time, cumulative time), both in microseconds
+    """
+    cmd = run_python(f"import {module}", ["-X", "importtime"])
+    if cmd.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{cmd.stderr}")
+    return parse_import_times(cmd.stderr)
+
+
+def loaded_modules(code: str) -> List[str]:
+    """
+    Run the given code in a fresh interpreter and return the top level packages loaded at the end of it.
+    :param code: The python code to run
+    :return: The sorted list of the top level packages in sys.modules
+    """
+    cmd = run_python(code + "\nimport sys\nprint(','.join(sorted({m.split('.')[0] for m in sys.modules})))")
+    if cmd.returncode != 0:
+        raise RuntimeError(f"Running the code failed:\n{cmd.stderr}")
+    return cmd.stdout.strip().splitlines()[-1].split(",")
+
+
+def startup_violations(code: str, forbidden: List[str]) -> List[str]:
+    """
+    Get the forbidden packages that are loaded by the given code.
+    :param code: The python code to run
+    :param forbidden: The packages that must not be loaded
+    :return: The list of the forbidden packages that have been loaded
+    """
+    modules = loaded_modules(code)
+    return [module for module in forbidden if module in modules]
+
+
+def show_import_times(times: Dict[str, Tuple[int, int]], top: int = 20) -> str:
+    """
+    Show the modules with the largest cumulative import time.
+    :param times: The import times returned by measure_import_times
+    :param top: The number of modules to show (default: 20)
+    :return: The message that has been printed
+    """
+    ordered = sorted(times.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    msg = f"{'cumulative [us]':>16} {'self [us]':>10}  module\n"
+    msg += "\n".join([f"{cumulative:>16} {self_time:>10}  {name}" for name, (self_time, cumulative) in ordered])
+    print(msg)
+    return msg
+
+
+def benchmark_startup(budget_us: int = 0, top: int = 20) -> bool:
+    """
+    Measure the import time of the command line entry point and check that the lazy imports are respected.
+    :param budget_us: The maximum cumulative import time of src.main in microseconds, 0 to disable (default: 0)
+    :param top: The number of modules to show (default: 20)
+    :return: True if the startup is within the budget and no forbidden module is loaded, False otherwise
+    """
+    times = measure_import_times("src.main")
+    show_import_times(times, top)
+    total = times.get("src.main", (0, 0))[1]
+    print(f"Total import time of src.main: {total} us")
+
+    ok = True
+    if budget_us > 0 and total > budget_us:
+        print(f"Import time over the budget of {budget_us} us")
+        ok = False
+
+    # parsing the arguments and the help must not load the simulation libraries
+    violations = startup_violations("import src.main", SIMULATION_MODULES + HEAVY_MODULES)
+    if len(violations) != 0:
+        print(f"Modules loaded while importing src.main: {violations}")
+        ok = False
+    # a single simulation loads NetSquid, but not the dataframe and plotting libraries of the experiments
+    violations = startup_violations(SINGLE_RUN_CODE, HEAVY_MODULES)
+    if len(violations) != 0:
+        print(f"Modules loaded by a single simulation (experiment_num=0): {violations}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    # optional argument: the maximum import time of src.main in microseconds
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    sys.exit(0 if benchmark_startup(budget) else 1)
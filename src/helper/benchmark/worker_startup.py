@@ -0,0 +1,89 @@
+import os
+import statistics
+import sys
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from src.helper.benchmark.startup import run_python
+
+# the code run by a new worker: the imports, then the network is built (or restored from the snapshot at the path)
+SETUP_CODE: str = ("import time\nstart = time.perf_counter()\nfrom src.helper.main.main import select_models\n"
+                   "from src.network.NetworkTemplate import NetworkTemplate\n"
+                   "from src.network.StarNetwork import StarNetwork\n"
+                   "imports = time.perf_counter() - start\nstart = time.perf_counter()\n")
+BUILD_CODE: str = SETUP_CODE + "StarNetwork({models}).build()\n"
+RESTORE_CODE: str = SETUP_CODE + "with open({path!r}, 'rb') as f:\n    NetworkTemplate.restore(f.read())\n"
+REPORT_CODE: str = "print(imports, time.perf_counter() - start)"
+
+
+def measure_worker(code: str) -> Tuple[float, float]:
+    """
+    Run the start-up of a worker in a fresh python interpreter.
+    :param code: The code of the start-up, followed by the report of the times (see BUILD_CODE and RESTORE_CODE)
+    :return: tuple of the import time and of the time spent getting the network [s]
+    """
+    cmd = run_python(code + REPORT_CODE)
+    if cmd.returncode != 0:
+        raise RuntimeError(f"Starting the worker failed:\n{cmd.stderr}")
+    imports, network = cmd.stdout.strip().splitlines()[-1].split()
+    return float(imports), float(network)
+
+
+def measure_worker_startup(models_name: str = "combined", repeats: int = 5) -> Dict[str, float]:
+    """
+    Measure the start-up of the workers that build their network from scratch and of the ones that restore it from
+    the snapshot of a template (see NetworkTemplate), each one in a fresh interpreter.
+    :param models_name: The name of the models of the network (default: "combined")
+    :param repeats: The number of workers started in each way (default: 5)
+    :return: ordered dictionary with the median times [s] (nan for the restore, if the network can not be pickled),
+    the speedup of the restore and the size of the snapshot [bytes]
+    """
+    from src.helper.main.main import select_models
+    from src.network.NetworkTemplate import NetworkTemplate
+
+    template = NetworkTemplate(select_models(models_name))
+    models = f"select_models({models_name!r})"
+    builds = [measure_worker(BUILD_CODE.format(models=models)) for _ in range(repeats)]
+    restores = []
+    snapshot_bytes = 0
+    if template.picklable:
+        snapshot = template.snapshot()
+        snapshot_bytes = len(snapshot)
+        fd, path = tempfile.mkstemp(suffix=".pickle")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(snapshot)
+            restores = [measure_worker(RESTORE_CODE.format(path=path)) for _ in range(repeats)]
+        finally:
+            os.remove(path)
+
+    build = statistics.median([network for _, network in builds])
+    restore = statistics.median([network for _, network in restores]) if len(restores) != 0 else float("nan")
+    return OrderedDict([("imports", statistics.median([imports for imports, _ in builds])), ("build", build),
+                        ("restore", restore), ("speedup", build / restore if restore > 0 else float("nan")),
+                        ("snapshot_bytes", snapshot_bytes)])
+
+
+def benchmark_worker_startup(models_name: str = "combined", repeats: int = 5) -> bool:
+    """
+    Measure the start-up of the workers, and check that restoring the network of a template is faster than building it.
+    :param models_name: The name of the models of the network (default: "combined")
+    :param repeats: The number of workers started in each way (default: 5)
+    :return: True if the restore is faster than the build, False otherwise (or if the network can not be pickled)
+    """
+    measure = measure_worker_startup(models_name, repeats)
+    print(f"Imports of a worker: {measure['imports'] * 1e3:.3f} ms")
+    print(f"Network built from scratch: {measure['build'] * 1e3:.3f} ms")
+    if measure["snapshot_bytes"] == 0:
+        print("The network can not be pickled, the workers build it (or inherit it when they are forked)")
+        return False
+    print(f"Network restored from the snapshot ({measure['snapshot_bytes']} bytes): {measure['restore'] * 1e3:.3f} ms")
+    print(f"Speedup: {measure['speedup']:.2f}x")
+    return measure["restore"] < measure["build"]
+
+
+if __name__ == "__main__":
+    # optional arguments: the name of the models and the number of workers started in each way
+    sys.exit(0 if benchmark_worker_startup(sys.argv[1] if len(sys.argv) > 1 else "combined",
+                                           int(sys.argv[2]) if len(sys.argv) > 2 else 5) else 1)
@@ -0,0 +1,263 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from typing import Dict, List
+
+from src.helper.error.error import error_exit
+from src.helper.main.converter.converter import converter_exit, converter_string_boolean, converter_string_int, \
+    converter_string_list_int
+from src.helper.main.main import checker
+from src.models.ModelsFactory import ModelsFactory
+
+# number of lengths of the channels in each experiment (see Experiment._lengths)
+EXPERIMENT_LENGTHS_N: int = 100
+# relative cost of a single run of each method
+METHOD_COST: Dict[str, int] = {"entangle_nodes": 1, "protocol_a": 2}
+# columns of the summary table
+SUMMARY_COLUMNS: List[str] = ["index", "models_name", "method_name", "nodes", "debug", "experiment_num", "status",
+                              "seconds", "fidelity", "message"]
+
+# the summary table goes in the out folder of the project (next to src), wherever the batch is started from
+SUMMARY_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))), "out", "batch-summary.csv")
+
+# warm networks of the current process, one for each models name
+_networks: dict = {}
+
+
+def read_manifest(path: str) -> List[dict]:
+    """
+    Read the manifest of the runs, a .json (list of objects or object with the "runs" list), .csv or .toml (array of
+    tables called "runs") file where every run has the keys: models_name, method_name, nodes, debug, experiment_num.
+    :param path: The path of the manifest
+    :return: list of the validated runs
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == ".json":
+        with open(path) as f:
+            entries = json.load(f)
+    elif extension == ".csv":
+        with open(path, newline="") as f:
+            entries = list(csv.DictReader(f))
+    elif extension == ".toml":
+        try:
+            import tomllib as toml_lib  # python 3.11+
+            with open(path, "rb") as f:
+                entries = toml_lib.load(f)
+        except ImportError:
+            try:
+                import toml as toml_lib
+            except ImportError:
+                error_exit("Reading a .toml manifest needs python 3.11+ or the toml package, use .json or .csv")
+            entries = toml_lib.load(path)
+    else:
+        error_exit("Invalid manifest, please provide a .json, .csv or .toml file")
+    if isinstance(entries, dict):
+        entries = entries.get("runs", [])
+    return [validate_entry(entry) for entry in entries]
+
+
+def validate_entry(entry: dict) -> dict:
+    """
+    Validate a run of the manifest (with the same checks of the command line arguments), the values can be either
+    strings (as in the command line) or already converted; the missing values are set to the defaults.
+    :param entry: dict with the keys models_name, method_name, nodes, debug, experiment_num
+    :return: dict with the converted values
+    """
+    nodes = entry.get("nodes", [])
+    if isinstance(nodes, str):
+        # in a csv file the nodes can be separated by ";" too
+        nodes = [] if nodes.strip() == "" else converter_exit(
+            converter_string_list_int, nodes.replace(";", ","),
+            "Invalid nodes, please provide a list of integers separated by ','")
+    debug = entry.get("debug", False)
+    if isinstance(debug, str):
+        debug = converter_exit(converter_string_boolean, debug, "Invalid debug, please provide 'True' or 'False")
+    experiment_num = entry.get("experiment_num", 0)
+    if isinstance(experiment_num, str):
+        experiment_num = converter_exit(converter_string_int, experiment_num,
+                                        "Invalid experiment_num, please provide an integer")
+    run = dict(models_name=entry.get("models_name", "empty"), method_name=entry.get("method_name", "protocol_a"),
+               nodes=nodes, debug=debug, experiment_num=experiment_num)
+
+    checker(not ModelsFactory.is_valid(run["models_name"]),
+            "Invalid models_name, please provide 'combined' or 'empty'")
+    checker(run["method_name"] not in ["protocol_a", "entangle_nodes"],
+            "Invalid method_name, please provide 'protocol_a' or 'entangle_nodes'")
+    checker(len(nodes) not in [0, 2, 3], "Invalid number of nodes, please provide a list of length 0, 2 or 3")
+    checker(len(nodes) != len(set(nodes)), "Invalid nodes, please provide a list of unique integers")
+    checker(any(node < 1 or node > 4 for node in nodes),
+            "Invalid nodes, please provide a list of integers between 1 and 4")
+    checker(experiment_num < 0, "Invalid experiment_num, please provide a non-negative integer")
+    return run
+
+
+def estimate_cost(run: dict) -> int:
+    """
+    Estimate the cost of a run, as the number of single simulations weighted by the cost of the method.
+    :param run: The validated run
+    :return: The estimated cost
+    """
+    simulations = 1 if run["experiment_num"] == 0 else run["experiment_num"] * EXPERIMENT_LENGTHS_N
+    return simulations * METHOD_COST[run["method_name"]]
+
+
+def order_runs(runs: List[dict]) -> List[dict]:
+    """
+    Number the runs (in the order of the manifest) and sort them to start the longest ones first.
+    :param runs: The validated runs
+    :return: list of the runs with the "index" key, sorted by decreasing cost
+    """
+    indexed = [dict(run, index=index) for index, run in enumerate(runs)]
+    return sorted(indexed, key=estimate_cost, reverse=True)
+
+
+def get_network(models_name: str):
+    """
+    Get the warm network of the current process for the given models, build it if needed.
+    :param models_name: The name of the models ("combined" or "empty")
+    :return: The StarNetwork
+    """
+    from src.helper.main.main import select_models
+    from src.network.StarNetwork import StarNetwork
+
+    if models_name not in _networks:
+        _networks[models_name] = StarNetwork(select_models(models_name))
+    return _networks[models_name]
+
+
+def template_networks(models_names: List[str], start_method: str) -> dict:
+    """
+    Build the networks of the given models once (see NetworkTemplate), to start the workers with a copy of them.
+    :param models_names: The names of the models
+    :param start_method: The start method of the worker processes ("fork", "spawn" or "forkserver")
+    :return: A dictionary of the models names to the networks (inherited by the forked workers) or to their
+    snapshots (restored by the other workers), the networks that can not be pickled are built by the workers
+    """
+    from src.helper.main.main import select_models
+    from src.network.NetworkTemplate import NetworkTemplate
+
+    networks = {}
+    for models_name in models_names:
+        template = NetworkTemplate(select_models(models_name))
+        if start_method == "fork":
+            networks[models_name] = template.network
+        elif template.picklable:
+            networks[models_name] = template.snapshot()
+    return networks
+
+
+def install_networks(networks: dict):
+    """
+    Install the networks of the templates (see template_networks) as the warm networks of the current process, the
+    initializer of the workers.
+    :param networks: A dictionary of the models names to the networks or to their snapshots
+    """
+    from src.network.NetworkTemplate import NetworkTemplate
+
+    for models_name, network in networks.items():
+        _networks[models_name] = NetworkTemplate.restore(network) if isinstance(network, bytes) else network
+
+
+def run_entry(run: dict) -> dict:
+    """
+    Run a single entry of the manifest on the warm network of the current process.
+    :param run: The validated run with the "index" key
+    :return: The row of the summary table
+    """
+    # imported here, since main.py imports this module
+    from src.main import main
+
+    row = dict(run, nodes=",".join([str(node) for node in run["nodes"]]), status="ok", fidelity="", message="")
+    start = time.perf_counter()
+    try:
+        result = main(run["models_name"], run["method_name"], list(run["nodes"]), run["debug"], run["experiment_num"],
+                      star_network=get_network(run["models_name"]))
+        if isinstance(result, list):
+            row["fidelity"] = ";".join([str(pair["fidelity"]) for pair in result])
+        elif isinstance(result, dict):
+            row["message"] = result.get("message", "")
+    except SystemExit as e:
+        # invalid runs exit the program, only this run is marked as failed
+        row["status"] = "error"
+        row["message"] = str(e.code)
+    except Exception as e:
+        row["status"] = "error"
+        row["message"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def run_batch(runs: List[dict], processes: int = 1) -> List[dict]:
+    """
+    Run all the entries, the longest first, either in the current process or in a pool of worker processes (every
+    worker keeps its warm networks between the entries). The workers start with a copy of the networks built once
+    by the current process (see template_networks), instead of building them again.
+    :param runs: The validated runs
+    :param processes: The number of processes, 1 to run everything in the current process (default 1)
+    :return: The rows of the summary table, in the order of the manifest
+    """
+    assert (processes > 0)
+    ordered = order_runs(runs)
+    if processes == 1:
+        rows = [run_entry(run) for run in ordered]
+    else:
+        networks = template_networks(sorted({run["models_name"] for run in runs}), multiprocessing.get_start_method())
+        with multiprocessing.Pool(processes, initializer=install_networks, initargs=(networks,)) as pool:
+            rows = list(pool.imap_unordered(run_entry, ordered, chunksize=1))
+    return sorted(rows, key=lambda row: row["index"])
+
+
+def write_summary(rows: List[dict], path: str) -> str:
+    """
+    Write the summary table as a csv file and print it.
+    :param rows: The rows of the summary table
+    :param path: The path of the csv file
+    :return: The printed table
+    """
+    with open(path, "w+", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    widths = [max([len(column)] + [len(str(row[column])) for row in rows]) for column in SUMMARY_COLUMNS]
+    lines = [" | ".join([column.ljust(width) for column, width in zip(SUMMARY_COLUMNS, widths)])]
+    lines += [" | ".join([str(row[column]).ljust(width) for column, width in zip(SUMMARY_COLUMNS, widths)])
+              for row in rows]
+    msg = "\n".join(lines)
+    print(msg)
+    return msg
+
+
+def check_summary_path(path: str) -> str:
+    """
+    Create the folder of the summary table and check that the table can be written, before running the manifest.
+    :param path: The path of the csv file of the summary table
+    :return: The absolute path of the csv file
+    """
+    path = os.path.abspath(path)
+    folder = os.path.dirname(path)
+    try:
+        os.makedirs(folder, exist_ok=True)
+    except OSError as e:
+        error_exit(f"Invalid summary path, the folder {folder} can not be created: {e}")
+    checker(not os.access(folder, os.W_OK) or (os.path.exists(path) and not os.access(path, os.W_OK)),
+            f"Invalid summary path, {path} is not writable")
+    return path
+
+
+def batch(manifest_path: str, processes: int = 1, summary_path: str = SUMMARY_PATH) -> List[dict]:
+    """
+    Read the manifest, run all its entries and write the summary table.
+    :param manifest_path: The path of the manifest (.json, .csv or .toml)
+    :param processes: The number of processes (default 1)
+    :param summary_path: The path of the csv file of the summary table (default SUMMARY_PATH, out/batch-summary.csv
+    of the project)
+    :return: The rows of the summary table
+    """
+    summary_path = check_summary_path(summary_path)
+    rows = run_batch(read_manifest(manifest_path), processes)
+    write_summary(rows, summary_path)
+    return rows
@@ -1,10 +1,18 @@
+import inspect
+import time
+
 import numpy as np
-import pandas as pd
-from matplotlib import pyplot as plt
+from netsquid import QFormalism, get_qstate_formalism, set_qstate_formalism, set_random_state
 from numpy import ndarray
-from tqdm import tqdm
 
-from src.helper.main.main import run_method_with_nodes
+from src.helper.error.error import error_exit
+from src.helper.main.main import run_method_with_nodes, select_models
+from src.helper.network.EventTracer import EventTracer
+from src.helper.network.MemoryRecorder import MemoryRecorder, PROTOCOL_STAGES
+from src.helper.network.entanglement_swapping_utils.results import PairResult, RESULT_DTYPE
+from src.helper.statistics.ExactExpectation import ExactExpectation
+from src.helper.statistics.FidelityPredictor import FidelityPredictor
+from src.helper.statistics.StreamingStatistics import StreamingStatistics, SweepPointStatistics
 from src.network.StarNetwork import StarNetwork
 
 
@@ -24,13 +32,117 @@ class Experiment:
     fig_path (default "./out/fidelity-over-length.png")
         The path of the figure generated by the experiment
 
+    store_records (default False)
+        If the raw records of all the trials are stored, otherwise only the statistics of each length are kept
+
+    records (read only)
+        The numpy structured array (see RESULT_DTYPE) with one record for each pair of every trial of the last run,
+        empty if store_records is not set
+
+    statistics (read only)
+        The statistics (see SweepPointStatistics) of each length of the last run
+
+    record_memories_every (default 0)
+        If not 0, the memories of the network are recorded (see MemoryRecorder) one trial every
+        `record_memories_every` trials, and dumped next to the csv file (with the "-memories.npz" suffix)
+
+    trace_events_capacity (default 0)
+        If not 0, the events of the protocols and of the engine are traced (see EventTracer) in a ring buffer of
+        `trace_events_capacity` records, exported next to the csv file (with the "-trace.json" and "-trace.npz"
+        suffixes), and the statistics of the number of events of each trial are added to the csv file
+
+    sim_time_horizon (default 0)
+        If not 0, the maximum simulation time [ns] of each run of the simulation of a trial (see StarNetwork)
+
+    wall_time_limit (default 0)
+        If not 0, the maximum wall-clock time [s] of each run of the simulation of a trial (see StarNetwork). The
+        trials that reach one of the limits are counted as timeouts (and as lost), logged next to the csv file (with
+        the "-timeouts.csv" suffix) with their configuration and seed, and the sweep continues
+
+    seed (default None)
+        If not None, the random state of NetSquid is seeded with seed + trial at the start of every trial, so that
+        every trial (e.g. a timed out one) can be reproduced
+
+    common_random_numbers (default False)
+        If the trials with the same index use the same random numbers at every length and with every model variant:
+        the random state of NetSquid is seeded as with seed (0 if seed is None), and the random number generators of
+        the loss models of the channels (see ModelsFactory) are reseeded too. The paired difference of the fidelity of
+        each trial from the one of the previous length is added to the csv file (the "length_diff" columns)
+
+    model_variants (default [])
+        The models (e.g. ["empty", "combined:t1=1e-5"], see ModelsFactory) to compare with the models of the network:
+        at every length the same trials are run with each variant, and the fidelity of each variant and the paired
+        difference of the fidelity of each trial from the one with the models of the network are added to the csv
+        file (the "variant" columns). The differences are of the unweighted fidelity of the trials (0 if lost), and
+        are much less noisy with common_random_numbers
+
+    stratified_bell_outcomes (default False)
+        If the outcomes of the Bell measurements are forced in fixed proportions (see StarNetwork), the run uses the
+        density matrix formalism and the stratified estimate of the fidelity and the fidelity of each outcome are
+        added to the csv file (the "st_" and "outcome" columns). The cycle of the outcomes restarts at every length, so
+        all the lengths force the same outcomes, and num_each_simulation must be a multiple of the number of strata
+        (4, 16 for protocol_a) so that every outcome is forced equally often
+
+    continuous_frequency (default 0)
+        If not 0, the trials of entangle_nodes are generated continuously by the sources, clocked at this frequency
+        [Hz], and all the trials of a length are harvested during a single run of the simulation (see
+        StarNetwork.harvest_entangle_nodes), streamed into the statistics. The records of the trials are not stored,
+        and the trials are not seeded one by one in this mode
+
+    repeat_until_success (default False)
+        If the sources repeat the generation until success (see StarNetwork), the trials are never lost and the
+        statistics of the number of attempts of each trial are added to the csv file (the "attempts" columns)
+
+    pauli_frame (default False)
+        If the corrections of the Bell measurements are tracked as Pauli frames instead of applied (see StarNetwork):
+        the fidelities are the same, without executing the gates of the corrections
+
+    exact_expectation (default False)
+        If the trials are not run, and the exact expected results of each length are computed instead with a single
+        pass on the density matrices (see ExactExpectation): the fidelity (the limit of the mean of the trials), the
+        fidelity of the pairs that were not lost, the success rate and the probability of each outcome of the Bell
+        measurement. Only for entangle_nodes and protocol_a, without biased models and continuous generation
+
+    control_variate (default False)
+        If the analytic prediction of the fidelity of each trial (see FidelityPredictor, 0 if the trial was lost) is
+        used as a control variate: the optimal coefficient is estimated online, and the variance-reduced estimate of
+        the fidelity of the trials is added to the csv file (the "cv_" columns). The expected value of the control
+        assumes that the trials fail only by losing qubits, so the timeouts should be disabled, and it is not used
+        with biased models (importance sampling)
+
+    models
+        The models of the channels of the network, can be set with the name and the parameters of the models
+        (e.g. "combined:t1=1e-5,seed=7", see ModelsFactory). With biased models (e.g. "combined:bias=10") the trials
+        are weighted by their likelihood ratio, and the unbiased estimates are added to the csv file (the "is_" columns)
+
     """
     _num_each_simulation: int = 100
     _csv_path: str = "../out/data.csv"
     _lengths: ndarray = np.arange(10, 1000 + 10, 10)
     _fig_path: str = "../out/fidelity-over-length.png"
+    _max_pairs_per_trial: int = 2
+    _max_events_per_trial: int = 1000  # range of the histogram of the number of events of each trial
+    _max_attempts_per_trial: int = 10000  # range of the histogram of the number of attempts of each trial
 
     _network: StarNetwork
+    _records: ndarray = np.zeros(0, dtype=RESULT_DTYPE)
+    _records_n: int = 0
+    _store_records: bool = False
+    _statistics: list = []
+    _record_memories_every: int = 0
+    _trace_events_capacity: int = 0
+    _sim_time_horizon: float = 0
+    _wall_time_limit: float = 0
+    _seed: int = None
+    _stratified_bell_outcomes: bool = False
+    _common_random_numbers: bool = False
+    _model_variants: list = []
+    _variants_channel_models: list = None  # models of the channels of the network and of each variant, built once
+    _control_variate: bool = False
+    _continuous_frequency: float = 0
+    _repeat_until_success: bool = False
+    _pauli_frame: bool = False
+    _exact_expectation: bool = False
 
     def __init__(self, network: StarNetwork):
         """
@@ -65,6 +177,125 @@ class Experiment:
         """
         return self._fig_path
 
+    @property
+    def records(self) -> ndarray:
+        """
+        :type: ndarray
+        """
+        return self._records[:self._records_n]
+
+    @property
+    def store_records(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._store_records
+
+    @property
+    def record_memories_every(self) -> int:
+        """
+        :type: int
+        """
+        return self._record_memories_every
+
+    @property
+    def trace_events_capacity(self) -> int:
+        """
+        :type: int
+        """
+        return self._trace_events_capacity
+
+    @property
+    def sim_time_horizon(self) -> float:
+        """
+        :type: float
+        """
+        return self._sim_time_horizon
+
+    @property
+    def wall_time_limit(self) -> float:
+        """
+        :type: float
+        """
+        return self._wall_time_limit
+
+    @property
+    def seed(self) -> int:
+        """
+        :type: int
+        """
+        return self._seed
+
+    @property
+    def stratified_bell_outcomes(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._stratified_bell_outcomes
+
+    @property
+    def common_random_numbers(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._common_random_numbers
+
+    @property
+    def model_variants(self) -> list:
+        """
+        :type: List[dict or ModelsFactory]
+        """
+        return self._model_variants
+
+    @property
+    def continuous_frequency(self) -> float:
+        """
+        :type: float
+        """
+        return self._continuous_frequency
+
+    @property
+    def repeat_until_success(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._repeat_until_success
+
+    @property
+    def pauli_frame(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._pauli_frame
+
+    @property
+    def exact_expectation(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._exact_expectation
+
+    @property
+    def control_variate(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._control_variate
+
+    @property
+    def models(self):
+        """
+        :type: dict or ModelsFactory
+        """
+        return self._network.models
+
+    @property
+    def statistics(self) -> list:
+        """
+        :type: List[SweepPointStatistics]
+        """
+        return self._statistics
+
     ###########
     # SETTERS #
     ###########
@@ -101,6 +332,155 @@ class Experiment:
         assert (".png" in filename)
         self._fig_path = filename
 
+    @record_memories_every.setter
+    def record_memories_every(self, every: int):
+        """
+        Set how often the memories of the network are recorded, 0 to disable the recording.
+
+        :param every: Record one trial every `every` trials
+        :raises AssertionError: If every is smaller than 0
+        """
+        assert (every >= 0)
+        self._record_memories_every = every
+
+    @trace_events_capacity.setter
+    def trace_events_capacity(self, capacity: int):
+        """
+        Set the number of records of the ring buffer of the tracer of the events, 0 to disable the tracing.
+
+        :param capacity: The number of records
+        :raises AssertionError: If capacity is smaller than 0
+        """
+        assert (capacity >= 0)
+        self._trace_events_capacity = capacity
+
+    @sim_time_horizon.setter
+    def sim_time_horizon(self, ns: float):
+        """
+        Set the maximum simulation time of each run of the simulation of a trial, 0 to disable it.
+
+        :param ns: The amount of nanoseconds
+        :raises AssertionError: If ns is smaller than 0
+        """
+        assert (ns >= 0)
+        self._sim_time_horizon = ns
+
+    @wall_time_limit.setter
+    def wall_time_limit(self, seconds: float):
+        """
+        Set the maximum wall-clock time of each run of the simulation of a trial, 0 to disable it.
+
+        :param seconds: The amount of seconds
+        :raises AssertionError: If seconds is smaller than 0
+        """
+        assert (seconds >= 0)
+        self._wall_time_limit = seconds
+
+    @seed.setter
+    def seed(self, seed: int):
+        """
+        Set the seed of the trials, None to not seed them.
+
+        :param seed: The seed of the first trial (seed + trial for the following ones)
+        :raises AssertionError: If seed is smaller than 0
+        """
+        assert (seed is None or seed >= 0)
+        self._seed = seed
+
+    @stratified_bell_outcomes.setter
+    def stratified_bell_outcomes(self, stratified: bool):
+        """
+        Set if the outcomes of the Bell measurements are forced in fixed proportions.
+
+        :param stratified: True to force the outcomes
+        """
+        self._stratified_bell_outcomes = stratified
+
+    @common_random_numbers.setter
+    def common_random_numbers(self, common: bool):
+        """
+        Set if the trials with the same index use the same random numbers at every length and with every variant.
+
+        :param common: True to use common random numbers
+        """
+        self._common_random_numbers = common
+
+    @model_variants.setter
+    def model_variants(self, variants: list):
+        """
+        Set the models to compare with the models of the network.
+
+        :param variants: The list of the models, each one as the name and the parameters of the models (e.g.
+        "combined:t1=1e-5"), a ModelsFactory or a dictionary of models
+        """
+        self._model_variants = [select_models(models) if isinstance(models, str) else models for models in variants]
+
+    @continuous_frequency.setter
+    def continuous_frequency(self, frequency: float):
+        """
+        Set the frequency of the sources in the continuous generation mode, 0 to run every trial separately.
+
+        :param frequency: The frequency [Hz]
+        :raises AssertionError: If frequency is smaller than 0
+        """
+        assert (frequency >= 0)
+        self._continuous_frequency = frequency
+
+    @repeat_until_success.setter
+    def repeat_until_success(self, repeat: bool):
+        """
+        Set if the sources repeat the generation until success.
+
+        :param repeat: True to repeat the generation until success
+        """
+        self._repeat_until_success = repeat
+
+    @pauli_frame.setter
+    def pauli_frame(self, frame: bool):
+        """
+        Set if the corrections of the Bell measurements are tracked as Pauli frames, instead of applied.
+
+        :param frame: True to track the corrections as Pauli frames
+        """
+        self._pauli_frame = frame
+
+    @exact_expectation.setter
+    def exact_expectation(self, exact: bool):
+        """
+        Set if the exact expected results are computed instead of running the trials.
+
+        :param exact: True to compute the exact expected results
+        """
+        self._exact_expectation = exact
+
+    @control_variate.setter
+    def control_variate(self, control: bool):
+        """
+        Set if the analytic prediction of the fidelity is used as a control variate.
+
+        :param control: True to use the control variate
+        """
+        self._control_variate = control
+
+    @models.setter
+    def models(self, models):
+        """
+        Set the models of the channels of the network.
+
+        :param models: The name and the parameters of the models (e.g. "combined:t1=1e-5,seed=7"), a ModelsFactory or
+        a dictionary of models
+        """
+        self._network.models = select_models(models) if isinstance(models, str) else models
+
+    @store_records.setter
+    def store_records(self, store: bool):
+        """
+        Set if the raw records of all the trials are stored.
+
+        :param store: True to store the records
+        """
+        self._store_records = store
+
     ############################################
     # FUNCTIONS USED TO PERFORM THE EXPERIMENT #
     ############################################
@@ -110,48 +490,414 @@ class Experiment:
         Run the simulation between the two given nodes. When the simulation is over, a
         csv file is created with the results and a figure is generated.
 
+        The statistics of each length are accumulated while the trials run (see SweepPointStatistics), so the raw
+        trials are not stored unless store_records is set.
+
         :param method: The method to run on the network
         :param nodes: The nodes to run the method on
         :param debug: If the simulation should print more info
         """
+        from tqdm import tqdm
+
+        # preallocate the records of all the trials (at most 2 pairs for each trial), only if they are stored
+        records_n = len(self._lengths) * self._num_each_simulation * self._max_pairs_per_trial
+        self._records = np.zeros(records_n if self._store_records else 0, dtype=RESULT_DTYPE)
+        self._records_n = 0
+        self._statistics = []
+        self._variants_channel_models = None
+        # protocol_a gives 2 pairs for each trial, entangle_nodes only 1
+        num_pairs = self._max_pairs_per_trial if getattr(method, "__name__", "") == "protocol_a" else 1
+        # the channels of the nodes exist from the first trial (the network builds them on their first use)
+        self._network.build(nodes if len(nodes) != 0 else None)
+        if self._exact_expectation:
+            self._run_exact_expectation(method, nodes, num_pairs)
+            return
+        recorder = self._start_memory_recorder()
+        tracer = None
+        if self._trace_events_capacity > 0:
+            tracer = EventTracer(self._trace_events_capacity)
+            self._network.event_tracer = tracer
+
+        self._network.sim_time_horizon = self._sim_time_horizon
+        self._network.wall_time_limit = self._wall_time_limit
+        self._network.repeat_until_success = self._repeat_until_success
+        self._network.pauli_frame = self._pauli_frame
+        if self._continuous_frequency > 0 and getattr(method, "__name__", "") != "entangle_nodes":
+            error_exit("The continuous generation mode is available only for entangle_nodes")
+        # a stratum that is never forced drops out of the stratified estimate (see SweepPointStatistics)
+        if self._stratified_bell_outcomes and self._num_each_simulation % 4 ** num_pairs != 0:
+            error_exit(f"The stratified sampling of the Bell outcomes needs num_each_simulation to be a multiple of "
+                       f"{4 ** num_pairs}")
+        formalism = get_qstate_formalism()
+        timeouts = []
+        previous_fidelities = None
+        predictor = self._fidelity_predictor()
+        effective_nodes = self._effective_nodes(method, nodes)
+        pair_crossings, trial_crossings = self._crossings(num_pairs, effective_nodes)
+
         f = open(self._csv_path, "w+")
-        f.write("length,fidelity\r\n")
+        if self._stratified_bell_outcomes:
+            # the forced Bell measurements need the density matrices of the qubits
+            set_qstate_formalism(QFormalism.DM)
+        try:
+            for length in tqdm(self._lengths):
+                self._network.channels_length = length
+                # every length starts a new cycle of the strata (the setter resets it), with the same mix of outcomes
+                self._network.stratified_bell_outcomes = self._stratified_bell_outcomes
+                predicted_fidelity, expected_control = None, None
+                if predictor is not None:
+                    predicted_fidelity = predictor.pair_fidelity(self._network.channels_length, pair_crossings)
+                    expected_control = predicted_fidelity * predictor.success_probability(self._network.channels_length,
+                                                                                          trial_crossings)
+                statistics = SweepPointStatistics(num_pairs, self._likelihood_ratio() is not None,
+                                                  self._stratified_bell_outcomes, expected_control)
+
+                if debug:
+                    print(f"Nodes are entangled after {self._network.channels_length * 1000} meters")
+
+                # number of events of each trial, if the events are traced
+                events = StreamingStatistics(0, self._max_events_per_trial, self._max_events_per_trial)
+                # number of attempts of the sources of each trial, if the generation is repeated until success
+                attempts = StreamingStatistics(0, self._max_attempts_per_trial, self._max_attempts_per_trial)
+                fidelities = np.zeros(self._num_each_simulation)
+
+                def add_result(trial: int, result):
+                    control = None if predictor is None else 0.0 if isinstance(result, dict) else predicted_fidelity
+                    statistics.add_trial(result, self._trial_weight(), control)
+                    fidelities[trial] = SweepPointStatistics.trial_fidelity(result)
+                    if isinstance(result, dict) and "timeout" in result:
+                        timeouts.append((length, trial, result["timeout"]))
+
+                def harvest_result(result):
+                    add_result(statistics.trials, result)
+                    # the qubits of the next cycle cross the channels after the harvest of this one
+                    likelihood_ratio = self._likelihood_ratio()
+                    if likelihood_ratio is not None:
+                        likelihood_ratio.reset()
+
+                if self._continuous_frequency > 0:
+                    # all the trials of the length are harvested during a single run of the simulation
+                    if self._likelihood_ratio() is not None:
+                        self._likelihood_ratio().reset()
+                    # without nodes the default ones of entangle_nodes are harvested
+                    harvested = self._network.harvest_entangle_nodes(effective_nodes[0], effective_nodes[1],
+                                                                     self._num_each_simulation,
+                                                                     self._continuous_frequency, harvest_result, debug)
+                    self._network.reset_trial(debug)
+                    if isinstance(harvested, str):
+                        # the trials that were not harvested before a limit was reached count as timed out
+                        for trial in range(statistics.trials, self._num_each_simulation):
+                            add_result(trial, StarNetwork._timeout_result(harvested))
+                else:
+                    for trial in range(self._num_each_simulation):
+                        add_result(trial, self.run_one_simulation(method, nodes, length, trial, debug))
+                        if tracer is not None:
+                            events.add(tracer.trial_events_n)
+                        if self._repeat_until_success:
+                            attempts.add(self._network.attempts)
+
+                columns = statistics.columns()
+                if tracer is not None:
+                    columns.update(events.columns("events"))
+                if self._repeat_until_success:
+                    columns.update(attempts.columns("attempts"))
+                if self._common_random_numbers:
+                    # the first length has no previous one, its differences are nan
+                    columns.update(self._paired_difference(fidelities, previous_fidelities).columns("length_diff"))
+                    previous_fidelities = fidelities
+                if len(self._model_variants) > 0:
+                    columns.update(self._run_model_variants(method, nodes, num_pairs, fidelities, debug))
+                if debug:
+                    print(f"Average fidelity: {columns['fidelity']}")
+                    print(f"Successful trials: {statistics.trials - statistics.lost}/{statistics.trials}")
+
+                if len(self._statistics) == 0:
+                    f.write(",".join(["length"] + list(columns.keys())) + "\r\n")
+                f.write(",".join([str(length)] + [str(value) for value in columns.values()]) + "\r\n")
+                self._statistics.append(statistics)
+        finally:
+            f.close()
+            if self._stratified_bell_outcomes:
+                # restored even if a trial raises or the run is interrupted
+                set_qstate_formalism(formalism)
+                self._network.stratified_bell_outcomes = False
+        if len(timeouts) > 0:
+            self._write_timeouts(timeouts, method, nodes)
+        if recorder is not None:
+            recorder.dump(self._csv_path.replace(".csv", "-memories.npz"))
+            self._network.memory_recorder = None
+        if tracer is not None:
+            tracer.export_chrome_trace(self._csv_path.replace(".csv", "-trace.json"))
+            tracer.export_binary(self._csv_path.replace(".csv", "-trace.npz"))
+            self._network.event_tracer = None
+        if debug:
+            self._show_cache_info()
+        self._plot_results()
 
-        for length in tqdm(self._lengths):
-            fidelity_values = []
-            self._network.channels_length = length
+    def _run_exact_expectation(self, method: callable, nodes: list, num_pairs: int):
+        """
+        Compute the exact expected results of each length (see ExactExpectation) instead of running the trials, write
+        them to the csv file and plot them. The statistics of the trials are left empty.
 
-            if debug:
-                print(f"Nodes are entangled after {self._network.channels_length * 1000} meters")
+        :param method: The method to compute the results of
+        :param nodes: The nodes the method is run on
+        :param num_pairs: The number of pairs of each trial
+        """
+        if getattr(method, "__name__", "") not in ("entangle_nodes", "protocol_a"):
+            error_exit("The exact expectation is available only for entangle_nodes and protocol_a")
+        if self._likelihood_ratio() is not None or self._continuous_frequency > 0:
+            error_exit("The exact expectation is not available with biased models or with the continuous generation")
+        models = self._network.quantum_channels[0].models
+        expectation = ExactExpectation.from_models(models["quantum_loss_model"], models["quantum_noise_model"],
+                                                   models["quantum_delay_model"])
+        pair_crossings, _ = self._crossings(num_pairs, self._effective_nodes(method, nodes))
+
+        with open(self._csv_path, "w+") as f:
+            for index, length in enumerate(self._lengths):
+                self._network.channels_length = length
+                columns = expectation.columns(self._network.channels_length, pair_crossings == 3, num_pairs,
+                                              self._repeat_until_success)
+                if index == 0:
+                    f.write(",".join(["length"] + list(columns.keys())) + "\r\n")
+                f.write(",".join([str(length)] + [str(value) for value in columns.values()]) + "\r\n")
+        self._plot_results()
 
-            for _ in range(self._num_each_simulation):
-                self.run_one_simulation(method, nodes, fidelity_values, debug)
+    def _fidelity_predictor(self):
+        """
+        Create the analytic predictor of the fidelity from the models of the channels, if the control variate is used.
 
-            avg_fidelity = np.mean(fidelity_values)
-            if debug:
-                print(f"Average fidelity: {avg_fidelity}")
-                print(f"Not decohered qubits: {(avg_fidelity > 0.5).sum()}/{len(fidelity_values)}")
+        :return: The FidelityPredictor, None without control variate or with biased models
+        """
+        if not self._control_variate or self._likelihood_ratio() is not None:
+            return None
+        models = self._network.quantum_channels[0].models
+        return FidelityPredictor.from_models(models["quantum_loss_model"], models["quantum_noise_model"],
+                                             models["quantum_delay_model"])
+
+    @staticmethod
+    def _effective_nodes(method: callable, nodes: list) -> list:
+        """
+        Get the nodes the method actually runs on: the given ones, or the default nodes of the method if none are
+        given (see run_method_with_nodes), e.g. 1, 4 for entangle_nodes and 1, 2, 4 for protocol_a.
 
-            f.write(f"{length},{avg_fidelity}\r\n")
+        :param method: The method to run on the network
+        :param nodes: The nodes to run the method on, empty for the defaults of the method
+        :return: The list of the nodes
+        """
+        if len(nodes) != 0:
+            return list(nodes)
+        parameters = inspect.signature(method).parameters.values()
+        return [parameter.default for parameter in parameters
+                if parameter.name.startswith("node") and isinstance(parameter.default, int)]
 
-        f.close()
-        self._plot_results()
+    def _crossings(self, num_pairs: int, nodes: list) -> tuple:
+        """
+        Get the number of channels crossed by the qubits of each pair and of each trial: the pairs swapped by the
+        repeater cross 3 channels, the ones between two nodes 2.
 
-    def run_one_simulation(self, method: callable, nodes: list, fidelity_values: list, debug: bool = False):
+        :param num_pairs: The number of pairs of each trial
+        :param nodes: The nodes the method is run on, not empty (see _effective_nodes)
+        :return: tuple of the crossings of each pair and of each trial
         """
-        Run a single simulation.
+        pair_crossings = 3 if self._network.destinations_n - 1 in nodes else 2
+        return pair_crossings, pair_crossings * num_pairs
+
+    def _likelihood_ratio(self):
         """
-        try:
-            result = run_method_with_nodes(method, nodes, debug)
-            # is array
-            for idx in range(len(result)):
-                fidelity_values.append(result[idx]["fidelity"])
-        except KeyError:
-            fidelity_values.append(0)
-            if debug:
-                print("Either one or both Qubits were lost during transfer")
+        Get the likelihood ratio of the trials, if the models of the network are biased for importance sampling.
+
+        :return: The LikelihoodRatio of the ModelsFactory of the network, None without importance sampling
+        """
+        models = self._network.models
+        if getattr(models, "importance_sampling", False):
+            return models.likelihood_ratio
+        return None
+
+    def _trial_weight(self) -> float:
+        """
+        :return: The likelihood ratio of the last trial, 1 without importance sampling
+        """
+        likelihood_ratio = self._likelihood_ratio()
+        return likelihood_ratio.value if likelihood_ratio is not None else 1.0
+
+    def _run_model_variants(self, method: callable, nodes: list, num_pairs: int, fidelities: ndarray,
+                            debug: bool = False) -> dict:
+        """
+        Run the trials of the current length with each model variant, and restore the models of the network. The
+        models of the channels are built once for the network and each variant (at the first length), and then swapped
+        on the channels, so that they keep their random numbers and caches across the lengths.
+
+        :param method: The method to run on the network
+        :param nodes: The nodes to run the method on
+        :param num_pairs: The number of pairs of each trial
+        :param fidelities: The fidelity of each trial with the models of the network
+        :param debug: If the simulation should print more info
+        :return: ordered dictionary of the columns of the variants
+        """
+        models = self._network.models
+        if self._variants_channel_models is None:
+            self._variants_channel_models = [self._network.channel_models]
+            for variant in self._model_variants:
+                self._network.models = variant
+                self._variants_channel_models.append(self._network.channel_models)
+        columns = {}
+        for index, variant in enumerate(self._model_variants):
+            self._network.swap_models(variant, self._variants_channel_models[index + 1])
+            self._network.stratified_bell_outcomes = self._stratified_bell_outcomes
+            statistics = SweepPointStatistics(num_pairs, self._likelihood_ratio() is not None,
+                                              self._stratified_bell_outcomes)
+            variant_fidelities = np.zeros(self._num_each_simulation)
+            for trial in range(self._num_each_simulation):
+                result, _ = self._run_trial(method, nodes, trial, debug)
+                statistics.add_trial(result, self._trial_weight())
+                variant_fidelities[trial] = SweepPointStatistics.trial_fidelity(result)
+            variant_columns = statistics.fidelity.columns(f"variant{index}_fidelity")
+            variant_columns[f"variant{index}_success_rate"] = statistics.success_rate
+            differences = self._paired_difference(variant_fidelities, fidelities)
+            variant_columns.update(differences.columns(f"variant{index}_diff"))
+            columns.update(variant_columns)
+        self._network.swap_models(models, self._variants_channel_models[0])
+        return columns
+
+    @staticmethod
+    def _paired_difference(fidelities: ndarray, other_fidelities: ndarray = None) -> StreamingStatistics:
+        """
+        Get the statistics of the paired differences of the fidelity of the trials with the same index.
+
+        :param fidelities: The fidelity of each trial
+        :param other_fidelities: The fidelity of each trial to subtract, None for empty statistics
+        :return: The StreamingStatistics of the differences, between -1 and 1
+        """
+        differences = StreamingStatistics(-1, 1, 2000)
+        if other_fidelities is not None:
+            for difference in fidelities - other_fidelities:
+                differences.add(difference)
+        return differences
+
+    def trial_seed(self, trial: int):
+        """
+        Get the seed of a trial.
+
+        :param trial: The index of the trial
+        :return: seed + trial (seed is 0 if not set, with common random numbers), None if the trials are not seeded
+        """
+        if self._seed is None:
+            return trial if self._common_random_numbers else None
+        return self._seed + trial
+
+    def _write_timeouts(self, timeouts: list, method: callable, nodes: list) -> str:
+        """
+        Write the timed out trials, with their configuration and seed, next to the csv file.
+
+        :param timeouts: The list of (length, trial, reason) of the timed out trials
+        :param method: The method run on the network
+        :param nodes: The nodes the method was run on
+        :return: The path of the file
+        """
+        path = self._csv_path.replace(".csv", "-timeouts.csv")
+        with open(path, "w") as f:
+            f.write("length,trial,reason,seed,method,nodes,models,sim_time_horizon,wall_time_limit\r\n")
+            for length, trial, reason in timeouts:
+                seed = self.trial_seed(trial)
+                f.write(",".join([str(length), str(trial), reason, "" if seed is None else str(seed),
+                                  getattr(method, "__name__", str(method)), "\"" + ",".join(map(str, nodes)) + "\"",
+                                  "\"" + str(self._network.models) + "\"", str(self._sim_time_horizon),
+                                  str(self._wall_time_limit)]) + "\r\n")
+        return path
+
+    def _show_cache_info(self):
+        """
+        Print the hit rate of the models of the channels that cache their parameters (e.g. CachedT1T2NoiseModel),
+        summed over all the channels (that can have different models, see ModelsFactory).
+        """
+        caches = {}
+        for channel in self._network.quantum_channels:
+            for name in ["quantum_loss_model", "quantum_noise_model", "quantum_delay_model"]:
+                model = channel.models[name]
+                if model is None or not hasattr(model, "cache_info") or id(model) in caches.get(name, {}):
+                    continue
+                caches.setdefault(name, {})[id(model)] = model.cache_info()
+        for name, infos in caches.items():
+            hits = sum(info["hits"] for info in infos.values())
+            misses = sum(info["misses"] for info in infos.values())
+            hit_rate = hits / (hits + misses) if hits + misses > 0 else float("nan")
+            print(f"{name} cache: {hits} hits, {misses} misses, hit rate {hit_rate:.3f}")
+
+    def _start_memory_recorder(self):
+        """
+        Create the recorder of the memories of the network, if the recording is enabled.
+
+        :return: The MemoryRecorder set on the network, None if the recording is disabled
+        """
+        if self._record_memories_every == 0:
+            return None
+        trials = len(self._lengths) * self._num_each_simulation
+        capacity = (trials + self._record_memories_every - 1) // self._record_memories_every
+        recorder = MemoryRecorder(self._network.network, PROTOCOL_STAGES, capacity, self._record_memories_every)
+        self._network.memory_recorder = recorder
+        return recorder
+
+    def run_one_simulation(self, method: callable, nodes: list, length: float = 0, trial: int = 0,
+                           debug: bool = False):
+        """
+        Run a single simulation, if store_records is set, store the records of its pairs (or a single failed record,
+        with fidelity 0, if the qubits were lost) in the structured array of the records.
+
+        :param method: The method to run on the network
+        :param nodes: The nodes to run the method on
+        :param length: The length of the channels, stored in the records (default 0)
+        :param trial: The index of the trial, stored in the records (default 0)
+        :param debug: If the simulation should print more info
+        :return: The results of the method (a dictionary if the qubits were lost or the trial timed out)
+        """
+        result, wall_time = self._run_trial(method, nodes, trial, debug)
+
+        # the methods return a dictionary (instead of a list of results) when the qubits were lost or timed out
+        lost = isinstance(result, dict)
+        if lost and debug:
+            print(result.get("message", "Either one or both Qubits were lost during transfer"))
+
+        if self._store_records:
+            pairs = [PairResult(0, error=True, pair_id=-1)] if lost else result
+            for pair in pairs:
+                if self._records_n == len(self._records):
+                    # more pairs than expected, double the size of the array
+                    self._records = np.concatenate([self._records, np.zeros_like(self._records)])
+                self._records[self._records_n] = (length, trial, pair.pair_id, pair.bell_state, pair.error,
+                                                  pair.fidelity, pair.sim_time, wall_time, self._trial_weight())
+                self._records_n += 1
+        return result
+
+    def _run_trial(self, method: callable, nodes: list, trial: int, debug: bool = False) -> tuple:
+        """
+        Seed the random numbers of a trial (if enabled), reset its likelihood ratio and run it, then return the
+        simulator to a clean state (see StarNetwork.reset_trial), so that the cost of the trials does not grow.
+
+        :param method: The method to run on the network
+        :param nodes: The nodes to run the method on
+        :param trial: The index of the trial
+        :param debug: If the simulation should print more info
+        :return: tuple of the results of the method and the wall-clock time of the trial [s]
+        """
+        seed = self.trial_seed(trial)
+        if seed is not None:
+            set_random_state(seed=seed)
+            if self._common_random_numbers:
+                self._network.reseed_models(seed)
+        likelihood_ratio = self._likelihood_ratio()
+        if likelihood_ratio is not None:
+            likelihood_ratio.reset()
+        wall_start = time.perf_counter()
+        result = run_method_with_nodes(method, nodes, debug)
+        wall_time = time.perf_counter() - wall_start
+        self._network.reset_trial(debug)
+        return result, wall_time
 
     def _plot_results(self):
+        # pandas and matplotlib are slow to import, load them only once the results are ready to be plotted
+        import pandas as pd
+        from matplotlib import pyplot as plt
+
         dataframe = pd.read_csv(self._csv_path)
         a, b = np.polyfit(dataframe["length"], dataframe["fidelity"], 1)
 
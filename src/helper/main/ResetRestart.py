@@ -1,16 +1,20 @@
-from netsquid import sim_reset
+import contextlib
+import io
+import subprocess
 
-from src.helper.terminal.utils import run_command_in_terminal_and_show_output
+from src.helper.terminal.utils import run_command_in_terminal_and_show_output, show_output_terminal
 
 
 def reset_simulation() -> None:
     """Reset the simulation."""
+    from netsquid import sim_reset
+
     sim_reset()
 
 
-def restart_simulation(debug: bool = False) -> str:
+def restart_simulation_subprocess(debug: bool = False) -> str:
     """
-    Restart the simulation.
+    Restart the simulation, by running the program (with the default arguments) in a new python interpreter.
     :param debug: The flag to enable the debug mode (default: False)
     :return: The output of the program
     """
@@ -27,25 +31,75 @@ def restart_simulation(debug: bool = False) -> str:
     return program
 
 
-def reset_and_restart_simulation(debug: bool = False) -> str:
+def restart_simulation_in_process(args: tuple = None, star_network=None) -> str:
+    """
+    Restart the simulation in the current python interpreter, capturing the output as the subprocess would do.
+    :param args: tuple of models_name, method_name, nodes, debug, experiment_num (default: the default arguments)
+    :param star_network: The StarNetwork to clean and reuse, if None a new one is built (default: None)
+    :return: The output of the program
+    """
+    # imported here, since main.py imports this module
+    from src.main import default_args, main, show_args
+
+    models_name, method_name, nodes, debug, experiment_num = args if args is not None else default_args()
+    stdout = io.StringIO()
+    return_code = 0
+    with contextlib.redirect_stdout(stdout):
+        try:
+            if debug:
+                show_args(models_name, method_name, nodes, debug, experiment_num)
+            main(models_name, method_name, list(nodes), debug, experiment_num, star_network=star_network)
+        except SystemExit as e:
+            # same exit code of the interpreter: sys.exit(msg) exits with 1 and prints msg to the standard error
+            return_code = e.code if isinstance(e.code, int) else 1
+
+    cmd = subprocess.CompletedProcess(["main.py"], return_code, stdout=stdout.getvalue())
+    return show_output_terminal("Standard output of the program: ", cmd)
+
+
+def restart_simulation(debug: bool = False, subprocess_restart: bool = False, args: tuple = None,
+                       star_network=None) -> str:
+    """
+    Restart the simulation.
+    :param debug: The flag to enable the debug mode (default: False)
+    :param subprocess_restart: The flag to run the program in a new python interpreter, instead of the current one
+    (default: False)
+    :param args: tuple of the arguments of the in process restart (default: the default arguments)
+    :param star_network: The StarNetwork to reuse in the in process restart (default: None)
+    :return: The output of the program
+    """
+    if subprocess_restart:
+        return restart_simulation_subprocess(debug)
+    return restart_simulation_in_process(args, star_network)
+
+
+def reset_and_restart_simulation(debug: bool = False, subprocess_restart: bool = False, args: tuple = None,
+                                 star_network=None) -> str:
     """
     Reset and Restart the simulation.
     :param debug: The flag to enable the debug mode (default: False)
+    :param subprocess_restart: The flag to run the program in a new python interpreter (default: False)
+    :param args: tuple of the arguments of the in process restart (default: the default arguments)
+    :param star_network: The StarNetwork to reuse in the in process restart (default: None)
     :return: The output of the program
     """
     reset_simulation()
-    out = restart_simulation(debug)
+    out = restart_simulation(debug, subprocess_restart, args, star_network)
     return out
 
 
-def check_reset_restart(flag: bool, debug: bool = False) -> bool:
+def check_reset_restart(flag: bool, debug: bool = False, subprocess_restart: bool = False, args: tuple = None,
+                        star_network=None) -> bool:
     """
     Check if the reset and restart is required.
     :param flag: The flag to check if the reset and restart is required
     :param debug: The flag to enable the debug mode (default: False)
+    :param subprocess_restart: The flag to run the program in a new python interpreter (default: False)
+    :param args: tuple of the arguments of the in process restart (default: the default arguments)
+    :param star_network: The StarNetwork to reuse in the in process restart (default: None)
     :return: The flag, if it is False, the simulation will not be reset and restarted
     """
     if flag:
-        reset_and_restart_simulation(debug)
+        reset_and_restart_simulation(debug, subprocess_restart, args, star_network)
     # return the flag, if it is False, the simulation will not be reset and restarted
     return False
@@ -0,0 +1,311 @@
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+from typing import Dict, Iterator, List, Tuple, Union
+
+from src.helper.main.main import run_method_with_nodes, select_method, select_models
+from src.models.ModelsFactory import ModelsFactory
+
+# sentinel put in the result queue of a job when the job is over
+_JOB_DONE = None
+# allowed number of nodes of each method (0 for the default nodes of the method)
+METHOD_NODES_N: Dict[str, List[int]] = {"protocol_a": [0, 3], "entangle_nodes": [0, 2]}
+# the nodes of the network are numbered from 1 (the Repeater is the last one)
+MAX_NODE: int = 4
+
+
+def parse_address(address: str) -> Tuple[int, Union[str, Tuple[str, int]]]:
+    """
+    Parse the address of the server.
+    :param address: Either "unix:<path>" for a Unix socket or "<host>:<port>" for a TCP socket
+    :return: tuple of the socket family and the address to bind/connect to
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, port = address.rsplit(":", 1)
+    return socket.AF_INET, (host, int(port))
+
+
+def validate_job(job: dict) -> dict:
+    """
+    Validate a job request and fill in the default values.
+    :param job: The job request, with the keys method, nodes, models, length, trials and seed
+    :return: The validated job
+    :raises ValueError: If the job is not valid
+    """
+    if not isinstance(job, dict):
+        raise ValueError("The job must be a JSON object")
+    validated = dict(id=job.get("id"),
+                     method=job.get("method", "protocol_a"),
+                     nodes=job.get("nodes", []),
+                     models=job.get("models", "empty"),
+                     length=job.get("length", 1000),
+                     trials=job.get("trials", 1),
+                     seed=job.get("seed"))
+    if not ModelsFactory.is_valid(validated["models"]):
+        raise ValueError(f"Invalid models, please provide one of {ModelsFactory.names}, optionally followed by the "
+                         f"parameters (e.g. 'combined:t1=1e-5,seed=7')")
+    if validated["method"] not in METHOD_NODES_N:
+        raise ValueError("Invalid method, please provide 'protocol_a' or 'entangle_nodes'")
+    nodes = validated["nodes"]
+    if not isinstance(nodes, list) or any(not isinstance(n, int) for n in nodes):
+        raise ValueError("Invalid nodes, please provide a list of integers")
+    if len(nodes) not in METHOD_NODES_N[validated["method"]]:
+        raise ValueError(f"Invalid number of nodes for '{validated['method']}', please provide "
+                         f"{' or '.join(str(n) for n in METHOD_NODES_N[validated['method']])} nodes")
+    if len(nodes) != len(set(nodes)) or any(n < 1 or n > MAX_NODE for n in nodes):
+        raise ValueError(f"Invalid nodes, please provide unique integers between 1 and {MAX_NODE}")
+    if not isinstance(validated["trials"], int) or validated["trials"] <= 0:
+        raise ValueError("Invalid trials, please provide a positive integer")
+    if not isinstance(validated["length"], (int, float)) or validated["length"] <= 0:
+        raise ValueError("Invalid length, please provide a positive number (in meters)")
+    return validated
+
+
+def result_record(result) -> dict:
+    """
+    Convert the result of a method of the network to a JSON serializable record.
+    :param result: The result of protocol_a or entangle_nodes
+    :return: dict with the fidelities of the pairs and the error flag
+    """
+    # the methods return a dictionary (instead of a list) when the qubits were lost
+    if isinstance(result, dict):
+        return {"fidelity": [], "error": True}
+    return {"fidelity": [float(pair["fidelity"]) for pair in result],
+            "error": any(pair["error"] for pair in result)}
+
+
+class NetworkRunner:
+    """
+    Run the jobs on warm networks, one StarNetwork is built (the first time it is needed) for each configuration and
+    reused by all the following jobs with the same configuration.
+    """
+
+    def __init__(self, debug: bool = False):
+        """
+        Constructor for the NetworkRunner class.
+
+        :param debug: If the simulations should print more info (default: False)
+        """
+        # NetSquid is imported once, when the runner is created, and then stays loaded
+        import netsquid
+        from src.network.StarNetwork import StarNetwork
+
+        self._netsquid = netsquid
+        self._network_class = StarNetwork
+        self._networks: Dict[str, StarNetwork] = {}
+        self._debug = debug
+
+    def network(self, models_name: str):
+        """
+        Get the warm network for the given models, build it if needed.
+        :param models_name: The name of the models ("combined" or "empty")
+        :return: The StarNetwork
+        """
+        if models_name not in self._networks:
+            self._networks[models_name] = self._network_class(select_models(models_name))
+        return self._networks[models_name]
+
+    def __call__(self, job: dict) -> Iterator[dict]:
+        """
+        Run the job and yield one record for each trial, as soon as the trial is over. The warm network starts the
+        job from a clean state (no qubits, protocols or events of the previous jobs, see StarNetwork.reset_trial), and
+        is reset after every trial. With a seed, both the random state of NetSquid and the generators of the loss
+        models of the channels are reseeded, so the same seeded job gives the same records whatever ran before.
+        :param job: The validated job
+        :return: Iterator of the result records
+        """
+        network = self.network(job["models"])
+        network.reset_trial()
+        method = select_method(network, job["method"], len(job["nodes"]))
+        network.channels_length = job["length"]
+        if job["seed"] is not None:
+            # the channels built during the job would draw their generators from the factory, build them first
+            network.build(job["nodes"] if len(job["nodes"]) != 0 else None)
+            self._netsquid.set_random_state(seed=job["seed"])
+            network.reseed_models(job["seed"])
+
+        for trial in range(job["trials"]):
+            try:
+                record = result_record(run_method_with_nodes(method, job["nodes"], self._debug))
+            finally:
+                network.reset_trial()
+            record["trial"] = trial
+            yield record
+
+
+class SimulationServer:
+    """
+    Long-lived server that keeps NetSquid loaded and runs the simulation jobs sent over a local socket.
+
+
+    Protocol
+    --------
+    The client sends one JSON job per line, e.g.
+        {"id": 1, "method": "entangle_nodes", "nodes": [1, 4], "models": "combined", "length": 1000, "trials": 10,
+         "seed": 42}
+    and the server answers, on the same connection, with one JSON record per line for each trial, as soon as it
+    is over, and a last record with "done" set to true. Errors are reported as a record with the "message" key.
+    Every record has the "id" of its job (None if the job has no id or is not valid JSON).
+
+
+    Backpressure
+    ------------
+    The jobs of all the connections are executed one at a time (NetSquid has a single simulation engine) from a
+    queue of at most queue_size jobs. When the queue is full, a new job waits up to queue_timeout seconds for a
+    free slot and is rejected with a "busy" message afterwards, while the connection is not read in the meantime.
+    """
+
+    def __init__(self, address: str = "127.0.0.1:5005", runner: callable = None, queue_size: int = 16,
+                 queue_timeout: float = 30):
+        """
+        Constructor for the SimulationServer class.
+
+        :param address: "unix:<path>" or "<host>:<port>" (default: "127.0.0.1:5005")
+        :param runner: callable that takes a validated job and yields the records of the trials
+        (default: a NetworkRunner)
+        :param queue_size: The maximum number of jobs waiting to be executed (default: 16)
+        :param queue_timeout: The seconds a job waits for a free slot in the queue before being rejected (default: 30)
+        """
+        assert (queue_size > 0)
+        self._family, self._address = parse_address(address)
+        self._runner = runner if runner is not None else NetworkRunner()
+        self._jobs: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._queue_timeout = queue_timeout
+        self._server: socketserver.BaseServer = None
+        self._worker: threading.Thread = None
+
+    @property
+    def address(self):
+        """
+        :type: str or tuple
+        """
+        if self._server is not None:
+            return self._server.server_address
+        return self._address
+
+    def submit(self, job: dict) -> queue.Queue:
+        """
+        Put the job in the queue of the jobs to be executed.
+        :param job: The validated job
+        :return: The queue where the records of the job are put, followed by _JOB_DONE
+        :raises queue.Full: If the queue is still full after queue_timeout seconds
+        """
+        results: queue.Queue = queue.Queue()
+        self._jobs.put((job, results), timeout=self._queue_timeout)
+        return results
+
+    def _work(self):
+        """
+        Execute the jobs of the queue one at a time.
+        """
+        while True:
+            job, results = self._jobs.get()
+            try:
+                for record in self._runner(job):
+                    record["id"] = job["id"]
+                    results.put(record)
+            # select_method and run_method_with_nodes exit the program on invalid input
+            except (SystemExit, Exception) as e:
+                results.put({"id": job["id"], "message": str(e), "error": True})
+            finally:
+                results.put(_JOB_DONE)
+                self._jobs.task_done()
+
+    def _handler(self):
+        server = self
+
+        class JobHandler(socketserver.StreamRequestHandler):
+            def send(self, record: dict):
+                self.wfile.write((json.dumps(record) + "\n").encode())
+                self.wfile.flush()
+
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip() == b"":
+                        continue
+                    job_id = None
+                    try:
+                        request = json.loads(line)
+                        job_id = request.get("id") if isinstance(request, dict) else None
+                        job = validate_job(request)
+                        results = server.submit(job)
+                    except (ValueError, queue.Full) as e:
+                        message = "busy" if isinstance(e, queue.Full) else str(e)
+                        self.send({"id": job_id, "message": message, "error": True, "done": True})
+                        continue
+                    # stream the records back as they finish
+                    record = results.get()
+                    while record is not _JOB_DONE:
+                        self.send(record)
+                        record = results.get()
+                    self.send({"id": job["id"], "done": True})
+
+        return JobHandler
+
+    def start(self):
+        """
+        Bind the socket and start serving in background threads.
+        """
+        if self._family == socket.AF_UNIX:
+            if os.path.exists(self._address):
+                os.remove(self._address)
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = socketserver.ThreadingTCPServer
+        server_class.daemon_threads = True
+        server_class.allow_reuse_address = True
+        self._server = server_class(self._address, self._handler())
+
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def serve_forever(self):
+        """
+        Start the server and block until it is interrupted.
+        """
+        self.start()
+        print(f"Simulation server listening on {self.address}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """
+        Stop serving and close the socket.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            if self._family == socket.AF_UNIX and os.path.exists(self._address):
+                os.remove(self._address)
+            self._server = None
+
+
+def submit_jobs(address: str, jobs: List[dict]) -> Iterator[dict]:
+    """
+    Send the jobs to a running server and yield the records as they arrive.
+    :param address: "unix:<path>" or "<host>:<port>"
+    :param jobs: The jobs to run
+    :return: Iterator of the records, until all the jobs are done
+    """
+    family, address = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.connect(address)
+        sock.sendall("".join([json.dumps(job) + "\n" for job in jobs]).encode())
+        remaining = len(jobs)
+        with sock.makefile("rb") as f:
+            for line in f:
+                record = json.loads(line)
+                yield record
+                if record.get("done", False):
+                    remaining -= 1
+                    if remaining == 0:
+                        return
@@ -1,4 +1,4 @@
-from src.helper.main.main import error_exit
+from src.helper.error.error import error_exit
 
 
 def converter_exit(method: callable, input: any, msg: str) -> any:
@@ -52,3 +52,40 @@ def converter_string_list_int(input: str) -> tuple:
         return [int(node) for node in input.split(",")], False
     except ValueError:
         return None, True
+
+
+def converter_string_value(input: str) -> tuple:
+    """
+    Convert the input string to a boolean ('True' or 'False'), an integer or a float, in this order.
+    :param input: str
+    :return: tuple of the value and error
+    """
+    value, error = converter_string_boolean(input)
+    if not error:
+        return value, False
+    value, error = converter_string_int(input)
+    if not error:
+        return value, False
+    try:
+        return float(input), False
+    except ValueError:
+        return None, True
+
+
+def converter_string_models(input: str) -> tuple:
+    """
+    Convert the input string to the name and the parameters of the models, e.g. 'combined:t1=1e-5,seed=7'
+    (the parameters are optional, e.g. 'combined').
+    :param input: str
+    :return: tuple of (name, dict of parameters) and error
+    """
+    name, _, parameters_str = input.partition(":")
+    parameters = {}
+    if parameters_str != "":
+        for parameter in parameters_str.split(","):
+            key, separator, value_str = parameter.partition("=")
+            value, error = converter_string_value(value_str)
+            if separator == "" or key == "" or error:
+                return None, True
+            parameters[key] = value
+    return (name, parameters), False
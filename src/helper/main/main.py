@@ -1,7 +1,10 @@
+from typing import TYPE_CHECKING
+
 from src.helper.error.error import error_exit
-from src.models.Combined import Combined
-from src.models.Empty import Empty
-from src.network.StarNetwork import StarNetwork
+
+if TYPE_CHECKING:
+    # only needed for the type hints, the network (and NetSquid) is imported lazily by the caller
+    from src.network.StarNetwork import StarNetwork
 
 
 def run_method_with_nodes(method: callable, nodes: list, debug: bool = False):
@@ -48,7 +51,8 @@ def show_help() -> str:
     :return: str
     """
     msg = "Command line arguments:"
-    msg += "- models_name: str, default='empty', choices=['combined', 'empty']"
+    msg += "- models_name: str, default='empty', choices=['combined', 'empty'], "
+    msg += "optionally followed by the parameters of the models (e.g. 'combined:t1=1e-5,seed=7')"
     msg += "- method_name: str, default='protocol_a', choices=['protocol_a', 'entangle_nodes']"
     msg += "- nodes: str, default='1,2,4', choices of int=[1, 2, 3, 4], length=[0, 2, 3],"
     msg += "use ',' to separate the nodes (e.g. '1,2,4' or '1,4' or '1,3')"
@@ -60,21 +64,17 @@ def show_help() -> str:
 
 def select_models(models_name_str: str):
     """
-    Select the models to be used in the network, based on the provided name.
+    Select the models to be used in the network, based on the provided name and the optional parameters
+    (e.g. 'combined' or 'combined:t1=1e-5,seed=7').
     :param models_name_str: str
-    :return: dict of models to be used in the network
+    :return: ModelsFactory that builds new models for every channel of the network
     """
-    models: dict
-    if models_name_str == "combined":
-        models = Combined.models
-    elif models_name_str == "empty":
-        models = Empty.empty_models
-    else:
-        error_exit("Invalid models name, please provide one of the following: ['combined', 'empty']")
-    return models
+    # the models are built lazily (by the network), so that parsing the arguments (and the help) does not load NetSquid
+    from src.models.ModelsFactory import ModelsFactory
+    return ModelsFactory.from_string(models_name_str)
 
 
-def select_method_uncheck(star_network: StarNetwork, method_name_str: str):
+def select_method_uncheck(star_network: "StarNetwork", method_name_str: str):
     """
     Select the method to be used in the network, based on the provided name.
     :param star_network: StarNetwork
@@ -94,7 +94,7 @@ def select_method_uncheck(star_network: StarNetwork, method_name_str: str):
     return method, allowed_nodes_num
 
 
-def select_method(star_network: StarNetwork, method_name_str: str, nodes_len: int) -> callable:
+def select_method(star_network: "StarNetwork", method_name_str: str, nodes_len: int) -> callable:
     """
     Select the method to be used in the network, based on the provided name.
     :param star_network: StarNetwork
@@ -0,0 +1,148 @@
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+from netsquid import sim_time
+
+# types of the traced events
+EVENT_TYPES: List[str] = ["protocol_start", "source_trigger", "port_input", "signal", "sim_run_start", "sim_run_end",
+                          "bell_measurement", "correction"]
+
+# dtype of the records of the ring buffer
+TRACE_DTYPE: np.dtype = np.dtype([("trial", np.int32), ("sim_time", np.float64), ("wall_time", np.float64),
+                                  ("component", np.int16), ("event", np.int8)])
+
+
+class EventTracer:
+    """
+    Opt-in tracer of the events of the protocols and of the simulation engine. Every event is written as a
+    (trial, sim_time, wall_time, component, event type) record into a fixed-size ring buffer (the oldest records are
+    overwritten when it is full), that can be exported as a compact binary file (.npz) or as a Chrome trace (.json,
+    viewable in chrome://tracing or https://ui.perfetto.dev).
+
+
+    Tracer properties
+    -----------------
+    capacity (default 100000):
+        The number of records of the ring buffer
+
+    trial_events (read only):
+        The number of events of each type in the current (or last) trial
+    """
+
+    def __init__(self, capacity: int = 100000):
+        """
+        Constructor for the EventTracer class.
+
+        :param capacity: The number of records of the ring buffer (default 100000)
+        """
+        assert (capacity > 0)
+        self._buffer: np.ndarray = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self._total: int = 0  # number of traced events, also the ones overwritten
+        self._trial: int = -1
+        self._components: Dict[str, int] = {}
+        self._trial_events: np.ndarray = np.zeros(len(EVENT_TYPES), dtype=np.int64)
+        self._wall_start: float = time.perf_counter()
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def capacity(self) -> int:
+        """
+        :type: int
+        """
+        return len(self._buffer)
+
+    @property
+    def total(self) -> int:
+        """
+        :type: int
+        """
+        return self._total
+
+    @property
+    def trial_events(self) -> Dict[str, int]:
+        """
+        :type: Dict[str, int]
+        """
+        return {event: int(count) for event, count in zip(EVENT_TYPES, self._trial_events)}
+
+    @property
+    def trial_events_n(self) -> int:
+        """
+        :type: int, the number of events of the current (or last) trial
+        """
+        return int(self._trial_events.sum())
+
+    ###########
+    # METHODS #
+    ###########
+
+    def start_trial(self):
+        """
+        Start a new trial, and reset the number of events of the trial.
+        """
+        self._trial += 1
+        self._trial_events[:] = 0
+
+    def trace(self, component: str, event: str):
+        """
+        Trace an event.
+        :param component: The name of the component (e.g. the name of the protocol)
+        :param event: The type of the event, one of EVENT_TYPES
+        """
+        event_n = EVENT_TYPES.index(event)
+        component_n = self._components.setdefault(component, len(self._components))
+        self._buffer[self._total % len(self._buffer)] = (self._trial, sim_time(),
+                                                         time.perf_counter() - self._wall_start,
+                                                         component_n, event_n)
+        self._total += 1
+        self._trial_events[event_n] += 1
+
+    def records(self) -> np.ndarray:
+        """
+        Get the records of the ring buffer in chronological order.
+        :return: The structured array (see TRACE_DTYPE) of the records
+        """
+        if self._total <= len(self._buffer):
+            return self._buffer[:self._total].copy()
+        start = self._total % len(self._buffer)
+        return np.concatenate([self._buffer[start:], self._buffer[:start]])
+
+    def components(self) -> List[str]:
+        """
+        Get the names of the components, the component of a record is the index in this list.
+        :return: The names of the components
+        """
+        return sorted(self._components, key=self._components.get)
+
+    def export_binary(self, path: str) -> str:
+        """
+        Export the records as a compact binary file (numpy .npz file).
+        :param path: The path of the file
+        :return: The path of the file
+        """
+        np.savez_compressed(path, records=self.records(), components=np.array(self.components()),
+                            events=np.array(EVENT_TYPES), total=self._total)
+        return path
+
+    def export_chrome_trace(self, path: str) -> str:
+        """
+        Export the records as a Chrome trace (instant events on the simulation time line, one thread per component).
+        :param path: The path of the file
+        :return: The path of the file
+        """
+        components = self.components()
+        trace_events = [{"name": EVENT_TYPES[record["event"]], "cat": components[record["component"]], "ph": "i",
+                         "s": "t", "ts": float(record["sim_time"]) / 1000, "pid": 0, "tid": int(record["component"]),
+                         "args": {"trial": int(record["trial"]), "wall_time": float(record["wall_time"])}}
+                        for record in self.records()]
+        # name the threads with the names of the components
+        trace_events += [{"name": "thread_name", "ph": "M", "pid": 0, "tid": index, "args": {"name": name}}
+                         for index, name in enumerate(components)]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ns"}, f)
+        return path
@@ -1,5 +1,7 @@
 from netsquid.components import QuantumChannel
 
+from src.models.ModelsFactory import ModelsFactory
+
 
 class QuantumChannelFactory:
     """
@@ -15,7 +17,8 @@ class QuantumChannelFactory:
         length:
             (float) – Length of the channel [km].
         models:
-            (dict) – Dictionary of models to use for the channel.
+            (dict or ModelsFactory) – Dictionary of models to use for the channel, or the factory that builds new
+            models for every channel.
         """
         self.length = length
         self.models = models
@@ -36,5 +39,24 @@ class QuantumChannelFactory:
         """
         return QuantumChannel("Q" + name,
                               length=self.length,
-                              models=self.models
+                              models=self.get_models(self.models)
                               )
+
+    @staticmethod
+    def get_models(models):
+        """
+        Get the models of a new channel.
+
+        Parameters
+        ----------
+        models:
+            (dict or ModelsFactory) – Dictionary of models, or the factory of the models.
+
+        Returns
+        -------
+        dict
+            The same dictionary of models, or new models built by the factory.
+        """
+        if isinstance(models, ModelsFactory):
+            return models.get()
+        return models
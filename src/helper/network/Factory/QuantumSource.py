@@ -42,3 +42,31 @@ class QuantumSourceFactory:
                        models={"emission_delay_model": FixedDelayModel(delay=self.delay)},
                        num_ports=self.num_ports
                        )
+
+    @staticmethod
+    def set_clocked(source: QSource, frequency: float):
+        """
+        Let a quantum source (created as external) generate the states by itself, at a fixed frequency.
+
+        Parameters
+        ----------
+        source:
+            (QSource) – The quantum source.
+        frequency:
+            (float) – Frequency of the internal clock of the source [Hz].
+        """
+        assert (frequency > 0)
+        source.frequency = frequency
+        source.status = SourceStatus.INTERNAL
+
+    @staticmethod
+    def set_external(source: QSource):
+        """
+        Stop the internal clock of a quantum source, which generates the states only when triggered again.
+
+        Parameters
+        ----------
+        source:
+            (QSource) – The quantum source.
+        """
+        source.status = SourceStatus.EXTERNAL
@@ -0,0 +1,168 @@
+import numpy as np
+from netsquid import sim_time
+from netsquid.nodes import Network
+from netsquid.qubits import reduced_dm
+from typing import List
+
+# stages recorded by the methods of the StarNetwork: after the generation of the entanglement of each channel
+# ("entanglement0" and "entanglement1", the latter only for protocol_a) and after the entanglement swapping
+PROTOCOL_STAGES: List[str] = ["entanglement0", "entanglement1", "swapping"]
+
+
+class MemoryRecorder:
+    """
+    Low overhead recorder of the memories of the network: at the chosen protocol stages, the occupancy of every memory
+    position (and optionally the reduced density matrix of its qubit) is copied into preallocated numpy buffers,
+    one trial every `every` trials, and dumped in binary form (.npz) at the end.
+
+
+    Recorder properties
+    -------------------
+    stages:
+        The names of the protocol stages to record, the other stages are ignored
+
+    capacity (default 1000):
+        The maximum number of recorded trials, the following ones are not recorded
+
+    every (default 1):
+        Record one trial every `every` trials
+
+    density_matrices (default False):
+        If the reduced density matrices of the qubits are recorded too
+
+
+    Buffers
+    -------
+    trials: (capacity,)
+        The index of each recorded trial
+
+    sim_times: (capacity, stages)
+        The simulation time of each recorded stage [ns]
+
+    occupancy: (capacity, stages, positions)
+        If each memory position contains a qubit
+
+    density: (capacity, stages, positions, 2, 2)
+        The reduced density matrix of the qubit in each memory position (zeros if empty), only with density_matrices
+    """
+
+    def __init__(self, network: Network, stages: List[str], capacity: int = 1000, every: int = 1,
+                 density_matrices: bool = False, memories: List[str] = None):
+        """
+        Constructor for the MemoryRecorder class.
+
+        :param network: The network to record the memories of
+        :param stages: The names of the protocol stages to record
+        :param capacity: The maximum number of recorded trials (default 1000)
+        :param every: Record one trial every `every` trials (default 1)
+        :param density_matrices: If the reduced density matrices are recorded too (default False)
+        :param memories: The names of the nodes to record, if None all the nodes with a quantum memory (default None)
+        """
+        assert (capacity > 0 and every > 0)
+        if memories is None:
+            memories = [name for name, node in network.nodes.items() if node.qmemory is not None]
+        self._qmemories = [network.subcomponents[name].qmemory for name in memories]
+        self._stages = {stage: index for index, stage in enumerate(stages)}
+        self._every = every
+        self._density_matrices = density_matrices
+        # one label for each memory position, e.g. "Repeater_m0"
+        self._labels = [f"{name}_m{position}" for name, qmemory in zip(memories, self._qmemories)
+                        for position in range(qmemory.num_positions)]
+
+        positions = len(self._labels)
+        self._trials = np.full(capacity, -1, dtype=np.int64)
+        self._sim_times = np.zeros((capacity, len(stages)), dtype=np.float64)
+        self._occupancy = np.zeros((capacity, len(stages), positions), dtype=np.bool_)
+        self._density = np.zeros((capacity, len(stages), positions, 2, 2) if density_matrices else (0,),
+                                 dtype=np.complex128)
+        self._trial: int = -1  # index of the current trial
+        self._recorded: int = 0  # number of recorded trials
+        self._sampled: bool = False  # if the current trial is recorded
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def labels(self) -> List[str]:
+        """
+        :type: List[str]
+        """
+        return self._labels
+
+    @property
+    def recorded(self) -> int:
+        """
+        :type: int
+        """
+        return self._recorded
+
+    @property
+    def occupancy(self) -> np.ndarray:
+        """
+        :type: np.ndarray, only the recorded trials
+        """
+        return self._occupancy[:self._recorded]
+
+    @property
+    def density(self) -> np.ndarray:
+        """
+        :type: np.ndarray, only the recorded trials
+        """
+        return self._density[:self._recorded]
+
+    ###########
+    # METHODS #
+    ###########
+
+    def start_trial(self):
+        """
+        Start a new trial, and decide if it is recorded.
+        """
+        self._trial += 1
+        self._sampled = self._trial % self._every == 0 and self._recorded < len(self._trials)
+        if self._sampled:
+            self._trials[self._recorded] = self._trial
+            self._recorded += 1
+
+    def record(self, stage: str):
+        """
+        Record the memories at the given stage of the current trial, if the trial is sampled and the stage is chosen.
+        :param stage: The name of the protocol stage
+        """
+        if not self._sampled or stage not in self._stages:
+            return
+        row = self._recorded - 1
+        stage_n = self._stages[stage]
+        self._sim_times[row, stage_n] = sim_time()
+        index = 0
+        for qmemory in self._qmemories:
+            for position in range(qmemory.num_positions):
+                # peek without causing/calculating/updating decoherence
+                qubit, = qmemory.peek(position, skip_noise=True)
+                if qubit is not None:
+                    self._occupancy[row, stage_n, index] = True
+                    if self._density_matrices:
+                        self._density[row, stage_n, index] = reduced_dm(qubit)
+                index += 1
+
+    def dump(self, path: str) -> str:
+        """
+        Dump the recorded trials in binary form (numpy .npz file).
+        :param path: The path of the file
+        :return: The path of the file
+        """
+        np.savez_compressed(path, labels=np.array(self._labels), stages=np.array(list(self._stages.keys())),
+                            trials=self._trials[:self._recorded], sim_times=self._sim_times[:self._recorded],
+                            occupancy=self.occupancy, density=self.density)
+        return path
+
+    @staticmethod
+    def load(path: str) -> dict:
+        """
+        Load the recorded trials dumped by `dump`.
+        :param path: The path of the file
+        :return: dict of the buffers (labels, stages, trials, sim_times, occupancy, density)
+        """
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
@@ -1,11 +1,13 @@
+import math
+
 from netsquid.components import INSTR_X, INSTR_Z
 from netsquid.components.qmemory import Qubit
-from typing import List, Dict, Union
+from typing import List
 
 from src.helper.error.error import error_exit
 from src.helper.network.entanglement_swapping_utils.bell_measurement import perform_bell_measurement, \
-    print_bell_measurement
-from src.helper.network.entanglement_swapping_utils.results import get_result
+    perform_forced_bell_measurement, print_bell_measurement
+from src.helper.network.entanglement_swapping_utils.results import PairResult, get_result
 
 
 def apply_gates(curr_state: int, remote_node_memory, position: int = -1, debug: bool = False) -> str:
@@ -20,7 +22,8 @@ def apply_gates(curr_state: int, remote_node_memory, position: int = -1, debug:
     :return: The message with the steps of the function
     """
     # dictionary with the instructions to apply based on the state of the qubit
-    # (represented w numbers, input of the function curr_state or as bell states in the comments)
+    # (represented w numbers, input of the function curr_state or as bell states in the comments),
+    # the same corrections of BELL_CORRECTIONS
     instructions = {
         0: [],  # |00> (no gates to apply)
         1: [INSTR_X],  # |01>
@@ -63,24 +66,57 @@ def perform_and_get_bell_measurement_w_state(remote_node_memory, positions: list
     return m, state
 
 
-def get_results(pairs: List[List[Qubit]]) -> List[Dict[str, Union[List[Qubit], float, bool]]]:
+def perform_and_get_forced_bell_measurement_w_state(remote_node_memory, positions: list = [], outcome: int = 0,
+                                                    debug: bool = False):
+    """
+    Perform the Bell measurement in the Repeater with a chosen outcome (see perform_forced_bell_measurement).
+    :param remote_node_memory: The memory of the RemoteNode
+    :param positions: The memory positions in the RemoteNode where the qubits are stored
+    :param outcome: The outcome to force, in M format (0, 1, 2 or 3)
+    :param debug: A flag to print the results of the function
+    :return: The probabilities of the 4 outcomes and the (forced) state of the qubit in the Repeater
+    """
+    probabilities, state = perform_forced_bell_measurement(remote_node_memory, positions, outcome)
+    if debug:
+        print_bell_measurement(probabilities, state)
+    return probabilities, state
+
+
+def get_results(pairs: List[List[Qubit]], bell_states: List[int] = None, keep_qubits: bool = False,
+                probabilities: List[float] = None, pauli_frame: bool = False) -> List[PairResult]:
     """
     Get the results of the entanglement swapping protocol.
 
     :param pairs: The pairs of qubits
+    :param bell_states: The outcome of the Bell measurement used to correct each pair (default None, no swapping)
+    :param keep_qubits: If the qubits should be retained in the results (default False)
+    :param probabilities: The probability of the outcome of each pair, with stratified sampling (default None)
+    :param pauli_frame: If the corrections of the outcomes were not applied to the pairs, but tracked as Pauli
+    frames (default False)
     :return: A list with the results of the entanglement swapping protocol
     """
     results = []
-    for pair in pairs:
-        results.append(get_result(pair))
+    for pair_id, pair in enumerate(pairs):
+        bell_state = -1 if bell_states is None else bell_states[pair_id]
+        probability = math.nan if probabilities is None else probabilities[pair_id]
+        frame = bell_state if pauli_frame else -1
+        results.append(get_result(pair, pair_id, bell_state, keep_qubits, probability, frame))
     return results
 
 
-def get_results_qubits(qubits: List[Qubit]) -> List[Dict[str, Union[List[Qubit], float, bool]]]:
+def get_results_qubits(qubits: List[Qubit], states: List[int] = [], keep_qubits: bool = False,
+                       probabilities: List[float] = [], pauli_frame: bool = False) -> List[PairResult]:
     """
     Get the results of the entanglement swapping protocol.
 
     :param qubits: qubits
+    :param states: The outcomes of the Bell measurements in the repeater, in the order of the memory positions
+    of the RemoteNode they corrected (default [], no swapping)
+    :param keep_qubits: If the qubits should be retained in the results (default False)
+    :param probabilities: The probabilities of the outcomes, in the same order of the states, only with stratified
+    sampling (default [], unknown)
+    :param pauli_frame: If the corrections of the states were tracked as Pauli frames, instead of applied to the
+    qubits (default False)
     :return: A list with the results of the entanglement swapping protocol
     """
     length = len(qubits)
@@ -89,15 +125,21 @@ def get_results_qubits(qubits: List[Qubit]) -> List[Dict[str, Union[List[Qubit],
         # pair = [qubit_node1, qubit_node2]
         pair = [qubits[0], qubits[1]]
         pairs.append(pair)
-    elif length == 4:
+        bell_states = [states[0] if len(states) == 1 else -1]
+        outcome_probabilities = [probabilities[0] if len(probabilities) == 1 else math.nan]
+    elif length >= 4 and length % 2 == 0:
+        # the qubits of the nodes, followed by the ones of the RemoteNode (one for each channel), e.g. with 2 pairs:
         # channel_1_pair = [qubit_node1, qubit_node3_1]
         # channel_0_pair = [qubit_node2, qubit_node3]
-        # results = get_results([channel_1_pair, channel_0_pair])
-        pair1 = [qubits[0], qubits[3]]
-        pair2 = [qubits[1], qubits[2]]
-        pairs.append(pair1)
-        pairs.append(pair2)
+        pairs_n = length // 2
+        bell_states, outcome_probabilities = [], []
+        for i in range(pairs_n):
+            # the i-th node used the channel pairs_n - 1 - i, corrected in that memory position of the RemoteNode
+            channel_n = pairs_n - 1 - i
+            pairs.append([qubits[i], qubits[pairs_n + channel_n]])
+            bell_states.append(states[channel_n] if len(states) == pairs_n else -1)
+            outcome_probabilities.append(probabilities[channel_n] if len(probabilities) == pairs_n else math.nan)
     else:
         error_exit("Invalid number of qubits in get_results_qubits")
 
-    return get_results(pairs)
+    return get_results(pairs, bell_states, keep_qubits, outcome_probabilities, pauli_frame)
@@ -1,5 +1,15 @@
+import numpy as np
 from netsquid.components import INSTR_MEASURE_BELL
-from netsquid.qubits import ketstates
+from netsquid.components.instructions import Instruction
+from netsquid.components.qmemory import MemPositionEmptyError
+from netsquid.qubits import QFormalism, ketstates
+from netsquid.qubits import qubitapi as qapi
+from typing import List, Tuple
+
+_X = np.array([[0, 1], [1, 0]])
+_Z = np.array([[1, 0], [0, -1]])
+# Pauli corrections applied to the second qubit (see apply_gates) for each outcome in M format, in order
+BELL_CORRECTIONS = {0: [], 1: [_X], 2: [_Z, _X], 3: [_Z]}
 
 
 def perform_bell_measurement(remote_node_memory, positions: list = []):
@@ -30,3 +40,92 @@ def print_bell_measurement(m, state) -> str:
     msg += f'B/Bell states/Ket vectors format for the states: {ketstates.BellIndex(state)}\n'
     print(msg)
     return msg
+
+
+def bell_state_vector(outcome: int) -> np.ndarray:
+    """
+    Get the Bell state of an outcome of the Bell measurement, as the state that the corrections of the outcome
+    (see BELL_CORRECTIONS) bring back to |00> + |11>.
+    :param outcome: The outcome of the Bell measurement, in M format (0, 1, 2 or 3)
+    :return: The ket vector of the Bell state
+    """
+    correction = np.eye(2)
+    for gate in BELL_CORRECTIONS[outcome]:
+        correction = gate @ correction
+    phi_plus = np.array([1, 0, 0, 1]) / np.sqrt(2)
+    return np.kron(np.eye(2), correction.conj().T) @ phi_plus
+
+
+def perform_forced_bell_measurement(remote_node_memory, positions: list = [], outcome: int = 0) \
+        -> Tuple[List[float], int]:
+    """
+    Perform the Bell measurement in the Repeater with a chosen (forced) outcome, for stratified sampling: the
+    probabilities of all the outcomes are computed from the density matrix of the qubits, then the qubits are
+    projected on the Bell state of the chosen outcome. If the chosen outcome is impossible, the most likely one is
+    used instead.
+    :param remote_node_memory: The memory of the RemoteNode
+    :param positions: The memory positions in the RemoteNode where the qubits are stored (default [], 0 and 1)
+    :param outcome: The outcome to force, in M format (0, 1, 2 or 3)
+    :raises MemPositionEmptyError: If one of the memory positions is empty
+    :return: The probabilities of the 4 outcomes and the forced outcome
+    """
+    if len(positions) == 0:
+        positions = [0, 1]
+    measured = remote_node_memory.peek(positions)
+    if any(qubit is None for qubit in measured):
+        raise MemPositionEmptyError(f"Empty memory position in {positions} for the Bell measurement")
+    # all the qubits that share the state of the measured ones, the measured ones first
+    qubits = list(measured)
+    for qubit in measured:
+        qubits += [other for other in qubit.qstate.qubits if other not in qubits]
+    rest_n = len(qubits) - 2
+    rho = qapi.reduced_dm(qubits).reshape(4, 2 ** rest_n, 4, 2 ** rest_n)
+
+    vectors = [bell_state_vector(k) for k in range(4)]
+    # unnormalized states of the other qubits after each outcome
+    rest_states = [np.einsum("a,aibj,b->ij", vector.conj(), rho, vector) for vector in vectors]
+    probabilities = [float(np.real(np.trace(state))) for state in rest_states]
+    if probabilities[outcome] < 1e-12:
+        outcome = int(np.argmax(probabilities))
+
+    if rest_n > 0:
+        qapi.assign_qstate(qubits[2:], rest_states[outcome] / probabilities[outcome], formalism=QFormalism.DM)
+    qapi.assign_qstate(qubits[:2], vectors[outcome])
+    return probabilities, outcome
+
+
+class IForcedMeasureBell(Instruction):
+    """
+    Instruction of the Bell measurement with a chosen (forced) outcome, for stratified sampling (see
+    perform_forced_bell_measurement), so that it can be part of a QuantumProgram. Its output is the forced outcome
+    followed by its probability.
+    """
+
+    @property
+    def name(self) -> str:
+        """
+        :type: str
+        """
+        return "forced_measure_bell"
+
+    @property
+    def num_positions(self) -> int:
+        """
+        :type: int
+        """
+        return 2
+
+    def execute(self, quantum_memory, positions, outcome: int = 0, **kwargs) -> list:
+        """
+        Perform the forced Bell measurement on the qubits of the memory.
+        :param quantum_memory: The memory of the qubits
+        :param positions: The memory positions of the 2 qubits
+        :param outcome: The outcome to force, in M format (0, 1, 2 or 3) (default 0)
+        :raises MemPositionEmptyError: If one of the memory positions is empty
+        :return: list of the forced outcome and of its probability
+        """
+        probabilities, outcome = perform_forced_bell_measurement(quantum_memory, list(positions), outcome)
+        return [outcome, probabilities[outcome]]
+
+
+INSTR_FORCED_MEASURE_BELL = IForcedMeasureBell()
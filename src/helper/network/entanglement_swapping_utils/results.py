@@ -1,7 +1,128 @@
-from netsquid import b00, qubits
+import math
+
+import numpy as np
+from netsquid import b00, qubits, sim_time
 from netsquid.components.qmemory import Qubit
 from netsquid.qubits import QRepr
-from typing import List, Dict, Union
+from typing import List
+
+from src.helper.network.entanglement_swapping_utils.bell_measurement import bell_state_vector
+
+
+class PairResult:
+    """
+    Compact result of the entanglement swapping protocol for a single pair of qubits.
+
+    The qubits are not retained by default, since they keep their shared quantum state alive, set keep_qubits to
+    retain them. For backward compatibility the fields can also be accessed as the keys of a dictionary
+    (e.g. result["fidelity"]).
+
+
+    Result fields
+    -------------
+    fidelity:
+        The fidelity of the pair of qubits compared to the reference state
+
+    error:
+        If the pair could not be measured
+
+    pair_id:
+        The index of the pair in the trial (0 or 1 for protocol_a, 0 for entangle_nodes)
+
+    bell_state:
+        The outcome of the Bell measurement in the repeater used to correct the pair, in M format (0, 1, 2 or 3),
+        -1 if there was no entanglement swapping
+
+    sim_time:
+        The simulation time when the result was computed [ns]
+
+    wall_time:
+        The wall-clock time of the trial [s], set by the caller (0 if not measured)
+
+    outcome_probability:
+        The probability of the outcome of the Bell measurement, only with stratified sampling (nan otherwise)
+
+    pauli_frame:
+        The outcome of the Bell measurement whose correction was tracked as a Pauli frame instead of being applied to
+        the qubits (the fidelity is the one with the Bell state of the outcome), -1 if the correction was applied
+
+    qubits:
+        The pair of qubits, None if not retained
+    """
+    __slots__ = ("fidelity", "error", "pair_id", "bell_state", "sim_time", "wall_time", "qubits",
+                 "outcome_probability", "pauli_frame")
+
+    _keys = ("qubits", "fidelity", "error", "pair_id", "bell_state", "sim_time", "wall_time", "outcome_probability",
+             "pauli_frame")
+
+    def __init__(self, fidelity: float, error: bool = False, pair_id: int = 0, bell_state: int = -1,
+                 sim_time_ns: float = 0.0, wall_time: float = 0.0, pair: List[Qubit] = None,
+                 outcome_probability: float = math.nan, pauli_frame: int = -1):
+        """
+        Constructor for the PairResult class.
+
+        :param fidelity: The fidelity of the pair of qubits
+        :param error: If the pair could not be measured (default False)
+        :param pair_id: The index of the pair in the trial (default 0)
+        :param bell_state: The outcome of the Bell measurement used to correct the pair (default -1, no swapping)
+        :param sim_time_ns: The simulation time when the result was computed [ns] (default 0)
+        :param wall_time: The wall-clock time of the trial [s] (default 0)
+        :param pair: The pair of qubits to retain (default None, not retained)
+        :param outcome_probability: The probability of the outcome of the Bell measurement (default nan, unknown)
+        :param pauli_frame: The outcome whose correction was tracked as a Pauli frame (default -1, applied)
+        """
+        self.fidelity = fidelity
+        self.error = error
+        self.pair_id = pair_id
+        self.bell_state = bell_state
+        self.sim_time = sim_time_ns
+        self.wall_time = wall_time
+        self.qubits = pair
+        self.outcome_probability = outcome_probability
+        self.pauli_frame = pauli_frame
+
+    def keys(self) -> List[str]:
+        """
+        :return: The available fields, "qubits" only if the qubits are retained, "outcome_probability" only if
+        it is known and "pauli_frame" only if the correction was tracked as a Pauli frame
+        """
+        return [key for key in self._keys if (key != "qubits" or self.qubits is not None)
+                and (key != "outcome_probability" or not math.isnan(self.outcome_probability))
+                and (key != "pauli_frame" or self.pauli_frame != -1)]
+
+    def __getitem__(self, key: str):
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PairResult):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def to_dict(self) -> dict:
+        """
+        :return: A dictionary with the available fields
+        """
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"PairResult({self.to_dict()})"
+
+
+# dtype of the numpy structured arrays used to collect the results of many trials, the weight is the likelihood ratio
+# of the trial with importance sampling (1 otherwise)
+RESULT_DTYPE: np.dtype = np.dtype([("length", np.float64), ("trial", np.int32), ("pair_id", np.int8),
+                                   ("bell_state", np.int8), ("error", np.bool_), ("fidelity", np.float64),
+                                   ("sim_time", np.float64), ("wall_time", np.float64), ("weight", np.float64)])
+
+
+# reference state of the pairs for each Pauli frame (see bell_state_vector): the Bell state of the outcome, which the
+# tracked correction would bring back to |00> + |11>
+PAULI_FRAME_STATES: List[np.ndarray] = [bell_state_vector(outcome).reshape(4, 1) for outcome in range(4)]
 
 
 def calc_fidelity(pair1: List[Qubit], reference_state: QRepr = b00) -> float:
@@ -15,13 +136,20 @@ def calc_fidelity(pair1: List[Qubit], reference_state: QRepr = b00) -> float:
     return qubits.fidelity(pair1, reference_state)
 
 
-def get_result(pair: List[Qubit]) -> Dict[str, Union[List[Qubit], float, bool]]:
+def get_result(pair: List[Qubit], pair_id: int = 0, bell_state: int = -1, keep_qubits: bool = False,
+               outcome_probability: float = math.nan, pauli_frame: int = -1) -> PairResult:
     """
     Get the result of the entanglement swapping protocol.
 
     :param pair: The pair of qubits
-    :return: A dictionary with the results of the entanglement swapping protocol
+    :param pair_id: The index of the pair in the trial (default 0)
+    :param bell_state: The outcome of the Bell measurement used to correct the pair (default -1, no swapping)
+    :param keep_qubits: If the qubits should be retained in the result (default False)
+    :param outcome_probability: The probability of the outcome of the Bell measurement (default nan, unknown)
+    :param pauli_frame: The outcome whose correction was not applied to the pair, but tracked as a Pauli frame
+    (default -1, the correction was applied)
+    :return: The compact result of the entanglement swapping protocol
     """
-    fidelity = calc_fidelity(pair)
-    result = {"qubits": pair, "fidelity": fidelity, "error": False}
-    return result
+    fidelity = calc_fidelity(pair, PAULI_FRAME_STATES[pauli_frame] if pauli_frame != -1 else b00)
+    return PairResult(fidelity, False, pair_id, bell_state, sim_time(), pair=pair if keep_qubits else None,
+                      outcome_probability=outcome_probability, pauli_frame=pauli_frame)
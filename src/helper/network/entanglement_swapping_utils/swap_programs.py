@@ -0,0 +1,178 @@
+from netsquid.components import INSTR_MEASURE_BELL, INSTR_X, INSTR_Y, INSTR_Z
+from netsquid.components.qprogram import QuantumProgram
+from typing import List
+
+from src.helper.network.entanglement_swapping_utils.bell_measurement import INSTR_FORCED_MEASURE_BELL
+
+# the corrections of BELL_CORRECTIONS (see bell_measurement) for each outcome in M format, combined in a single
+# Pauli gate: Z followed by X is Y up to a global phase
+CORRECTION_INSTRUCTIONS = {0: None, 1: INSTR_X, 2: INSTR_Y, 3: INSTR_Z}
+
+
+class BellMeasurementProgram(QuantumProgram):
+    """
+    Program of the Repeater for the entanglement swapping of a topology: all the Bell measurements, built once with
+    their memory positions (see StarNetwork.get_entanglement_swapping_parameters) and executed as a single program
+    by the processor of the Repeater. With forced outcomes (stratified sampling) the measurements project the qubits
+    on the Bell states of the given outcomes (see INSTR_FORCED_MEASURE_BELL).
+
+    The qubits of the program are mapped to the memory positions of the measurements, in order.
+    """
+
+    def __init__(self, measure_positions: List[List[int]]):
+        """
+        Constructor for the BellMeasurementProgram class.
+
+        :param measure_positions: The memory positions of the Repeater of each Bell measurement ([] for the default
+        positions 0 and 1)
+        """
+        pairs = [list(positions) if len(positions) != 0 else [0, 1] for positions in measure_positions]
+        self._memory_positions: List[int] = [position for pair in pairs for position in pair]
+        self._measurements_n: int = len(pairs)
+        self._forced_outcomes: List[int] = None
+        super().__init__(num_qubits=len(self._memory_positions))
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def memory_positions(self) -> List[int]:
+        """
+        :type: List[int], the memory positions of the qubits of the program (its qubit mapping)
+        """
+        return self._memory_positions
+
+    @property
+    def measurements_n(self) -> int:
+        """
+        :type: int
+        """
+        return self._measurements_n
+
+    @property
+    def forced_outcomes(self) -> List[int]:
+        """
+        :type: List[int], the outcome forced on each measurement, None to sample them
+        """
+        return self._forced_outcomes
+
+    @property
+    def outcomes(self) -> List[int]:
+        """
+        :type: List[int], the outcome of each measurement of the last execution, in M format (0, 1, 2 or 3)
+        """
+        return [self.output[f"M{i}"][0] for i in range(self._measurements_n)]
+
+    @property
+    def probabilities(self) -> List[float]:
+        """
+        :type: List[float], the probability of the outcome of each measurement of the last execution, only with
+        forced outcomes
+        """
+        return [self.output[f"M{i}"][1] for i in range(self._measurements_n)]
+
+    ###########
+    # SETTERS #
+    ###########
+
+    @forced_outcomes.setter
+    def forced_outcomes(self, outcomes: List[int]):
+        """
+        Set the outcomes forced on the measurements of the next executions.
+        :param outcomes: The outcome of each measurement, in M format, None to sample them
+        :raises AssertionError: If the number of the outcomes is not the one of the measurements
+        """
+        assert (outcomes is None or len(outcomes) == self._measurements_n)
+        self._forced_outcomes = outcomes
+
+    ###########
+    # METHODS #
+    ###########
+
+    def program(self):
+        """
+        Measure every pair of qubits in the Bell basis, the outcome of the i-th one has the output key "M{i}".
+        """
+        for i in range(self._measurements_n):
+            qubits = [2 * i, 2 * i + 1]
+            if self._forced_outcomes is None:
+                self.apply(INSTR_MEASURE_BELL, qubits, output_key=f"M{i}")
+            else:
+                self.apply(INSTR_FORCED_MEASURE_BELL, qubits, output_key=f"M{i}", outcome=self._forced_outcomes[i])
+        yield self.run()
+
+
+class CorrectionProgram(QuantumProgram):
+    """
+    Program of the RemoteNode for the entanglement swapping of a topology: the corrections of the outcomes of the
+    Bell measurements, built once with their memory positions and executed as a single program by the processor of
+    the RemoteNode. The corrections are classically controlled by the outcomes, each one selects a single (combined)
+    Pauli gate, or none, for the memory position of the RemoteNode of its pair.
+
+    The qubits of the program are mapped to the corrected memory positions, in order.
+    """
+
+    def __init__(self, correct_positions: List[int]):
+        """
+        Constructor for the CorrectionProgram class.
+
+        :param correct_positions: The memory position of the RemoteNode corrected by each measurement (-1 for the
+        default position 0)
+        """
+        self._memory_positions: List[int] = [position if position != -1 else 0 for position in correct_positions]
+        self._outcomes: List[int] = [0] * len(self._memory_positions)
+        super().__init__(num_qubits=len(self._memory_positions))
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def memory_positions(self) -> List[int]:
+        """
+        :type: List[int], the memory positions of the qubits of the program (its qubit mapping)
+        """
+        return self._memory_positions
+
+    @property
+    def outcomes(self) -> List[int]:
+        """
+        :type: List[int], the outcomes of the Bell measurements to correct, in M format (0, 1, 2 or 3)
+        """
+        return self._outcomes
+
+    @property
+    def gates_n(self) -> int:
+        """
+        :type: int, the number of gates applied for the outcomes
+        """
+        return sum(CORRECTION_INSTRUCTIONS[outcome] is not None for outcome in self._outcomes)
+
+    ###########
+    # SETTERS #
+    ###########
+
+    @outcomes.setter
+    def outcomes(self, outcomes: List[int]):
+        """
+        Set the outcomes corrected by the next executions.
+        :param outcomes: The outcome of each measurement, in M format (0, 1, 2 or 3)
+        :raises AssertionError: If the number of the outcomes is not the one of the corrections
+        """
+        assert (len(outcomes) == len(self._memory_positions))
+        self._outcomes = list(outcomes)
+
+    ###########
+    # METHODS #
+    ###########
+
+    def program(self):
+        """
+        Apply the combined correction of every outcome to its qubit.
+        """
+        for qubit, outcome in enumerate(self._outcomes):
+            instruction = CORRECTION_INSTRUCTIONS[outcome]
+            if instruction is not None:
+                self.apply(instruction, [qubit])
+        yield self.run()
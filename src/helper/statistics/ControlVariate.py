@@ -0,0 +1,149 @@
+import math
+from collections import OrderedDict
+from typing import Dict
+
+
+class ControlVariate:
+    """
+    Constant memory control variate estimator of the mean of a stream of values y: each value comes with a control c
+    (e.g. an analytic prediction of y) whose expected value is known exactly. The estimate is the mean of
+    y - beta * (c - expected_control), where the optimal coefficient beta = Cov(y, c) / Var(c) is estimated online,
+    so its variance is the one of y reduced by a factor 1 - rho^2 (rho is the correlation of y and c).
+    Two estimators (e.g. of different workers) with the same expected control can be merged.
+    """
+
+    def __init__(self, expected_control: float):
+        """
+        Constructor for the ControlVariate class.
+
+        :param expected_control: The exact expected value of the control
+        """
+        self._expected_control = expected_control
+        self._n: int = 0
+        self._mean_y: float = 0.0
+        self._mean_c: float = 0.0
+        self._m2_y: float = 0.0  # sum of the squared differences from the mean of y
+        self._m2_c: float = 0.0  # sum of the squared differences from the mean of c
+        self._co_moment: float = 0.0  # sum of the products of the differences from the means
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def n(self) -> int:
+        """
+        :type: int
+        """
+        return self._n
+
+    @property
+    def expected_control(self) -> float:
+        """
+        :type: float
+        """
+        return self._expected_control
+
+    @property
+    def mean(self) -> float:
+        """
+        :type: float, the plain mean of the values, nan if there are none
+        """
+        return self._mean_y if self._n > 0 else math.nan
+
+    @property
+    def coefficient(self) -> float:
+        """
+        :type: float, the estimated optimal coefficient, 0 if the control has no variance (yet)
+        """
+        return self._co_moment / self._m2_c if self._m2_c > 0 else 0.0
+
+    @property
+    def estimate(self) -> float:
+        """
+        :type: float, the variance-reduced estimate of the mean, nan if there are no values
+        """
+        if self._n == 0:
+            return math.nan
+        return self._mean_y - self.coefficient * (self._mean_c - self._expected_control)
+
+    @property
+    def variance_reduction(self) -> float:
+        """
+        :type: float, the ratio of the variance of the plain mean to the one of the estimate (1 - rho^2 inverted),
+        nan with less than 2 values or without variance
+        """
+        residual = self._residual_m2()
+        if self._n < 2 or residual <= 0:
+            return math.nan
+        return self._m2_y / residual
+
+    @property
+    def sem(self) -> float:
+        """
+        :type: float, the standard error of the estimate, nan with less than 3 values
+        """
+        if self._n < 3:
+            return math.nan
+        # one more degree of freedom is used by the coefficient
+        return math.sqrt(max(self._residual_m2(), 0.0) / (self._n - 2) / self._n)
+
+    ###########
+    # METHODS #
+    ###########
+
+    def add(self, value: float, control: float):
+        """
+        Add a value and its control.
+        :param value: The value
+        :param control: The control of the value
+        """
+        self._n += 1
+        delta_y = value - self._mean_y
+        delta_c = control - self._mean_c
+        self._mean_y += delta_y / self._n
+        self._mean_c += delta_c / self._n
+        self._m2_y += delta_y * (value - self._mean_y)
+        self._m2_c += delta_c * (control - self._mean_c)
+        self._co_moment += delta_y * (control - self._mean_c)
+
+    def merge(self, other: "ControlVariate") -> "ControlVariate":
+        """
+        Merge the values of another estimator (with the same expected control) into this one.
+        :param other: The other estimator
+        :raises AssertionError: If the expected controls are different
+        :return: This estimator
+        """
+        assert (self._expected_control == other._expected_control)
+        if other._n == 0:
+            return self
+        n = self._n + other._n
+        delta_y = other._mean_y - self._mean_y
+        delta_c = other._mean_c - self._mean_c
+        weight = self._n * other._n / n
+        self._m2_y += other._m2_y + delta_y ** 2 * weight
+        self._m2_c += other._m2_c + delta_c ** 2 * weight
+        self._co_moment += other._co_moment + delta_y * delta_c * weight
+        self._mean_y += delta_y * other._n / n
+        self._mean_c += delta_c * other._n / n
+        self._n = n
+        return self
+
+    def columns(self, prefix: str, z: float = 1.96) -> Dict[str, float]:
+        """
+        Get the estimate as the columns of a csv file.
+        :param prefix: The prefix of the names of the columns
+        :param z: The quantile of the standard normal distribution for the confidence interval (default 1.96)
+        :return: ordered dictionary of the column names to the values
+        """
+        estimate = self.estimate
+        half_width = z * self.sem
+        return OrderedDict([(prefix, estimate), (f"{prefix}_ci_low", estimate - half_width),
+                            (f"{prefix}_ci_high", estimate + half_width), (f"{prefix}_coefficient", self.coefficient),
+                            (f"{prefix}_variance_reduction", self.variance_reduction)])
+
+    def _residual_m2(self) -> float:
+        # sum of the squared residuals of y after removing the part explained by the control
+        if self._m2_c <= 0:
+            return self._m2_y
+        return self._m2_y - self._co_moment ** 2 / self._m2_c
@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from src.helper.network.entanglement_swapping_utils.bell_measurement import BELL_CORRECTIONS, bell_state_vector
+from src.helper.statistics.FidelityPredictor import FidelityPredictor
+from src.models.single.CachedT1T2NoiseModel import CachedT1T2NoiseModel
+
+# density matrix of |00> + |11>, the state of the pairs generated by the sources
+PHI_PLUS: np.ndarray = np.outer(bell_state_vector(0), bell_state_vector(0).conj())
+
+
+class ExactExpectation:
+    """
+    Exact expected results of the fixed circuits of the network (entangle_nodes and protocol_a) at each length of the
+    channels, computed with a single deterministic pass on the density matrices instead of estimated by the trials.
+
+    The losses of the channels do not depend on the states of the qubits: they only weight the trials (the success
+    probability, see FidelityPredictor), and the pairs that are not lost have the state given by the noise alone.
+    The noise of every crossing (the Kraus operators of CachedT1T2NoiseModel over the delay of the channel) is applied
+    to |00> + |11>, and with the repeater the Bell measurement is summed over its 4 outcomes, each one weighted by its
+    probability and followed by its correction (see BELL_CORRECTIONS). The amplitude damping is exact, unlike the
+    Pauli twirl of FidelityPredictor. The memories of the network have no noise, so the waits in them do not matter.
+
+    With the repeater, the qubits of a pair cross 3 channels: the half sent to the node, and the two halves of the
+    swapped pairs that reach the repeater (the half of the Remote Node stays in its memory). Without it, they cross 2.
+
+
+    Expectation properties
+    ----------------------
+    predictor (default FidelityPredictor(), no models):
+        The predictor with the parameters of the models of the channels, and their loss probability
+    """
+
+    def __init__(self, predictor: FidelityPredictor = None):
+        """
+        Constructor for the ExactExpectation class.
+
+        :param predictor: The predictor with the parameters of the models (default None, no loss and no noise)
+        """
+        self._predictor: FidelityPredictor = predictor if predictor is not None else FidelityPredictor()
+
+    @staticmethod
+    def from_models(loss_model=None, noise_model=None, delay_model=None) -> "ExactExpectation":
+        """
+        Create the expectation from the models of a channel (see FidelityPredictor.from_models).
+
+        :param loss_model: The loss model, with p_loss_init and p_loss_length (default None)
+        :param noise_model: The noise model, with T1 and T2 (default None)
+        :param delay_model: The delay model, with c (default None)
+        :return: The expectation
+        """
+        return ExactExpectation(FidelityPredictor.from_models(loss_model, noise_model, delay_model))
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def predictor(self) -> FidelityPredictor:
+        """
+        :type: FidelityPredictor
+        """
+        return self._predictor
+
+    ###########
+    # METHODS #
+    ###########
+
+    def cross(self, rho: np.ndarray, qubit: int, length: float) -> np.ndarray:
+        """
+        Apply the noise of a channel to a qubit of a pair.
+        :param rho: The density matrix of the pair (4x4)
+        :param qubit: The index of the qubit that crosses the channel (0 or 1)
+        :param length: The length of the channel [km]
+        :return: The density matrix of the pair after the crossing
+        """
+        kraus = CachedT1T2NoiseModel._compute_kraus_operators(*self._predictor.noise_parameters(length))
+        operators = [np.kron(k, np.eye(2)) if qubit == 0 else np.kron(np.eye(2), k) for k in kraus]
+        return sum(operator @ rho @ operator.conj().T for operator in operators)
+
+    def node_pair_state(self, length: float) -> np.ndarray:
+        """
+        Get the state of the pair of a source, whose halves both cross a channel (to the node, and to the repeater or
+        to the other node).
+        :param length: The length of the channels [km]
+        :return: The density matrix of the pair
+        """
+        return self.cross(self.cross(PHI_PLUS, 0, length), 1, length)
+
+    def outcome_states(self, length: float) -> List[np.ndarray]:
+        """
+        Get the states of the swapped pairs after each outcome of the Bell measurement in the repeater, and its
+        correction.
+        :param length: The length of the channels [km]
+        :return: The unnormalized density matrices of the pairs of the 4 outcomes, their traces are the probabilities
+        of the outcomes
+        """
+        # the pair of the Remote Node, only the half sent to the repeater crosses a channel
+        remote_pair = self.cross(PHI_PLUS, 0, length)
+        # qubits of the node, of the repeater (2, measured) and of the Remote Node
+        rho = np.kron(self.node_pair_state(length), remote_pair).reshape([2] * 8)
+        states = []
+        for outcome in range(4):
+            vector = bell_state_vector(outcome).reshape(2, 2)
+            state = np.einsum("bc,abcdefgh,fg->adeh", vector.conj(), rho, vector).reshape(4, 4)
+            correction = np.eye(2)
+            for gate in BELL_CORRECTIONS[outcome]:
+                correction = gate @ correction
+            correction = np.kron(np.eye(2), correction)
+            states.append(correction @ state @ correction.conj().T)
+        return states
+
+    def pair_state(self, length: float, swapped: bool = True) -> np.ndarray:
+        """
+        Get the average state of the pairs that were not lost.
+        :param length: The length of the channels [km]
+        :param swapped: If the pair is swapped by the repeater (default True)
+        :return: The density matrix of the pair, averaged over the outcomes of the Bell measurement if swapped
+        """
+        return sum(self.outcome_states(length)) if swapped else self.node_pair_state(length)
+
+    @staticmethod
+    def fidelity(rho: np.ndarray) -> float:
+        """
+        Get the fidelity of a pair with |00> + |11>.
+        :param rho: The density matrix of the pair (4x4)
+        :return: The fidelity
+        """
+        return float(np.real(np.trace(PHI_PLUS @ rho)))
+
+    def pair_fidelity(self, length: float, swapped: bool = True) -> float:
+        """
+        Get the exact mean fidelity of the pairs that were not lost.
+        :param length: The length of the channels [km]
+        :param swapped: If the pair is swapped by the repeater (default True)
+        :return: The fidelity
+        """
+        return self.fidelity(self.pair_state(length, swapped))
+
+    def success_probability(self, length: float, swapped: bool = True, pairs_n: int = 1) -> float:
+        """
+        Get the probability that no qubit of a trial is lost.
+        :param length: The length of the channels [km]
+        :param swapped: If the pairs are swapped by the repeater (default True)
+        :param pairs_n: The number of pairs of each trial (default 1)
+        :return: The probability
+        """
+        return self._predictor.success_probability(length, (3 if swapped else 2) * pairs_n)
+
+    def columns(self, length: float, swapped: bool = True, pairs_n: int = 1,
+                repeat_until_success: bool = False) -> Dict[str, float]:
+        """
+        Get the exact expected results as the columns of a csv file, the limits of the ones of SweepPointStatistics.
+        :param length: The length of the channels [km]
+        :param swapped: If the pairs are swapped by the repeater (default True)
+        :param pairs_n: The number of pairs of each trial (default 1)
+        :param repeat_until_success: If the sources repeat the generation until success, so that no trial is lost
+        (default False)
+        :return: ordered dictionary with the fidelity of all the pairs (a lost trial counts as pairs_n pairs with
+        fidelity 0), the fidelity of the pairs that were not lost, the fidelity of the trials (0 if lost), the
+        success and loss rates, and the probability and fidelity of each outcome of the Bell measurement if swapped
+        """
+        outcome_states = self.outcome_states(length) if swapped else []
+        pair_fidelity = self.fidelity(sum(outcome_states) if swapped else self.node_pair_state(length))
+        success = 1.0 if repeat_until_success else self.success_probability(length, swapped, pairs_n)
+        columns = OrderedDict([("fidelity", success * pair_fidelity),
+                               ("pair_fidelity", pair_fidelity), ("trial_fidelity", success * pair_fidelity),
+                               ("success_rate", success), ("loss_rate", 1 - success)])
+        for outcome, state in enumerate(outcome_states):
+            probability = float(np.real(np.trace(state)))
+            columns[f"outcome{outcome}_probability"] = probability
+            columns[f"outcome{outcome}_fidelity"] = self.fidelity(state) / probability if probability > 0 else 0.0
+        return columns
@@ -0,0 +1,116 @@
+import math
+from typing import Tuple
+
+
+class FidelityPredictor:
+    """
+    Closed form prediction of the fidelity of the pairs of the fixed circuits of the network (entangle_nodes and
+    protocol_a), from the parameters of the models of the channels. Every qubit of a pair crosses some channels (3
+    with the repeater: the two halves of the swapped pairs that reach the repeater and the half sent to the node,
+    2 without it), and each crossing loses the qubit with the probability of the loss model and applies the noise of
+    the T1/T2 model over the delay of the channel.
+
+    The noise of each crossing is approximated by its Pauli twirl (exact for the fidelity of a single crossing), so
+    the fidelity of a pair after n crossings is (1 + sum_k lambda_k^n) / 4, where lambda_k are the eigenvalues of the
+    Pauli transfer matrix of a crossing. The success probability is exact (the losses of the crossings are
+    independent), which makes the prediction usable as a control variate (see ControlVariate).
+
+
+    Predictor properties
+    --------------------
+    p_loss_init, p_loss_length (default 0):
+        The parameters of the loss model (see FibreError)
+
+    t1, t2 (default 0, no noise):
+        The parameters of the noise model [ns] (see T1T2Error)
+
+    c (default 200000):
+        The speed of the photons [km/s] (see DynamicFibreDelay)
+    """
+
+    def __init__(self, p_loss_init: float = 0.0, p_loss_length: float = 0.0, t1: float = 0.0, t2: float = 0.0,
+                 c: float = 200000):
+        """
+        Constructor for the FidelityPredictor class.
+
+        :param p_loss_init: Initial probability of losing a photon once it enters a channel (default 0)
+        :param p_loss_length: Photon survival probability per channel length [dB/km] (default 0)
+        :param t1: The T1 time of the noise model [ns] (default 0, no amplitude damping)
+        :param t2: The T2 time of the noise model [ns] (default 0, no dephasing)
+        :param c: The speed of the photons [km/s] (default 200000)
+        """
+        assert (0 <= p_loss_init <= 1 and p_loss_length >= 0 and t1 >= 0 and t2 >= 0 and c > 0)
+        self._p_loss_init = p_loss_init
+        self._p_loss_length = p_loss_length
+        self._t1 = t1
+        self._t2 = t2
+        self._c = c
+
+    @staticmethod
+    def from_models(loss_model=None, noise_model=None, delay_model=None) -> "FidelityPredictor":
+        """
+        Create the predictor from the models of a channel (e.g. the ones of FibreError, T1T2Error and
+        DynamicFibreDelay, or the ones built by a ModelsFactory), a missing model means no loss, noise or delay.
+
+        :param loss_model: The loss model, with p_loss_init and p_loss_length (default None)
+        :param noise_model: The noise model, with T1 and T2 (default None)
+        :param delay_model: The delay model, with c (default None)
+        :return: The predictor
+        """
+        return FidelityPredictor(getattr(loss_model, "p_loss_init", 0.0), getattr(loss_model, "p_loss_length", 0.0),
+                                 getattr(noise_model, "T1", 0.0), getattr(noise_model, "T2", 0.0),
+                                 getattr(delay_model, "c", 200000))
+
+    ###########
+    # METHODS #
+    ###########
+
+    def loss_probability(self, length: float) -> float:
+        """
+        Get the probability of losing a qubit in a channel.
+        :param length: The length of the channel [km]
+        :return: The probability
+        """
+        return 1 - (1 - self._p_loss_init) * math.pow(10, - length * self._p_loss_length / 10)
+
+    def noise_parameters(self, length: float) -> Tuple[float, float]:
+        """
+        Get the parameters of the noise of a channel, the same of CachedT1T2NoiseModel.
+        :param length: The length of the channel [km]
+        :return: tuple of the amplitude damping probability (gamma) and the dephasing probability
+        """
+        delay = length / self._c * 1e9
+        gamma = 1 - math.exp(-delay / self._t1) if self._t1 > 0 else 0.0
+        dephase_prob = 0.0
+        if self._t2 > 0:
+            rate = 1 / self._t2 - 1 / (2 * self._t1) if self._t1 > 0 else 1 / self._t2
+            dephase_prob = 0.5 * (1 - math.exp(-delay * rate))
+        return gamma, dephase_prob
+
+    def pauli_eigenvalues(self, length: float) -> Tuple[float, float, float]:
+        """
+        Get the eigenvalues of the Pauli transfer matrix of the (twirled) noise of a channel.
+        :param length: The length of the channel [km]
+        :return: tuple of the eigenvalues of X, Y and Z
+        """
+        gamma, dephase_prob = self.noise_parameters(length)
+        transverse = math.sqrt(1 - gamma) * (1 - 2 * dephase_prob)
+        return transverse, transverse, 1 - gamma
+
+    def pair_fidelity(self, length: float, crossings: int) -> float:
+        """
+        Get the predicted fidelity of a pair (that was not lost) with |00> + |11>.
+        :param length: The length of the channels [km]
+        :param crossings: The number of channels crossed by the qubits of the pair
+        :return: The fidelity
+        """
+        return (1 + sum(eigenvalue ** crossings for eigenvalue in self.pauli_eigenvalues(length))) / 4
+
+    def success_probability(self, length: float, crossings: int) -> float:
+        """
+        Get the probability that no qubit is lost.
+        :param length: The length of the channels [km]
+        :param crossings: The number of channels crossed by all the qubits of the trial
+        :return: The probability
+        """
+        return (1 - self.loss_probability(length)) ** crossings
@@ -0,0 +1,69 @@
+import math
+
+
+class LikelihoodRatio:
+    """
+    Likelihood ratio of the current trial under importance sampling: every biased random event (e.g. the loss of a
+    qubit sampled with a higher probability than the real one) multiplies it by p / q, where p is the real probability
+    of the sampled outcome and q the biased one. Weighting the results of the trial by it gives unbiased estimates.
+    The ratio is accumulated in log space, to avoid underflows with many events.
+    """
+
+    def __init__(self):
+        """
+        Constructor for the LikelihoodRatio class.
+        """
+        self._log_value: float = 0.0
+        self._events: int = 0
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def value(self) -> float:
+        """
+        :type: float, 1 if there were no biased events
+        """
+        return math.exp(self._log_value)
+
+    @property
+    def events(self) -> int:
+        """
+        :type: int, the number of biased events of the current trial
+        """
+        return self._events
+
+    ###########
+    # METHODS #
+    ###########
+
+    def reset(self):
+        """
+        Start a new trial.
+        """
+        self._log_value = 0.0
+        self._events = 0
+
+    def update(self, p: float, q: float):
+        """
+        Add a biased event.
+        :param p: The real probability of the sampled outcome
+        :param q: The (biased) probability the outcome was sampled with
+        :raises AssertionError: If q is not positive (an outcome with q = 0 cannot be sampled)
+        """
+        assert (q > 0)
+        self._events += 1
+        self._log_value += math.log(p / q) if p > 0 else -math.inf
+
+    @staticmethod
+    def biased_probability(p: float, bias: float, max_probability: float) -> float:
+        """
+        Get the biased probability of an event: the real one multiplied by the bias, limited to max_probability
+        (so that the opposite outcome can still be sampled), but never lower than the real one.
+        :param p: The real probability of the event
+        :param bias: The bias factor (1 for no bias)
+        :param max_probability: The maximum biased probability
+        :return: The biased probability
+        """
+        return max(p, min(max_probability, bias * p))
@@ -0,0 +1,434 @@
+import math
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from src.helper.statistics.ControlVariate import ControlVariate
+
+
+class StreamingStatistics:
+    """
+    Constant memory accumulator of a stream of values: count, mean and variance (Welford), confidence interval and
+    quantiles (from a fixed range histogram). Two accumulators (e.g. of different workers) can be merged.
+
+
+    Statistics properties
+    ---------------------
+    low, high (default 0, 1):
+        The range of the histogram used for the quantiles, values outside the range are clipped to it
+
+    bins (default 1000):
+        The number of bins of the histogram, the resolution of the quantiles is (high - low) / bins
+    """
+
+    def __init__(self, low: float = 0.0, high: float = 1.0, bins: int = 1000):
+        """
+        Constructor for the StreamingStatistics class.
+
+        :param low: The lower bound of the histogram (default 0)
+        :param high: The upper bound of the histogram (default 1)
+        :param bins: The number of bins of the histogram (default 1000)
+        """
+        assert (high > low and bins > 0)
+        self._low = low
+        self._high = high
+        self._bins = bins
+        self._n: int = 0
+        self._mean: float = 0.0
+        self._m2: float = 0.0  # sum of the squared differences from the mean
+        self._histogram: np.ndarray = np.zeros(bins, dtype=np.int64)
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def n(self) -> int:
+        """
+        :type: int
+        """
+        return self._n
+
+    @property
+    def mean(self) -> float:
+        """
+        :type: float, nan if there are no values
+        """
+        return self._mean if self._n > 0 else math.nan
+
+    @property
+    def variance(self) -> float:
+        """
+        :type: float, the unbiased sample variance, nan with less than 2 values
+        """
+        return self._m2 / (self._n - 1) if self._n > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        """
+        :type: float
+        """
+        return math.sqrt(self.variance)
+
+    @property
+    def sem(self) -> float:
+        """
+        :type: float, the standard error of the mean
+        """
+        return math.sqrt(self.variance / self._n) if self._n > 1 else math.nan
+
+    ###########
+    # METHODS #
+    ###########
+
+    def add(self, value: float):
+        """
+        Add a value to the statistics.
+        :param value: The value to add
+        """
+        self._n += 1
+        delta = value - self._mean
+        self._mean += delta / self._n
+        self._m2 += delta * (value - self._mean)
+        self._histogram[self._bin(value)] += 1
+
+    def merge(self, other: "StreamingStatistics") -> "StreamingStatistics":
+        """
+        Merge the statistics of another accumulator (with the same histogram) into this one.
+        :param other: The other accumulator
+        :raises AssertionError: If the histograms have different ranges or bins
+        :return: This accumulator
+        """
+        assert (self._low == other._low and self._high == other._high and self._bins == other._bins)
+        if other._n == 0:
+            return self
+        n = self._n + other._n
+        delta = other._mean - self._mean
+        self._mean += delta * other._n / n
+        self._m2 += other._m2 + delta ** 2 * self._n * other._n / n
+        self._n = n
+        self._histogram += other._histogram
+        return self
+
+    def confidence_interval(self, z: float = 1.96) -> tuple:
+        """
+        Get the normal approximation of the confidence interval of the mean.
+        :param z: The quantile of the standard normal distribution (default 1.96, 95% confidence)
+        :return: tuple of the lower and the upper bound
+        """
+        half_width = z * self.sem
+        return self.mean - half_width, self.mean + half_width
+
+    def quantile(self, q: float) -> float:
+        """
+        Get the (approximated) quantile of the values, as the center of the histogram bin that contains it.
+        :param q: The quantile, between 0 and 1
+        :return: The quantile, nan if there are no values
+        """
+        assert (0 <= q <= 1)
+        if self._n == 0:
+            return math.nan
+        # first bin where the cumulative count reaches q * n (at least 1, so that q=0 gives the minimum)
+        index = int(np.searchsorted(np.cumsum(self._histogram), max(q * self._n, 1)))
+        index = min(index, self._bins - 1)
+        return self._low + (index + 0.5) * (self._high - self._low) / self._bins
+
+    def columns(self, prefix: str, z: float = 1.96, quantiles: bool = True) -> Dict[str, float]:
+        """
+        Get the statistics as the columns of a csv file.
+        :param prefix: The prefix of the names of the columns
+        :param z: The quantile of the standard normal distribution for the confidence interval (default 1.96)
+        :param quantiles: If the quantiles are included, only when the values are within the range of the histogram
+        (default True)
+        :return: ordered dictionary of the column names to the values
+        """
+        ci_low, ci_high = self.confidence_interval(z)
+        columns = OrderedDict([(prefix, self.mean), (f"{prefix}_var", self.variance),
+                               (f"{prefix}_ci_low", ci_low), (f"{prefix}_ci_high", ci_high)])
+        if quantiles:
+            columns[f"{prefix}_p5"] = self.quantile(0.05)
+            columns[f"{prefix}_median"] = self.quantile(0.5)
+            columns[f"{prefix}_p95"] = self.quantile(0.95)
+        return columns
+
+    def _bin(self, value: float) -> int:
+        index = int((value - self._low) / (self._high - self._low) * self._bins)
+        return min(max(index, 0), self._bins - 1)
+
+
+class SweepPointStatistics:
+    """
+    Statistics of all the trials of a single point of a sweep (e.g. a channel length): the fidelity of all the pairs
+    (lost and timed out trials count as num_pairs pairs with fidelity 0, so that a loss weighs as much as in the
+    fidelity of the trials), the fidelity of each pair of the successful trials and the success/loss/timeout rate of
+    the trials (the timed out trials are also counted as lost).
+
+    With importance sampling, every trial has the weight of its likelihood ratio (see LikelihoodRatio), and the
+    unbiased estimates are the means of the weighted values of the trials: the fidelity of the trial (the mean of
+    its pairs, 0 if lost) and its failure (1 if lost, 0 otherwise). The plain statistics are biased in this case.
+
+    With stratified sampling of the outcomes of the Bell measurements, the fidelity of the pairs is accumulated for
+    each (forced) outcome, together with the probability of the outcome and their product, and the stratified
+    estimate of the fidelity is the sum over the outcomes of the mean of the products of the pairs of the outcome.
+
+    With a control variate, every trial comes with a control (e.g. the analytic prediction of its fidelity, see
+    FidelityPredictor) whose expected value is known, and the variance-reduced estimate of the fidelity of the trials
+    (the mean of their pairs, 0 if lost) is reported alongside the plain mean (see ControlVariate).
+
+    Two accumulators (e.g. of different workers) can be merged.
+    """
+
+    def __init__(self, num_pairs: int = 1, importance_sampling: bool = False, stratified: bool = False,
+                 expected_control: float = None):
+        """
+        Constructor for the SweepPointStatistics class.
+
+        :param num_pairs: The number of pairs of each trial (2 for protocol_a, 1 for entangle_nodes) (default 1)
+        :param importance_sampling: If the trials are weighted by their likelihood ratio (default False)
+        :param stratified: If the outcomes of the Bell measurements are stratified (default False)
+        :param expected_control: The expected value of the control of the trials, None without control variate
+        (default None)
+        """
+        assert (num_pairs > 0)
+        self._num_pairs = num_pairs
+        self._importance_sampling = importance_sampling
+        # the likelihood ratios have no upper bound, so the quantiles of the weighted values are not reported
+        self._weighted_fidelity = StreamingStatistics()
+        self._weighted_failure = StreamingStatistics()
+        self._weights_sum: float = 0.0
+        self._weights_squares_sum: float = 0.0
+        self._stratified = stratified
+        # fidelity of the pairs and probability of the outcome, for each outcome of the Bell measurement
+        self._outcomes_fidelity: List[StreamingStatistics] = [StreamingStatistics() for _ in range(4)]
+        self._outcomes_probability: List[StreamingStatistics] = [StreamingStatistics() for _ in range(4)]
+        # product of the probability of the outcome and of the fidelity of each pair, for each outcome
+        self._outcomes_product: List[StreamingStatistics] = [StreamingStatistics() for _ in range(4)]
+        self._control_variate = ControlVariate(expected_control) if expected_control is not None else None
+        self._trials: int = 0
+        self._lost: int = 0
+        self._timeouts: int = 0
+        self._fidelity = StreamingStatistics()
+        self._pairs: List[StreamingStatistics] = [StreamingStatistics() for _ in range(num_pairs)]
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def trials(self) -> int:
+        """
+        :type: int
+        """
+        return self._trials
+
+    @property
+    def lost(self) -> int:
+        """
+        :type: int
+        """
+        return self._lost
+
+    @property
+    def timeouts(self) -> int:
+        """
+        :type: int
+        """
+        return self._timeouts
+
+    @property
+    def fidelity(self) -> StreamingStatistics:
+        """
+        :type: StreamingStatistics
+        """
+        return self._fidelity
+
+    @property
+    def pairs(self) -> List[StreamingStatistics]:
+        """
+        :type: List[StreamingStatistics]
+        """
+        return self._pairs
+
+    @property
+    def weighted_fidelity(self) -> StreamingStatistics:
+        """
+        :type: StreamingStatistics, of the weighted fidelity of the trials (importance sampling only)
+        """
+        return self._weighted_fidelity
+
+    @property
+    def weighted_failure(self) -> StreamingStatistics:
+        """
+        :type: StreamingStatistics, of the weighted failure of the trials (importance sampling only)
+        """
+        return self._weighted_failure
+
+    @property
+    def outcomes_fidelity(self) -> List[StreamingStatistics]:
+        """
+        :type: List[StreamingStatistics], of the fidelity of the pairs of each outcome (stratified sampling only)
+        """
+        return self._outcomes_fidelity
+
+    @property
+    def control_variate(self) -> ControlVariate:
+        """
+        :type: ControlVariate, of the fidelity of the trials (None without control variate)
+        """
+        return self._control_variate
+
+    @property
+    def stratified_fidelity(self) -> tuple:
+        """
+        :type: tuple of the stratified estimate of the fidelity of the trials (lost trials count as 0) and its
+        standard error, nan if an outcome was not sampled (its stratum would drop out and bias the estimate)
+        """
+        if any(product.n == 0 for product in self._outcomes_product):
+            return math.nan, math.nan
+        # E[F] = sum_k E[p_k F_k]: the estimate and its variance come from the same products of each stratum
+        estimate = sum(product.mean for product in self._outcomes_product)
+        variance = sum(product.variance / product.n for product in self._outcomes_product if product.n > 1)
+        return self.success_rate * estimate, self.success_rate * math.sqrt(variance)
+
+    @property
+    def effective_sample_size(self) -> float:
+        """
+        :type: float, the effective number of trials given their weights, nan if there are no trials
+        """
+        return self._weights_sum ** 2 / self._weights_squares_sum if self._weights_squares_sum > 0 else math.nan
+
+    @property
+    def success_rate(self) -> float:
+        """
+        :type: float, nan if there are no trials
+        """
+        return (self._trials - self._lost) / self._trials if self._trials > 0 else math.nan
+
+    @property
+    def loss_rate(self) -> float:
+        """
+        :type: float, nan if there are no trials
+        """
+        return self._lost / self._trials if self._trials > 0 else math.nan
+
+    @property
+    def timeout_rate(self) -> float:
+        """
+        :type: float, nan if there are no trials
+        """
+        return self._timeouts / self._trials if self._trials > 0 else math.nan
+
+    ###########
+    # METHODS #
+    ###########
+
+    def add_trial(self, results, weight: float = 1.0, control: float = None):
+        """
+        Add the results of a trial.
+        :param results: The list of the results of the pairs (see PairResult), or the dictionary returned by the
+        methods of the network when the qubits were lost or the trial timed out
+        :param weight: The likelihood ratio of the trial, with importance sampling (default 1)
+        :param control: The control of the trial, with a control variate (default None)
+        """
+        self._trials += 1
+        lost = isinstance(results, dict)
+        if self._control_variate is not None:
+            assert (control is not None)
+            self._control_variate.add(self.trial_fidelity(results), control)
+        if self._importance_sampling:
+            self._weighted_fidelity.add(weight * self.trial_fidelity(results))
+            self._weighted_failure.add(weight * lost)
+            self._weights_sum += weight
+            self._weights_squares_sum += weight ** 2
+        if lost:
+            if "timeout" in results:
+                self._timeouts += 1
+            self.add_lost()
+            return
+        for pair in results:
+            self._fidelity.add(pair.fidelity)
+            if 0 <= pair.pair_id < self._num_pairs:
+                self._pairs[pair.pair_id].add(pair.fidelity)
+            if self._stratified and 0 <= pair.bell_state < 4 and not math.isnan(pair.outcome_probability):
+                self._outcomes_fidelity[pair.bell_state].add(pair.fidelity)
+                self._outcomes_probability[pair.bell_state].add(pair.outcome_probability)
+                self._outcomes_product[pair.bell_state].add(pair.outcome_probability * pair.fidelity)
+
+    @staticmethod
+    def trial_fidelity(results) -> float:
+        """
+        Get the fidelity of a trial, the mean fidelity of its pairs.
+        :param results: The list of the results of the pairs, or the dictionary of a lost (or timed out) trial
+        :return: The fidelity of the trial, 0 if it was lost
+        """
+        if isinstance(results, dict) or len(results) == 0:
+            return 0.0
+        return sum(pair.fidelity for pair in results) / len(results)
+
+    def add_lost(self):
+        """
+        Add a lost trial, that counts as num_pairs pairs with fidelity 0 (without incrementing the trials).
+        """
+        self._lost += 1
+        for _ in range(self._num_pairs):
+            self._fidelity.add(0.0)
+
+    def merge(self, other: "SweepPointStatistics") -> "SweepPointStatistics":
+        """
+        Merge the statistics of another accumulator (with the same number of pairs) into this one.
+        :param other: The other accumulator
+        :return: This accumulator
+        """
+        assert (self._num_pairs == other._num_pairs and self._importance_sampling == other._importance_sampling
+                and self._stratified == other._stratified
+                and (self._control_variate is None) == (other._control_variate is None))
+        self._trials += other._trials
+        self._lost += other._lost
+        self._timeouts += other._timeouts
+        self._fidelity.merge(other._fidelity)
+        for pair, other_pair in zip(self._pairs, other._pairs):
+            pair.merge(other_pair)
+        self._weighted_fidelity.merge(other._weighted_fidelity)
+        self._weighted_failure.merge(other._weighted_failure)
+        self._weights_sum += other._weights_sum
+        self._weights_squares_sum += other._weights_squares_sum
+        for k in range(4):
+            self._outcomes_fidelity[k].merge(other._outcomes_fidelity[k])
+            self._outcomes_probability[k].merge(other._outcomes_probability[k])
+            self._outcomes_product[k].merge(other._outcomes_product[k])
+        if self._control_variate is not None:
+            self._control_variate.merge(other._control_variate)
+        return self
+
+    def columns(self, z: float = 1.96) -> Dict[str, float]:
+        """
+        Get the statistics as the columns of a csv file.
+        :param z: The quantile of the standard normal distribution for the confidence intervals (default 1.96)
+        :return: ordered dictionary of the column names to the values
+        """
+        columns = self._fidelity.columns("fidelity", z)
+        columns["trials"] = self._trials
+        columns["success_rate"] = self.success_rate
+        columns["loss_rate"] = self.loss_rate
+        columns["timeout_rate"] = self.timeout_rate
+        if self._num_pairs > 1:
+            for pair_id, pair in enumerate(self._pairs):
+                columns.update(pair.columns(f"pair{pair_id}_fidelity", z))
+        if self._importance_sampling:
+            columns.update(self._weighted_fidelity.columns("is_fidelity", z, quantiles=False))
+            columns.update(self._weighted_failure.columns("is_failure", z, quantiles=False))
+            columns["is_effective_trials"] = self.effective_sample_size
+        if self._stratified:
+            estimate, sem = self.stratified_fidelity
+            columns["st_fidelity"] = estimate
+            columns["st_fidelity_ci_low"] = estimate - z * sem
+            columns["st_fidelity_ci_high"] = estimate + z * sem
+            for k in range(4):
+                columns[f"outcome{k}_trials"] = self._outcomes_fidelity[k].n
+                columns[f"outcome{k}_probability"] = self._outcomes_probability[k].mean
+                columns[f"outcome{k}_fidelity"] = self._outcomes_fidelity[k].mean
+        if self._control_variate is not None:
+            columns["cv_trial_fidelity"] = self._control_variate.mean
+            columns.update(self._control_variate.columns("cv_fidelity", z))
+        return columns
@@ -5,12 +5,11 @@ from src.helper.main.converter.converter import converter_exit, converter_string
     converter_string_int
 from src.helper.main.main import run_method_with_nodes, checker, show_help, select_models, select_method
 from src.helper.main.ResetRestart import check_reset_restart
-from src.network.StarNetwork import StarNetwork
-from src.helper.main.Experiment import Experiment
+from src.models.ModelsFactory import ModelsFactory
 
 
 def main(models_name: str, method_name: str, nodes: list = [], debug: bool = False, experiment_num: int = 0,
-         reset_restart: bool = False):
+         reset_restart: bool = False, star_network=None):
     """
     Main function to run the simulation.
     :param models_name: str
@@ -19,17 +18,30 @@ def main(models_name: str, method_name: str, nodes: list = [], debug: bool = Fal
     :param debug: bool (default False)
     :param experiment_num: int (default 0)
     :param reset_restart: bool (default False)
+    :param star_network: StarNetwork to clean and reuse, if it has the same models, otherwise a new one is built
+    (default None)
+    :return: the results of the single experiment, None when the experiment suite is run
     """
+    # NetSquid (and the network) is imported only here, so that parsing the arguments and the help stay fast
+    from src.network.StarNetwork import StarNetwork
+
     # Initialize Network and run experiment
     models: dict = select_models(models_name)
-    star_network: StarNetwork = StarNetwork(models)
+    if star_network is not None and star_network.models == models:
+        star_network.clear_memories()
+    else:
+        star_network = StarNetwork(models)
     # Select the method to be used in the network
     method = select_method(star_network, method_name, len(nodes))
     # Run single experiment
     # ---------------------
+    results = None
     if experiment_num == 0:
-        _ = run_method_with_nodes(method, nodes, debug)
+        results = run_method_with_nodes(method, nodes, debug)
     else:
+        # the experiment wrapper loads the dataframe and plotting libraries, only import it when needed
+        from src.helper.main.Experiment import Experiment
+
         underscore = "_"
         run_name = (method_name + underscore + models_name + underscore + str(nodes)
                     + underscore + str(debug) + underscore + str(experiment_num))
@@ -38,8 +50,40 @@ def main(models_name: str, method_name: str, nodes: list = [], debug: bool = Fal
         experiment.fig_path = f"../out/fidelity-over-length[{run_name}].png"
         experiment.num_each_simulation = experiment_num  # set the number of measurements for each run of the simulation
         experiment.run(method, nodes, debug)
-    # reset restart simulation
-    _ = check_reset_restart(reset_restart)
+    # reset restart simulation (in the same process, reusing the network)
+    _ = check_reset_restart(reset_restart, debug, args=(models_name, method_name, nodes, debug, experiment_num),
+                            star_network=star_network)
+    return results
+
+
+def default_args() -> tuple:
+    """
+    Get the default values of the command line arguments.
+    :return: tuple of models_name, method_name, nodes, debug, experiment_num
+    """
+    models_name_default: str = "empty"  # "combined"
+    method_name_default: str = "protocol_a"  # "entangle_nodes"
+    nodes_default: list = [1, 2, 4]  # [1,4]
+    debug_default: bool = True  # False
+    experiment_num_default: int = 0  # 100
+    return models_name_default, method_name_default, nodes_default, debug_default, experiment_num_default
+
+
+def show_args(models_name: str, method_name: str, nodes: list, debug: bool, experiment_num: int):
+    """
+    Print all the parsed arguments.
+    :param models_name: str
+    :param method_name: str
+    :param nodes: list
+    :param debug: bool
+    :param experiment_num: int
+    """
+    print("Parsed arguments:")
+    print(f"models_name: {models_name}")
+    print(f"method_name: {method_name}")
+    print(f"nodes: {nodes}")
+    print(f"debug: {debug}")
+    print(f"experiment_num: {experiment_num}")
 
 
 def handle_args() -> tuple:
@@ -51,17 +95,12 @@ def handle_args() -> tuple:
         help_msg = show_help()
         error_exit(help_msg)
     # make the following variables the default values
-    # global models_name, method_name, nodes, debug, experiment_num
-    models_name_input: str = "empty"  # "combined"
-    method_name_input: str = "protocol_a"  # "entangle_nodes"
-    nodes_input: list[int] = [1, 2, 4]  # [1,4]
-    debug_input: bool = True  # False
-    experiment_num_input: int = 0  # 100
+    models_name_input, method_name_input, nodes_input, debug_input, experiment_num_input = default_args()
     for i in range(1, len(sys.argv)):
         if i == 1:
             models_name_input = sys.argv[i]
-            # check that models_name is either "combined" or "empty"
-            checker(models_name_input not in ["combined", "empty"],
+            # check that models_name is either "combined" or "empty" (optionally followed by the parameters)
+            checker(not ModelsFactory.is_valid(models_name_input),
                     "Invalid models_name, please provide 'combined' or 'empty'")
         elif i == 2:
             method_name_input = sys.argv[i]
@@ -91,18 +130,60 @@ def handle_args() -> tuple:
     return models_name_input, method_name_input, nodes_input, debug_input, experiment_num_input
 
 
+def handle_batch_args() -> bool:
+    """
+    Handle the command line arguments of the batch mode (main.py batch manifest [processes] [summary_path]).
+    :return: True if the batch mode was selected (and all the runs are over), False otherwise
+    """
+    if len(sys.argv) < 2 or sys.argv[1] != "batch":
+        return False
+    from src.helper.main.Batch import batch
+
+    checker(len(sys.argv) < 3, "Invalid batch, please provide the path of the manifest")
+    processes = 1
+    if len(sys.argv) > 3:
+        processes = converter_exit(converter_string_int, sys.argv[3], "Invalid processes, please provide an integer")
+        checker(processes <= 0, "Invalid processes, please provide a positive integer")
+    if len(sys.argv) > 4:
+        batch(sys.argv[2], processes, sys.argv[4])
+    else:
+        batch(sys.argv[2], processes)
+    return True
+
+
+def handle_server_args() -> bool:
+    """
+    Handle the command line arguments of the server mode (main.py server [address] [queue_size]).
+    :return: True if the server mode was selected (and the server has been stopped), False otherwise
+    """
+    if len(sys.argv) < 2 or sys.argv[1] != "server":
+        return False
+    from src.helper.main.SimulationServer import SimulationServer
+
+    address = sys.argv[2] if len(sys.argv) > 2 else "127.0.0.1:5005"
+    queue_size = 16
+    if len(sys.argv) > 3:
+        queue_size = converter_exit(converter_string_int, sys.argv[3],
+                                    "Invalid queue_size, please provide an integer")
+        checker(queue_size <= 0, "Invalid queue_size, please provide a positive integer")
+    SimulationServer(address, queue_size=queue_size).serve_forever()
+    return True
+
+
 if __name__ == "__main__":
+    # run as a long-lived simulation server, instead of a single simulation/experiment
+    if handle_server_args():
+        sys.exit(0)
+    # run all the entries of a manifest in this process (or in a pool of processes)
+    if handle_batch_args():
+        sys.exit(0)
+
     # handle the command line arguments
     models_name_main, method_name_main, nodes_main, debug_main, experiment_num_main = handle_args()
 
     # print all the parsed arguments
     if debug_main:
-        print("Parsed arguments:")
-        print(f"models_name: {models_name_main}")
-        print(f"method_name: {method_name_main}")
-        print(f"nodes: {nodes_main}")
-        print(f"debug: {debug_main}")
-        print(f"experiment_num: {experiment_num_main}")
+        show_args(models_name_main, method_name_main, nodes_main, debug_main, experiment_num_main)
 
     # run the main function
     main(models_name_main, method_name_main, nodes_main, debug_main, experiment_num_main)
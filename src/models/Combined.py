@@ -16,9 +16,15 @@ class Combined:
 
     2. Connect the models to the network (in specific to the QuantumChannel).
         models = Combined.models
+
+    The same model instances are shared by all the channels of all the networks, use ModelsFactory to build new
+    models (with custom parameters and random number generators) for every channel.
+
+    The noise model is the cached version of the T1T2 noise model (see CachedT1T2NoiseModel), which applies the same
+    noise.
     """
     models: dict = dict(
         quantum_loss_model=FibreError.loss_model,
-        quantum_noise_model=T1T2Error.noise_model,
+        quantum_noise_model=T1T2Error.cached_noise_model,
         quantum_delay_model=DynamicFibreDelay.fibre_delay_model
     )
@@ -0,0 +1,211 @@
+from typing import Dict, List, TYPE_CHECKING
+
+from src.helper.error.error import error_exit
+from src.helper.main.converter.converter import converter_string_models
+from src.helper.statistics.LikelihoodRatio import LikelihoodRatio
+
+if TYPE_CHECKING:
+    # numpy (like NetSquid) is imported only when the models are built, so that parsing the arguments stays fast
+    from numpy.random import RandomState
+
+
+class ModelsFactory:
+    """
+    Factory of the models of the quantum channels. Unlike the class-level models (e.g. Combined.models), every call
+    of `get` builds new model instances, so that the parameters can change for every network (or run, or worker) and
+    every channel has its own random number generator.
+
+
+    Instructions
+    ------------
+    1. Select the models by name and (optional) parameters
+        factory = ModelsFactory("combined", t1=1e-5, seed=7)
+        factory = ModelsFactory.from_string("combined:t1=1e-5,seed=7")
+
+    2. Give it to the network, every channel gets its own models
+        star_network = StarNetwork(factory)
+
+
+    Models names
+    ------------
+    combined:
+        The loss (FibreError), noise (T1T2Error) and delay (DynamicFibreDelay) models
+
+    empty:
+        No models
+
+
+    Model parameters (default: the ones of the single models)
+    ----------------
+    p_loss_init, p_loss_length:
+        The parameters of the loss model (see FibreError)
+
+    t1, t2:
+        The parameters of the noise model [ns] (see T1T2Error)
+
+    c:
+        The speed of the photons of the delay model [km/s] (see DynamicFibreDelay)
+
+    cached (default True):
+        If the noise parameters are cached for each delay (see CachedT1T2NoiseModel)
+
+    seed (default None):
+        The seed of the random number generator of the factory, the loss model of each channel gets a generator seeded
+        by it. If None (and no rng is given) the loss models use the random state of NetSquid.
+
+    bias (default 1):
+        If greater than 1, the models are built for importance sampling: the probabilities of the losses and of the
+        phase flips are multiplied by the bias (see BiasedFibreLossModel and BiasedT1T2NoiseModel), and the likelihood
+        ratio of each trial is accumulated in likelihood_ratio (shared by all the models built by this factory)
+    """
+    names: List[str] = ["combined", "empty"]
+    parameters_names: List[str] = ["p_loss_init", "p_loss_length", "t1", "t2", "c", "cached", "seed", "bias"]
+
+    def __init__(self, name: str = "combined", rng: "RandomState" = None, **parameters):
+        """
+        Constructor for the ModelsFactory class.
+
+        :param name: The name of the models, one of names (default "combined")
+        :param rng: The random number generator of the factory (default None, see the seed parameter)
+        :param parameters: The parameters of the models, see parameters_names
+        """
+        if name not in self.names:
+            error_exit(f"Invalid models name, please provide one of the following: {self.names}")
+        invalid = [key for key in parameters if key not in self.parameters_names]
+        if len(invalid) > 0:
+            error_exit(f"Invalid models parameters {invalid}, please provide some of the following: "
+                       f"{self.parameters_names}")
+        self._name = name
+        self._parameters = parameters
+        if rng is None and parameters.get("seed") is not None:
+            from numpy.random import RandomState
+            rng = RandomState(parameters["seed"])
+        self._rng = rng
+        self._likelihood_ratio = LikelihoodRatio()
+        if parameters.get("bias", 1) < 1:
+            error_exit("Invalid models parameters, the bias must be greater than or equal to 1")
+
+    @staticmethod
+    def from_string(models_name: str, rng: "RandomState" = None) -> "ModelsFactory":
+        """
+        Create the factory from the name of the models followed by the optional parameters,
+        e.g. 'combined' or 'combined:t1=1e-5,seed=7'.
+
+        :param models_name: The name and the parameters of the models
+        :param rng: The random number generator of the factory (default None)
+        :return: The factory of the models
+        """
+        output, error = converter_string_models(models_name)
+        if error:
+            error_exit("Invalid models parameters, please provide them as 'name:key=value,key=value'")
+        name, parameters = output
+        return ModelsFactory(name, rng, **parameters)
+
+    @staticmethod
+    def is_valid(models_name: str) -> bool:
+        """
+        Check (without exiting) if the name and the parameters of the models are valid.
+
+        :param models_name: The name and the parameters of the models, e.g. 'combined:t1=1e-5'
+        :return: True if they are valid
+        """
+        if not isinstance(models_name, str):
+            return False
+        output, error = converter_string_models(models_name)
+        if error:
+            return False
+        name, parameters = output
+        return name in ModelsFactory.names and all(key in ModelsFactory.parameters_names for key in parameters)
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def name(self) -> str:
+        """
+        :type: str
+        """
+        return self._name
+
+    @property
+    def parameters(self) -> dict:
+        """
+        :type: dict
+        """
+        return dict(self._parameters)
+
+    @property
+    def importance_sampling(self) -> bool:
+        """
+        :type: bool, if the models are biased (bias greater than 1)
+        """
+        return self._name != "empty" and self._parameters.get("bias", 1) > 1
+
+    @property
+    def likelihood_ratio(self) -> LikelihoodRatio:
+        """
+        :type: LikelihoodRatio, of the current trial (always 1 if the models are not biased)
+        """
+        return self._likelihood_ratio
+
+    @property
+    def model_keys(self) -> List[str]:
+        """
+        :type: List[str], the keys of the models given to the channels
+        """
+        if self._name == "empty":
+            return []
+        return ["quantum_loss_model", "quantum_noise_model", "quantum_delay_model"]
+
+    ###########
+    # METHODS #
+    ###########
+
+    def get(self) -> Dict[str, object]:
+        """
+        Build new instances of the models (e.g. for a new channel).
+
+        :return: dict of the models, with the keys of model_keys
+        """
+        if self._name == "empty":
+            return dict()
+        # the models (and NetSquid) are imported only when they are built
+        from netsquid.components import FibreDelayModel, FibreLossModel, T1T2NoiseModel
+        from numpy.random import RandomState
+        from src.models.single.BiasedFibreLossModel import BiasedFibreLossModel
+        from src.models.single.BiasedT1T2NoiseModel import BiasedT1T2NoiseModel
+        from src.models.single.CachedT1T2NoiseModel import CachedT1T2NoiseModel
+        from src.models.single.DynamicFibreDelay import DynamicFibreDelay
+        from src.models.single.FibreError import FibreError
+        from src.models.single.T1T2Error import T1T2Error
+
+        parameters = self._parameters
+        # every loss model has its own generator, derived from the one of the factory
+        rng = RandomState(self._rng.randint(2 ** 31)) if self._rng is not None else FibreError._rng
+        t1 = parameters.get("t1", T1T2Error._t1)
+        t2 = parameters.get("t2", T1T2Error._t2)
+        p_loss_init = parameters.get("p_loss_init", FibreError._p_loss_init)
+        p_loss_length = parameters.get("p_loss_length", FibreError._p_loss_length)
+        if self.importance_sampling:
+            bias = parameters["bias"]
+            loss_model = BiasedFibreLossModel(p_loss_init, p_loss_length, rng, bias, self._likelihood_ratio)
+            noise_model = BiasedT1T2NoiseModel(t1, t2, bias, self._likelihood_ratio)
+        else:
+            loss_model = FibreLossModel(p_loss_init, p_loss_length, rng)
+            noise_model = CachedT1T2NoiseModel(t1, t2) if parameters.get("cached", True) else T1T2NoiseModel(t1, t2)
+        return dict(
+            quantum_loss_model=loss_model,
+            quantum_noise_model=noise_model,
+            quantum_delay_model=FibreDelayModel(parameters.get("c", DynamicFibreDelay._c))
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ModelsFactory):
+            return self._name == other._name and self._parameters == other._parameters
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        if len(self._parameters) == 0:
+            return self._name
+        return self._name + ":" + ",".join(f"{key}={value}" for key, value in self._parameters.items())
@@ -0,0 +1,72 @@
+import numpy as np
+from netsquid.components import FibreLossModel
+from netsquid.util.simtools import get_random_state
+
+from src.helper.statistics.LikelihoodRatio import LikelihoodRatio
+
+
+class BiasedFibreLossModel(FibreLossModel):
+    """
+    FibreLossModel for importance sampling: each qubit is lost with a biased probability (the real one multiplied by
+    the bias), and the likelihood ratio of the sampled outcome is added to the given LikelihoodRatio, so that the
+    rare losses (e.g. with short channels) are sampled more often while the weighted estimates stay unbiased.
+
+
+    Model parameters
+    ----------------
+    p_loss_init, p_loss_length, rng:
+        The parameters of the FibreLossModel (see FibreError)
+
+    bias:
+        The factor of the probability of losing a qubit (1 for no bias)
+
+    likelihood_ratio:
+        The LikelihoodRatio of the trial, shared by all the biased models of the network
+
+    max_probability (default 0.9):
+        The maximum biased probability of losing a qubit
+    """
+
+    def __init__(self, p_loss_init: float, p_loss_length: float, rng: np.random.RandomState, bias: float,
+                 likelihood_ratio: LikelihoodRatio, max_probability: float = 0.9, **kwargs):
+        """
+        Constructor for the BiasedFibreLossModel class.
+
+        :param p_loss_init: Initial probability of losing a photon once it enters a channel
+        :param p_loss_length: Photon survival probability per channel length [dB/km]
+        :param rng: Random number generator, if None the random state of NetSquid is used
+        :param bias: The factor of the probability of losing a qubit
+        :param likelihood_ratio: The LikelihoodRatio of the trial
+        :param max_probability: The maximum biased probability of losing a qubit (default 0.9)
+        """
+        super().__init__(p_loss_init=p_loss_init, p_loss_length=p_loss_length, rng=rng, **kwargs)
+        assert (bias >= 1 and 0 < max_probability < 1)
+        self._bias = bias
+        self._likelihood_ratio = likelihood_ratio
+        self._max_probability = max_probability
+
+    def loss_probability(self, length: float) -> float:
+        """
+        Get the real probability of losing a qubit in a channel.
+        :param length: The length of the channel [km]
+        :return: The probability of losing the qubit
+        """
+        return 1 - (1 - self.p_loss_init) * np.power(10, - length * self.p_loss_length / 10)
+
+    def error_operation(self, qubits, delta_time=0, **kwargs):
+        """
+        Lose the qubits with the biased probability, and update the likelihood ratio.
+        :param qubits: The qubits sent through the channel (None for the lost ones)
+        :param delta_time: The time the qubits spend in the channel [ns]
+        """
+        p = self.loss_probability(kwargs["length"])
+        q = LikelihoodRatio.biased_probability(p, self._bias, self._max_probability)
+        rng = self.rng if self.rng is not None else get_random_state()
+        for index, qubit in enumerate(qubits):
+            if qubit is None:
+                continue
+            if rng.random_sample() < q:
+                self.lose_qubit(qubits, index, prob_loss=1, rng=rng)
+                self._likelihood_ratio.update(p, q)
+            else:
+                self._likelihood_ratio.update(1 - p, 1 - q)
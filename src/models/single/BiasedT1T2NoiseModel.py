@@ -0,0 +1,64 @@
+from netsquid import Z
+from netsquid.qubits import qubitapi as qapi
+from netsquid.util.simtools import get_random_state
+
+from src.helper.statistics.LikelihoodRatio import LikelihoodRatio
+from src.models.single.CachedT1T2NoiseModel import CachedT1T2NoiseModel
+
+
+class BiasedT1T2NoiseModel(CachedT1T2NoiseModel):
+    """
+    CachedT1T2NoiseModel for importance sampling: the dephasing is sampled as a phase flip (Z) with a biased
+    probability (the real one multiplied by the bias), and the likelihood ratio of the sampled outcome is added to the
+    given LikelihoodRatio. The amplitude damping is applied as in the T1T2NoiseModel (not biased), since its outcome
+    depends on the state of the qubit.
+
+
+    Model parameters
+    ----------------
+    t1, t2:
+        The parameters of the T1T2NoiseModel (see T1T2Error)
+
+    bias:
+        The factor of the probability of the phase flip (1 for no bias)
+
+    likelihood_ratio:
+        The LikelihoodRatio of the trial, shared by all the biased models of the network
+    """
+
+    def __init__(self, t1: float, t2: float, bias: float, likelihood_ratio: LikelihoodRatio, **kwargs):
+        """
+        Constructor for the BiasedT1T2NoiseModel class.
+
+        :param t1: T1 time [ns]
+        :param t2: T2 time [ns]
+        :param bias: The factor of the probability of the phase flip
+        :param likelihood_ratio: The LikelihoodRatio of the trial
+        """
+        super().__init__(t1, t2, **kwargs)
+        assert (bias >= 1)
+        self._bias = bias
+        self._likelihood_ratio = likelihood_ratio
+
+    def error_operation(self, qubits, delta_time=0, **kwargs):
+        """
+        Apply the amplitude damping and the biased phase flip to the qubits, and update the likelihood ratio.
+        :param qubits: The qubits to apply the noise to (None for the lost ones)
+        :param delta_time: The time the qubits spend in the channel (or memory) [ns]
+        """
+        gamma, p = self.noise_parameters(delta_time)
+        # the probability of a phase flip of the dephasing channel is at most 1/2
+        q = LikelihoodRatio.biased_probability(p, self._bias, 0.5)
+        rng = get_random_state()
+        for qubit in qubits:
+            if qubit is None:
+                continue
+            if gamma > 0:
+                qapi.amplitude_dampen(qubit, gamma=gamma, prob=1)
+            if q == 0:
+                continue
+            if rng.random_sample() < q:
+                qapi.operate(qubit, Z)
+                self._likelihood_ratio.update(p, q)
+            else:
+                self._likelihood_ratio.update(1 - p, 1 - q)
@@ -0,0 +1,126 @@
+import math
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+from netsquid.components import T1T2NoiseModel
+from netsquid.qubits import qubitapi as qapi
+from netsquid.qubits.operators import Operator
+
+
+class CachedT1T2NoiseModel(T1T2NoiseModel):
+    """
+    T1T2NoiseModel that computes the amplitude damping and dephasing parameters, and the operators (Kraus) of the
+    combined channel, only once for each (t1, t2, delay), instead of once for every qubit, and keeps them in a bounded
+    LRU cache. Every qubit gets the cached operators in a single operation. In the sweeps the delay of all the
+    channels is the same at every length, so almost every qubit hits the cache.
+
+
+    Model parameters
+    ----------------
+    t1:
+        T1 time, dictating amplitude damping component.
+
+    t2:
+        T2 time, dictating dephasing component.
+
+    max_size (default 128):
+        The maximum number of delays kept in the cache
+    """
+
+    def __init__(self, t1: float = 0, t2: float = 0, max_size: int = 128, **kwargs):
+        """
+        Constructor for the CachedT1T2NoiseModel class.
+
+        :param t1: T1 time [ns]
+        :param t2: T2 time [ns]
+        :param max_size: The maximum number of delays kept in the cache (default 128)
+        """
+        super().__init__(T1=t1, T2=t2, **kwargs)
+        assert (max_size > 0)
+        self._max_size = max_size
+        self._cache: OrderedDict = OrderedDict()
+        self._hits: int = 0
+        self._misses: int = 0
+
+    def noise_parameters(self, delta_time: float) -> Tuple[float, float]:
+        """
+        Get the (cached) parameters of the noise applied over the given time.
+        :param delta_time: The time the qubit spends in the channel (or memory) [ns]
+        :return: tuple of the amplitude damping probability (gamma) and the dephasing probability
+        """
+        return self._lookup(delta_time)[0]
+
+    def kraus_operators(self, delta_time: float) -> List[np.ndarray]:
+        """
+        Get the (cached) Kraus operators of the combined amplitude damping and dephasing channel.
+        :param delta_time: The time the qubit spends in the channel (or memory) [ns]
+        :return: The list of the 2x2 Kraus operators
+        """
+        return self._lookup(delta_time)[1]
+
+    def error_operation(self, qubits, delta_time=0, **kwargs):
+        """
+        Apply the cached operators of the amplitude damping and dephasing to the qubits.
+        :param qubits: The qubits to apply the noise to (None for the lost ones)
+        :param delta_time: The time the qubits spend in the channel (or memory) [ns]
+        """
+        operators = self._lookup(delta_time)[2]
+        if operators is None:
+            return
+        for qubit in qubits:
+            if qubit is not None:
+                qapi.multi_operate(qubit, operators)
+
+    def cache_info(self) -> Dict[str, float]:
+        """
+        Get the statistics of the cache.
+        :return: dict of the hits, misses, size and hit rate of the cache
+        """
+        lookups = self._hits + self._misses
+        return {"hits": self._hits, "misses": self._misses, "size": len(self._cache),
+                "hit_rate": self._hits / lookups if lookups > 0 else math.nan}
+
+    def cache_clear(self):
+        """
+        Empty the cache and reset its statistics.
+        """
+        self._cache.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def _lookup(self, delta_time: float) -> tuple:
+        key = (self.T1, self.T2, delta_time)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._hits += 1
+            self._cache.move_to_end(key)
+            return entry
+        self._misses += 1
+        parameters = self._compute_parameters(delta_time)
+        kraus = self._compute_kraus_operators(*parameters)
+        # without noise the channel is the identity, no operation is needed
+        operators = None
+        if parameters != (0.0, 0.0):
+            operators = [Operator(f"T1T2_K{index}", k) for index, k in enumerate(kraus) if np.any(k)]
+        entry = (parameters, kraus, operators)
+        self._cache[key] = entry
+        if len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)  # remove the least recently used
+        return entry
+
+    def _compute_parameters(self, delta_time: float) -> Tuple[float, float]:
+        # same parameters of T1T2NoiseModel: amplitude damping with T1, and the remaining pure dephasing of T2
+        gamma = 1 - math.exp(-delta_time / self.T1) if self.T1 > 0 else 0.0
+        dephase_prob = 0.0
+        if self.T2 > 0:
+            rate = 1 / self.T2 - 1 / (2 * self.T1) if self.T1 > 0 else 1 / self.T2
+            dephase_prob = 0.5 * (1 - math.exp(-delta_time * rate))
+        return gamma, dephase_prob
+
+    @staticmethod
+    def _compute_kraus_operators(gamma: float, dephase_prob: float) -> List[np.ndarray]:
+        damping = [np.array([[1, 0], [0, math.sqrt(1 - gamma)]]), np.array([[0, math.sqrt(gamma)], [0, 0]])]
+        dephasing = [math.sqrt(1 - dephase_prob) * np.eye(2), math.sqrt(dephase_prob) * np.diag([1, -1])]
+        # the dephasing is applied after the amplitude damping
+        return [d @ a for d in dephasing for a in damping]
@@ -1,5 +1,7 @@
 from netsquid.components import T1T2NoiseModel
 
+from src.models.single.CachedT1T2NoiseModel import CachedT1T2NoiseModel
+
 
 class T1T2Error:
     """
@@ -49,3 +51,5 @@ class T1T2Error:
     _t2: float = (95 / (100 + _constant)) * 10 ** -6
 
     noise_model: T1T2NoiseModel = T1T2NoiseModel(_t1, _t2)
+    # same noise, with the parameters cached for each channel delay
+    cached_noise_model: CachedT1T2NoiseModel = CachedT1T2NoiseModel(_t1, _t2)
@@ -0,0 +1,112 @@
+import pickle
+import time
+from typing import Union
+
+from src.models.ModelsFactory import ModelsFactory
+from src.network.StarNetwork import StarNetwork
+
+
+class NetworkTemplate:
+    """
+    Build a StarNetwork once and restore fresh, independent copies of it, faster than building them from scratch
+    (e.g. the warm network of every worker of a batch, see Batch.run_batch, or of a restarted job).
+
+    The template is serialized with pickle (see StarNetwork.__getstate__): the snapshot can be sent to the new
+    processes and restored there. If the network can not be pickled (e.g. with a NetSquid build whose components do
+    not support it), clone builds a new network, and the workers forked from the process of the template inherit
+    its network anyway. The copies start with the random states of the models of the template, seed them (see
+    ModelsFactory) if the copies must not repeat the same trials.
+
+
+    Template properties
+    -------------------
+    models (default None):
+        The models of the channels of the network (see StarNetwork)
+
+    channels_n (default 2):
+        The number of multiplexed channels of the network (see StarNetwork)
+
+    build_time:
+        The wall-clock time spent building the network of the template [s]
+    """
+
+    def __init__(self, models: Union[dict, ModelsFactory] = None, channels_n: int = 2):
+        """
+        Constructor for the NetworkTemplate class, builds the network of the template.
+
+        :param models: The models of the channels, or the ModelsFactory that builds them (default None, no models)
+        :param channels_n: The number of multiplexed channels (default 2)
+        """
+        self._models = models
+        self._channels_n = channels_n
+        start = time.perf_counter()
+        self._network: StarNetwork = StarNetwork(models, channels_n=channels_n)
+        self._network.build()
+        self._build_time: float = time.perf_counter() - start
+        self._snapshot: bytes = None
+        self._picklable: bool = None
+
+    ###########
+    # GETTERS #
+    ###########
+
+    @property
+    def network(self) -> StarNetwork:
+        """
+        :type: StarNetwork, the network of the template (not a copy)
+        """
+        return self._network
+
+    @property
+    def build_time(self) -> float:
+        """
+        :type: float
+        """
+        return self._build_time
+
+    @property
+    def picklable(self) -> bool:
+        """
+        :type: bool, if the network can be pickled (see snapshot)
+        """
+        if self._picklable is None:
+            try:
+                self.snapshot()
+            except (pickle.PicklingError, TypeError, AttributeError):
+                self._picklable = False
+        return self._picklable
+
+    ###########
+    # METHODS #
+    ###########
+
+    def snapshot(self) -> bytes:
+        """
+        Serialize the network of the template, only the first time.
+        :raises PicklingError: If the network can not be pickled (or TypeError, AttributeError)
+        :return: The snapshot of the network
+        """
+        if self._snapshot is None:
+            self._network.clear_memories()
+            self._snapshot = pickle.dumps(self._network, pickle.HIGHEST_PROTOCOL)
+            self._picklable = True
+        return self._snapshot
+
+    @staticmethod
+    def restore(snapshot: bytes) -> StarNetwork:
+        """
+        Restore a network from a snapshot (e.g. in a new process).
+        :param snapshot: The snapshot of the network (see snapshot)
+        :return: The restored network, independent of the template
+        """
+        return pickle.loads(snapshot)
+
+    def clone(self) -> StarNetwork:
+        """
+        Get a fresh copy of the network of the template: restored from the snapshot, or built again if the network
+        can not be pickled.
+        :return: The new network, independent of the template
+        """
+        if self.picklable:
+            return self.restore(self._snapshot)
+        return StarNetwork(self._models, channels_n=self._channels_n)
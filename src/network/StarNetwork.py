@@ -1,18 +1,28 @@
-from netsquid import sim_run, sim_time
+import threading
+
+from netsquid import sim_reset, sim_run, sim_stop, sim_time
+from numpy.random import RandomState
 from netsquid.components import QuantumChannel
-from netsquid.components.qmemory import MemPositionEmptyError, Qubit
+from netsquid.components.qmemory import MemPositionEmptyError
 from netsquid.nodes import Network, node
 from typing import List, Dict, Union, Tuple
 
 from src.helper.error.error import error_exit
+from src.helper.network.EventTracer import EventTracer
+from src.helper.network.MemoryRecorder import MemoryRecorder
 from src.helper.network.MemorySnapshot import MemorySnapshot
 from src.helper.network.PortPair import PortPair
 from src.helper.network.Factory.QuantumChannel import QuantumChannelFactory
 from src.helper.network.Factory.QuantumProcessor import QuantumProcessorFactory
 from src.helper.network.Factory.QuantumSource import QuantumSourceFactory
-from src.helper.network.entanglement_swapping import apply_gates, \
-    perform_and_get_bell_measurement_w_state, get_results_qubits
+from src.helper.network.entanglement_swapping import get_results_qubits
+from src.helper.network.entanglement_swapping_utils.bell_measurement import print_bell_measurement
+from src.helper.network.entanglement_swapping_utils.results import PairResult
+from src.helper.network.entanglement_swapping_utils.swap_programs import BellMeasurementProgram, \
+    CORRECTION_INSTRUCTIONS, CorrectionProgram
+from src.models.ModelsFactory import ModelsFactory
 from src.protocols.GenerateEntanglement import GenerateEntanglement
+from src.protocols.HarvestEntanglement import HarvestEntanglement
 
 
 class StarNetwork:
@@ -50,16 +60,16 @@ class StarNetwork:
 
     R:
         - Quantum Processor
-        - Quantum Memory (2x memory positions)
+        - Quantum Memory (2x memory positions for each channel)
 
     Ni:
         - Quantum Processor
         - Quantum Memory (1x memory position)
 
     RNi:
-        - Quantum Source (generates |00> + |11>)
+        - Quantum Source (generates |00> + |11>, one for each channel)
         - Quantum Processor
-        - Quantum Memory (1x memory position)
+        - Quantum Memory (1x memory position for each channel)
 
 
     Channels
@@ -70,6 +80,14 @@ class StarNetwork:
     QC5:
         - Unidirectional Quantum Channel (S <- RN)
 
+    The source, the Repeater and the Remote Node have channels_n multiplexed channels (QC4 and QC5 are repeated for
+    each channel, and S has a Quantum Source for each channel), so that channels_n pairs can be generated and swapped
+    in parallel (see multiplexed_entangle_nodes).
+
+    The components are built on their first use (e.g. entangle_nodes 1,4 builds only Node 1, the first quantum source
+    of S, the Repeater and the Remote Node with their first channels), see build to build them in advance. The network
+    property builds all of them.
+
 
     Network properties
     ------------------
@@ -82,44 +100,123 @@ class StarNetwork:
     channels_length (default: 10):
         The length of the quantum channels in km
 
+    channels_n (default: 2):
+        The number of multiplexed channels of the Repeater and of the Remote Node
+
     node_mem_positions (default: 1):
         The memory positions of the node's quantum memories
 
-    repeater_mem_positions (default: 2):
-        The memory positions of the repeater's quantum memory
+    repeater_mem_positions (default: 4):
+        The memory positions of the repeater's quantum memory (2 for each channel)
+
+    keep_qubits (default: False):
+        If the results of the methods retain the qubits (which keep their quantum states alive)
+
+    memory_recorder (default: None):
+        The MemoryRecorder that records the memories at the stages of the methods (see PROTOCOL_STAGES)
+
+    event_tracer (default: None):
+        The EventTracer that traces the events of the protocols, of the engine and of the entanglement swapping
+
+    sim_time_horizon (default: 0):
+        If not 0, the maximum simulation time [ns] of each run of the simulation of a trial
+
+    wall_time_limit (default: 0):
+        If not 0, the maximum wall-clock time [s] of each run of the simulation of a trial (checked by a watchdog)
+
+    stratified_bell_outcomes (default: False):
+        If the outcomes of the Bell measurements are forced in fixed proportions (stratified sampling): in every
+        block of 4 trials (4^2 for protocol_a) each outcome (combination) is forced once, and the results record the
+        probability of the forced outcome. Requires the density matrix formalism (ns.QFormalism.DM).
+
+    repeat_until_success (default: False):
+        If the sources repeat the generation until their qubits are not lost (heralded generation): the failed
+        attempts are skipped in a single step (see GenerateEntanglement), each one lasting the delay of the source and
+        the round trip of the channels, and only the successful attempt is simulated, with the loss models of the
+        channels disabled. The trials are never lost, and their sim_time is the latency until the success.
+
+    pauli_frame (default: False):
+        If the corrections of the Bell measurements are not applied to the qubits of the Remote Node, but recorded
+        on the results as Pauli frames (see PairResult): the fidelity is computed against the Bell state of the frame,
+        which gives the same fidelity of the corrected pair (the corrections are Pauli gates) without executing them.
+
+
+    Continuous generation
+    ---------------------
+    harvest_entangle_nodes runs the sources clocked (instead of triggering them once for every trial), and harvests
+    the pairs of every cycle during a single run of the simulation.
     """
     _channels_length: float = 1
+    _harvest_margin: float = 1  # time waited after the arrival of the qubits of a cycle, in harvest mode [ns]
 
-    def __init__(self, models: dict = None, lengths: float = _channels_length):
+    def __init__(self, models: Union[dict, ModelsFactory] = None, lengths: float = _channels_length,
+                 channels_n: int = 2):
         """
         Constructor for the StarNetwork class.
+
+        :param models: The dictionary of models of the quantum channels (shared by all the channels), or the
+        ModelsFactory that builds new models for every channel (default None, no models)
+        :param lengths: The length of the quantum channels in km (default 1)
+        :param channels_n: The number of multiplexed channels of the Repeater and of the Remote Node (default 2)
+        :raises AssertionError: If channels_n is smaller than 1
         """
+        assert (channels_n >= 1)
         self._models: dict
         self._destinations_n: int = 5
         self._source_delay: float = 1e5
         # self._channels_length: float = 1
+        self._channels_n: int = channels_n
         self._node_mem_positions: int = 1
-        self._repeater_mem_positions: int = 4
-        self._source_num_ports: int = 4
-        self._remote_source_num_ports: int = 4
-        self._remote_node_mem_positions: int = 2
+        self._repeater_mem_positions: int = 2 * channels_n  # 2 memories per channel for the repeater
+        self._source_num_ports: int = 2 * channels_n
+        self._remote_source_num_ports: int = 2 * channels_n
+        self._remote_node_mem_positions: int = channels_n
+        self._keep_qubits: bool = False
+        self._memory_recorder: MemoryRecorder = None
+        self._event_tracer: EventTracer = None
+        self._sim_time_horizon: float = 0
+        self._wall_time_limit: float = 0
+        self._stratified_bell_outcomes: bool = False
+        self._repeat_until_success: bool = False
+        self._pauli_frame: bool = False
+        self._attempts: int = 0
+        self._protocols: list = []  # protocols of the last trial, stopped by reset_trial
+        self._stratum: int = 0  # index of the trial in the stratified sampling
+        self._bell_probabilities: List[float] = []
+        # programs of the Repeater and of the RemoteNode, by number of swapped nodes
+        self._swap_programs: Dict[int, Tuple[BellMeasurementProgram, CorrectionProgram]] = {}
 
         # Network object and network components
         self._network: Network = Network("StarNetwork")
 
         self._source: node = None
-        self._destinations: [node] = []
+        self._sources: List[str] = []  # names of the quantum sources of the source node built so far
+        self._destinations: Dict[int, node] = {}  # destination nodes built so far, by number
 
-        self._quantum_channels: [QuantumChannel] = []
-        self._quantum_channels_port_pairs: [PortPair] = []
+        self._quantum_channels: [QuantumChannel] = []  # quantum channels built so far, in the order of their index
+        self._channels: Dict[int, QuantumChannel] = {}  # quantum channels built so far, by index
+        self._quantum_channels_port_pairs: Dict[int, PortPair] = {}
+        self._remote_links: List[int] = []  # channels of the remote node connected to the repeater so far
 
         self._models = models
         self._channels_length = lengths
 
+        # the other components are built on their first use (see build)
         self._init_source()
-        self._init_destinations()
-        self._init_quantum_channels()
-        self._connect_remote_node()
+
+    def __getstate__(self) -> dict:
+        """
+        Get the state of the network to pickle it (see NetworkTemplate): the memory recorder, the event tracer and the
+        cached swap programs are not kept, the copy starts without them.
+
+        :return: The dictionary of the attributes of the network
+        """
+        state = self.__dict__.copy()
+        state["_memory_recorder"] = None
+        state["_event_tracer"] = None
+        state["_swap_programs"] = {}
+        state["_protocols"] = []
+        return state
 
     ###########
     # GETTERS #
@@ -128,8 +225,9 @@ class StarNetwork:
     @property
     def network(self) -> Network:
         """
-        :type: Network
+        :type: Network, with all its components (see build)
         """
+        self.build()
         return self._network
 
     @property
@@ -154,12 +252,34 @@ class StarNetwork:
         return self._channels_length
 
     @property
-    def models(self) -> dict:
+    def models(self) -> Union[dict, ModelsFactory]:
         """
-        :type: dict
+        :type: dict or ModelsFactory
         """
         return self._models
 
+    @property
+    def channel_models(self) -> List[Dict[str, object]]:
+        """
+        :type: List[Dict[str, object]], the models of each quantum channel already built, by key (see swap_models)
+        """
+        keys = self._models_keys(self._models)
+        return [{key: channel.models[key] for key in keys} for channel in self._quantum_channels]
+
+    @property
+    def quantum_channels(self) -> List[QuantumChannel]:
+        """
+        :type: List[QuantumChannel]
+        """
+        return self._quantum_channels
+
+    @property
+    def channels_n(self) -> int:
+        """
+        :type: int
+        """
+        return self._channels_n
+
     @property
     def repeater_mem_positions(self) -> int:
         """
@@ -181,8 +301,70 @@ class StarNetwork:
         """
         return self._remote_node_mem_positions
 
-    ###########
+    @property
+    def keep_qubits(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._keep_qubits
+
+    @property
+    def memory_recorder(self) -> MemoryRecorder:
+        """
+        :type: MemoryRecorder
+        """
+        return self._memory_recorder
+
+    @property
+    def event_tracer(self) -> EventTracer:
+        """
+        :type: EventTracer
+        """
+        return self._event_tracer
+
+    @property
+    def sim_time_horizon(self) -> float:
+        """
+        :type: float
+        """
+        return self._sim_time_horizon
+
+    @property
+    def wall_time_limit(self) -> float:
+        """
+        :type: float
+        """
+        return self._wall_time_limit
 
+    @property
+    def stratified_bell_outcomes(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._stratified_bell_outcomes
+
+    @property
+    def repeat_until_success(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._repeat_until_success
+
+    @property
+    def pauli_frame(self) -> bool:
+        """
+        :type: bool
+        """
+        return self._pauli_frame
+
+    @property
+    def attempts(self) -> int:
+        """
+        :type: int, the number of attempts of all the sources of the last trial (with repeat_until_success)
+        """
+        return self._attempts
+
+    ###########
     # SETTERS #
     ###########
 
@@ -218,16 +400,88 @@ class StarNetwork:
         """
         assert (n > 0)
 
+        self._change_lengths(n / 1000)
         self._channels_length = n / 1000
-        self._change_lengths(self._channels_length)
 
     @models.setter
-    def models(self, models_dict: dict):
+    def models(self, models_dict: Union[dict, ModelsFactory]):
         """
-        Set the dictionary of the models for the quantum channels.
-        :param models_dict: The dictionary of models
+        Set the models for the quantum channels, and replace the models of the channels already connected.
+        :param models_dict: The dictionary of models, or the factory that builds new models for every channel
         """
+        old_keys = self._models_keys(self._models)
         self._models = models_dict
+        for channel in self._quantum_channels:
+            self._set_channel_models(channel, QuantumChannelFactory.get_models(models_dict) or {}, old_keys)
+
+    @keep_qubits.setter
+    def keep_qubits(self, keep: bool):
+        """
+        Set if the results of the methods retain the qubits.
+        :param keep: True to retain the qubits in the results
+        """
+        self._keep_qubits = keep
+
+    @memory_recorder.setter
+    def memory_recorder(self, recorder: MemoryRecorder):
+        """
+        Set the recorder of the memories, None to disable it.
+        :param recorder: The MemoryRecorder of this network
+        """
+        self._memory_recorder = recorder
+
+    @event_tracer.setter
+    def event_tracer(self, tracer: EventTracer):
+        """
+        Set the tracer of the events, None to disable it.
+        :param tracer: The EventTracer of this network
+        """
+        self._event_tracer = tracer
+
+    @sim_time_horizon.setter
+    def sim_time_horizon(self, ns: float):
+        """
+        Set the maximum simulation time of each run of the simulation, 0 to disable it.
+        :param ns: The amount of nanoseconds
+        :raises AssertionError: If ns is smaller than 0
+        """
+        assert (ns >= 0)
+        self._sim_time_horizon = ns
+
+    @stratified_bell_outcomes.setter
+    def stratified_bell_outcomes(self, stratified: bool):
+        """
+        Set if the outcomes of the Bell measurements are forced in fixed proportions, and restart from the first one.
+        :param stratified: True to force the outcomes
+        """
+        self._stratified_bell_outcomes = stratified
+        self._stratum = 0
+
+    @repeat_until_success.setter
+    def repeat_until_success(self, repeat: bool):
+        """
+        Set if the sources repeat the generation until success.
+        :param repeat: True to repeat the generation until success
+        """
+        self._repeat_until_success = repeat
+
+    @pauli_frame.setter
+    def pauli_frame(self, frame: bool):
+        """
+        Set if the corrections of the Bell measurements are tracked as Pauli frames, instead of applied.
+        :param frame: True to track the corrections as Pauli frames
+        """
+        self._pauli_frame = frame
+
+    @wall_time_limit.setter
+    def wall_time_limit(self, seconds: float):
+        """
+        Set the maximum wall-clock time of each run of the simulation, 0 to disable it.
+        :param seconds: The amount of seconds
+        :raises AssertionError: If seconds is smaller than 0
+        """
+        assert (seconds >= 0)
+        self._wall_time_limit = seconds
 
     #############################################
     # PRIVATE HELPERS USED TO BUILD THE NETWORK #
@@ -235,108 +489,111 @@ class StarNetwork:
 
     def _init_source(self):
         """
-        Initialize the source node of the network.
+        Initialize the source node of the network, its quantum sources are built on their first use (see _get_source).
         """
-        quantum_source_factory = QuantumSourceFactory(self._source_delay, self._source_num_ports / 2)
-
         self._source = self._network.add_node("Source")
-        self._source.add_subcomponent(
-            quantum_source_factory.get("QuantumSource")
-        )
-        self._source.add_subcomponent(
-            quantum_source_factory.get("QuantumSource1")
-        )
 
-    def _init_destinations(self):
+    def _get_source(self, channel_n: int = 0):
+        """
+        Get the quantum source of the source node of a channel, build it if needed.
+
+        :param channel_n: The index of the channel (default 0)
+        :return: The quantum source component
         """
-        Initialize the destination nodes of the network.
+        name = self.select_source(channel_n)
+        if name not in self._sources:
+            quantum_source_factory = QuantumSourceFactory(self._source_delay, self._source_num_ports / 2)
+            self._source.add_subcomponent(quantum_source_factory.get(name))
+            self._sources.append(name)
+        return self._source.subcomponents[name]
+
+    def _get_destination(self, n: int) -> node:
         """
-        quantum_source_factory = QuantumSourceFactory(self._source_delay, self._remote_source_num_ports / 2)
+        Get a destination node, build it (with its quantum processor) if needed.
+
+        :param n: The number of the node, from 1 to destinations_n (the Remote Node)
+        :return: The node
+        """
+        destination = self._destinations.get(n)
+        if destination is not None:
+            return destination
         quantum_processor_factory = QuantumProcessorFactory()
+        if n == self._destinations_n - 1:
+            # Initialization of the repeater
+            destination = self._network.add_node("Repeater")
+            destination.add_subcomponent(quantum_processor_factory.get("QP_Repeater", self._repeater_mem_positions))
+        elif n == self._destinations_n:
+            # Initialize the remote node, its sources are built with its links (see _connect_remote_link)
+            destination = self._network.add_node("RemoteNode")
+            destination.add_subcomponent(
+                quantum_processor_factory.get("QP_RemoteNode", self._remote_node_mem_positions)
+            )
+        else:
+            # Initialize normal nodes
+            destination = self._network.add_node(f"Node{n}")
+            destination.add_subcomponent(quantum_processor_factory.get(f"QP_Node{n}", self._node_mem_positions))
+        self._destinations[n] = destination
+        return destination
 
-        for destination_n in range(1, self._destinations_n + 1):
-            if destination_n == self._destinations_n - 1:
-                # Initialization of the repeater
-                self._destinations.append(self._network.add_node("Repeater"))
-                self._destinations[destination_n - 1].add_subcomponent(
-                    quantum_processor_factory.get("QP_Repeater", self._repeater_mem_positions)
-                )
-            elif destination_n == self._destinations_n:
-                # Initialize the remote node
-                self._destinations.append(self._network.add_node("RemoteNode"))
-                self._destinations[destination_n - 1].add_subcomponent(
-                    quantum_processor_factory.get("QP_RemoteNode", self._remote_node_mem_positions)
-                )
-                self._destinations[destination_n - 1].add_subcomponent(
-                    quantum_source_factory.get("RemoteQuantumSource")
-                )
-                self._destinations[destination_n - 1].add_subcomponent(
-                    quantum_source_factory.get("RemoteQuantumSource1")
-                )
-            else:
-                # Initialize normal nodes
-                self._destinations.append(self._network.add_node(f"Node{destination_n}"))
-                self._destinations[destination_n - 1].add_subcomponent(
-                    quantum_processor_factory.get(f"QP_Node{destination_n}", self._node_mem_positions)
-                )
-
-    def _init_quantum_channels(self, length: float = _channels_length):
-        """
-        Initialize the quantum channels of the network.
-        """
-        self._quantum_channels.clear()
-        quantum_channel_factory = QuantumChannelFactory(length, self._models)
-        repeater = self._network.subcomponents["Repeater"]
-
-        for (index, destination) in enumerate(self._destinations):
-            if index == self._destinations_n - 2:
-                # Initialize quantum channel for the repeater
-                name = "C_Source->Repeater"
-                channel: QuantumChannel = quantum_channel_factory.get(name)
-                self._quantum_channels.append(channel)
-
-                port_source, port_repeater = self.network.add_connection(self._source, destination,
-                                                                         channel_to=channel,
-                                                                         label=name)
-                self._quantum_channels_port_pairs.append(PortPair(port_source, port_repeater, name))
-                # second quantum channel for the repeater
-                name1 = "C_Source1->Repeater"
-                channel1: QuantumChannel = quantum_channel_factory.get(name1)
-                self._quantum_channels.append(channel1)
-
-                port_source1, port_repeater1 = self.network.add_connection(self._source, destination,
-                                                                           channel_to=channel1,
-                                                                           label=name1)
-                self._quantum_channels_port_pairs.append(PortPair(port_source1, port_repeater1, name1))
-            elif index == self._destinations_n - 1:
-                # Initialize quantum channel for the remote node
-                name = "C_RemoteNode->Repeater"
-                channel: QuantumChannel = quantum_channel_factory.get(name)
-                self._quantum_channels.append(channel)
-
-                port_remote, port_repeater = self.network.add_connection(destination, repeater,
-                                                                         channel_to=channel,
-                                                                         label=name)
-                self._quantum_channels_port_pairs.append(PortPair(port_remote, port_repeater, name))
-                # second quantum channel for the remote node
-                name1 = "C_RemoteNode1->Repeater"
-                channel1: QuantumChannel = quantum_channel_factory.get(name1)
-                self._quantum_channels.append(channel1)
-
-                port_remote1, port_repeater1 = self.network.add_connection(destination, repeater, channel_to=channel1,
-                                                                           label=name1)
-                self._quantum_channels_port_pairs.append(PortPair(port_remote1, port_repeater1, name1))
-            else:
-                # Initialize quantum channels for normal nodes
-                mid_name = "C_Source->Node"
-                channel: QuantumChannel = quantum_channel_factory.get(mid_name + str(index))
-                self._quantum_channels.append(channel)
-                pair_name = mid_name + str(index + 1)
-                port_source, port_destination = self.network.add_connection(self._source, destination,
-                                                                            channel_to=channel,
-                                                                            label=pair_name)
-                self._quantum_channels_port_pairs.append(
-                    PortPair(port_source, port_destination, pair_name))
+    def _get_channel(self, index: int) -> QuantumChannel:
+        """
+        Get a quantum channel (see _channel_index and _remote_channel_index), build it and connect its nodes if
+        needed.
+
+        :param index: The index of the quantum channel
+        :return: The quantum channel
+        """
+        channel = self._channels.get(index)
+        if channel is not None:
+            return channel
+        quantum_channel_factory = QuantumChannelFactory(self._channels_length, self._models)
+        normal_nodes_n = self._destinations_n - 2
+        repeater = self._get_destination(self._destinations_n - 1)
+
+        if index < normal_nodes_n:
+            # Initialize quantum channels for normal nodes
+            mid_name = "C_Source->Node"
+            channel = quantum_channel_factory.get(mid_name + str(index))
+            name = mid_name + str(index + 1)
+            source, destination = self._source, self._get_destination(index + 1)
+        elif index < normal_nodes_n + self._channels_n:
+            # Initialize a quantum channel of the repeater
+            channel_n = index - normal_nodes_n
+            name = f"C_Source{'' if channel_n == 0 else channel_n}->Repeater"
+            channel = quantum_channel_factory.get(name)
+            source, destination = self._source, repeater
+        else:
+            # Initialize a quantum channel of the remote node
+            channel_n = index - normal_nodes_n - self._channels_n
+            name = f"C_RemoteNode{'' if channel_n == 0 else channel_n}->Repeater"
+            channel = quantum_channel_factory.get(name)
+            source, destination = self._get_destination(self._destinations_n), repeater
+
+        port_source, port_destination = self._network.add_connection(source, destination, channel_to=channel,
+                                                                     label=name)
+        self._quantum_channels_port_pairs[index] = PortPair(port_source, port_destination, name)
+        self._channels[index] = channel
+        self._quantum_channels = [self._channels[channel_index] for channel_index in sorted(self._channels)]
+        return channel
+
+    def build(self, nodes: List[int] = None):
+        """
+        Build the components used by the given nodes, instead of on their first use: the nodes with their channels
+        and the quantum sources of the source, and for the Repeater all its channels and the links of the Remote Node.
+
+        :param nodes: The numbers of the nodes, from 1 to destinations_n - 1 (default None, all the nodes)
+        :raises AssertionError: If the number of a node is not in the range [1, self._destinations_n - 1]
+        """
+        repeater_n = self._destinations_n - 1
+        if nodes is None:
+            nodes = range(1, repeater_n + 1)
+        for n in nodes:
+            assert (1 <= n <= repeater_n)
+            for channel_n in range(self._channels_n if n == repeater_n else 1):
+                self._get_channel(self._channel_index(n, channel_n))
+                self._get_source(channel_n)
+                if n == repeater_n:
+                    self._connect_remote_link(channel_n)
 
     ###################################################################
     # PRIVATE METHODS TO CONNECT AND DISCONNECT DESTINATION NODE PORT #
@@ -382,11 +639,8 @@ class StarNetwork:
         :param channel_n: The index of the quantum channel
         :return: The index of the output port for the node
         """
-        if n == self._destinations_n - 1:  # remote node
-            if channel_n == 0:
-                port_n_out = 0
-            else:
-                port_n_out = 2
+        if n == self._destinations_n - 1:  # repeater, the even memory positions receive the qubits of the source
+            port_n_out = 2 * channel_n
         elif n == self._destinations_n - 2:  # repeater
             port_n_out = 1
         else:
@@ -404,11 +658,16 @@ class StarNetwork:
         """
         assert (1 <= n <= self._destinations_n - 1)
 
+        # build the components of the link on its first use
+        self._get_channel(self._channel_index(n, channel_n))
+        if n == self._destinations_n - 1:
+            self._connect_remote_link(channel_n)
+
         source: node = self._source
-        destination: node = self._destinations[n - 1]
-        port_pair: PortPair = self._quantum_channels_port_pairs[n - 1]
+        destination: node = self._get_destination(n)
+        port_pair: PortPair = self._quantum_channels_port_pairs[self._channel_index(n, channel_n)]
         component_name = self.select_source(channel_n)
-        source_ports: dict = source.subcomponents[component_name].ports
+        source_ports: dict = self._get_source(channel_n).ports
 
         # Check if both the ports are already connected to a node
         if len(source_ports["qout0"].forwarded_ports) != 0 and len(source_ports["qout1"].forwarded_ports) != 0:
@@ -433,65 +692,194 @@ class StarNetwork:
         """
         assert (1 <= n <= self._destinations_n - 1)
 
-        ports: dict = self._source.subcomponents["QuantumSource"].ports
-        q0: dict = ports["qout0"].forwarded_ports
-        q1: dict = ports["qout1"].forwarded_ports
-
-        ports1: dict = self._source.subcomponents["QuantumSource1"].ports
-        q01: dict = ports1["qout0"].forwarded_ports
-        q11: dict = ports1["qout1"].forwarded_ports
+        # the ports of the source node connected to the built channels of the node n (one for each channel of the
+        # repeater)
+        channels_n = self._channels_n if n == self._destinations_n - 1 else 1
+        port_pairs = [self._quantum_channels_port_pairs.get(self._channel_index(n, channel_n))
+                      for channel_n in range(channels_n)]
+        node_ports = [port_pair.source for port_pair in port_pairs if port_pair is not None]
 
         # Look for the node n and disconnect it. If not found, raises an exception
-        if len(q0) != 0 and (q0["output"].name == f"conn|{n}|C_Source->Node{n}"
-                             or q0["output"].name == f"conn|{n}|C_Source->Repeater"):
-            ports["qout0"].disconnect()
-        elif len(q1) != 0 and (q1["output"].name == f"conn|{n}|C_Source->Node{n}"
-                               or q1["output"].name == f"conn|{n}|C_Source->Repeater"):
-            ports["qout1"].disconnect()
-        elif len(q01) != 0 and (q01["output"].name == f"conn|{n}|C_Source->Node{n}"
-                                or q01["output"].name == f"conn|{n}|C_Source->Repeater"):
-            ports1["qout0"].disconnect()
-        elif len(q11) != 0 and (q11["output"].name == f"conn|{n}|C_Source->Node{n}"
-                                or q11["output"].name == f"conn|{n}|C_Source->Repeater"):
-            ports1["qout1"].disconnect()
-        else:
-            error_exit(f"The source node is not connected to Node {n}")
+        for source_name in self._sources:
+            ports: dict = self._source.subcomponents[source_name].ports
+            for port_name in ["qout0", "qout1"]:
+                forwarded: dict = ports[port_name].forwarded_ports
+                if len(forwarded) != 0 and forwarded["output"].name in node_ports:
+                    ports[port_name].disconnect()
+                    return
+        error_exit(f"The source node is not connected to Node {n}")
 
     def _connect_remote_node(self):
         """
-        Connect the remote node ports to the quantum repeater.
+        Connect the remote node ports to the quantum repeater, for all the channels.
+        """
+        for channel_n in range(self._channels_n):
+            self._connect_remote_link(channel_n)
+
+    def _connect_remote_link(self, channel_n: int = 0):
+        """
+        Connect a channel of the remote node to the quantum repeater, only the first time: the remote source of the
+        channel keeps a qubit in the remote node, and sends the other to an odd memory position of the repeater.
+
+        :param channel_n: The index of the channel (default 0)
+        """
+        if channel_n in self._remote_links:
+            return
+        self._get_channel(self._remote_channel_index(channel_n))
+        repeater: node = self._get_destination(self._destinations_n - 1)
+        remote_node: node = self._get_destination(self._destinations_n)
+        port_pair: PortPair = self._quantum_channels_port_pairs[self._remote_channel_index(channel_n)]
+
+        quantum_source_factory = QuantumSourceFactory(self._source_delay, self._remote_source_num_ports / 2)
+        remote_source = quantum_source_factory.get("Remote" + self.select_source(channel_n))
+        remote_node.add_subcomponent(remote_source)
+
+        remote_source.ports["qout0"].forward_output(remote_node.ports[port_pair.source])
+        remote_source.ports["qout1"].connect(remote_node.qmemory.ports[f"qin{channel_n}"])
+
+        repeater.ports[port_pair.destination].forward_input(repeater.qmemory.ports[f"qin{2 * channel_n + 1}"])
+        self._remote_links.append(channel_n)
+
+    def _channel_index(self, n: int, channel_n: int = 0) -> int:
+        """
+        Get the index of the quantum channel (and of its port pair) from the source to a node.
+
+        :param n: The number of the node
+        :param channel_n: The index of the channel, for the repeater (default 0)
+        :return: The index of the quantum channel
+        """
+        if n == self._destinations_n - 1:
+            return n - 1 + channel_n
+        return n - 1
+
+    def _remote_channel_index(self, channel_n: int = 0) -> int:
+        """
+        Get the index of the quantum channel (and of its port pair) from the remote node to the repeater.
+
+        :param channel_n: The index of the channel (default 0)
+        :return: The index of the quantum channel
+        """
+        return self._destinations_n - 2 + self._channels_n + channel_n
+
+    def reset_trial(self, debug: bool = False) -> int:
+        """
+        Return the simulator to a clean state after a trial: stop the protocols of the trial, reset the clock and the
+        queue of the engine (so the simulation time of every trial starts from 0), and discard the qubits left in all
+        the memory positions. The shared list of the input ports of the protocols is trimmed too (see
+        GenerateEntanglement.trim_input_ports).
+
+        :param debug: If True, check the clean state with a checksum (see _state_checksum) (default is False)
+        :raises SystemExit: If the state is not clean, in debug mode
+        :return: The checksum of the state, 0 if it is clean (always 0 without debug)
+        """
+        for protocol in self._protocols:
+            protocol.stop()
+        stopped, self._protocols = self._protocols, []
+        GenerateEntanglement.trim_input_ports()
+        sim_reset()
+        self.clear_memories()
+        if not debug:
+            return 0
+        checksum = self._state_checksum(stopped)
+        if checksum != 0:
+            error_exit(f"The network is not clean after the reset of the trial (checksum {checksum})")
+        return checksum
+
+    def _state_checksum(self, protocols: list = []) -> int:
+        """
+        Get a cheap checksum of the state of the simulator, the number of the leftovers of a trial: the qubits in the
+        memories, the running protocols, the ports of the quantum sources still connected, and the simulation time
+        (1 if it is not 0).
+
+        :param protocols: The protocols to check (default [])
+        :return: The checksum, 0 if the state is clean
+        """
+        qubits = sum(len(destination.qmemory.used_positions) for destination in self._destinations.values())
+        running = sum(1 for protocol in protocols if protocol.is_running)
+        ports = [self._source.subcomponents[name].ports[port_name] for name in self._sources
+                 for port_name in ["qout0", "qout1"]]
+        connected = sum(1 for port in ports if len(port.forwarded_ports) != 0)
+        return qubits + running + connected + (1 if sim_time() != 0 else 0)
+
+    def clear_memories(self):
         """
-        repeater: node = self._destinations[-2]
-        remote_node: node = self._destinations[-1]
-        port_pair: PortPair = self._quantum_channels_port_pairs[-2]
-        port_pair1: PortPair = self._quantum_channels_port_pairs[-1]
+        Discard the qubits left in all the memory positions of the nodes, the repeater and the remote node.
+        """
+        for destination in self._destinations.values():
+            qmemory = destination.qmemory
+            for position in range(qmemory.num_positions):
+                try:
+                    qmemory.discard(position)
+                except MemPositionEmptyError:
+                    pass
+
+    def swap_models(self, models_dict: Union[dict, ModelsFactory], channel_models: List[Dict[str, object]]):
+        """
+        Set the models for the quantum channels, putting back the models already built for each channel (see
+        channel_models) instead of building new ones, so that they keep their state (e.g. random numbers and caches).
+        :param models_dict: The dictionary of models, or the factory that built the models of the channels
+        :param channel_models: The models of each channel, as returned by channel_models
+        :raises AssertionError: If the number of channels is different
+        """
+        assert (len(channel_models) == len(self._quantum_channels))
+        old_keys = self._models_keys(self._models)
+        self._models = models_dict
+        for channel, models in zip(self._quantum_channels, channel_models):
+            self._set_channel_models(channel, models, old_keys)
 
-        remote_node.subcomponents["RemoteQuantumSource"].ports["qout0"].forward_output(
-            remote_node.ports[port_pair.source])
-        remote_node.subcomponents["RemoteQuantumSource"].ports["qout1"].connect(remote_node.qmemory.ports["qin0"])
+    def reseed_models(self, seed: int):
+        """
+        Reseed the random number generators of the loss models of the channels that have their own (see
+        ModelsFactory), each one with the seed and the index of its channel, so that the same seed gives the same
+        losses whatever ran on the network before.
+        :param seed: The seed
+        """
+        for index, channel in enumerate(self._quantum_channels):
+            rng = getattr(channel.models["quantum_loss_model"], "rng", None)
+            if isinstance(rng, RandomState):
+                rng.seed([seed, index])
 
-        repeater.ports[port_pair.destination].forward_input(repeater.qmemory.ports["qin1"])
+    @staticmethod
+    def _set_channel_models(channel: QuantumChannel, models: Dict[str, object], old_keys: List[str]):
+        """
+        Replace the models of a channel, removing the old ones that are not replaced.
 
-        # second quantum channel for the remote node
-        remote_node.subcomponents["RemoteQuantumSource1"].ports["qout0"].forward_output(
-            remote_node.ports[port_pair1.source])
-        remote_node.subcomponents["RemoteQuantumSource1"].ports["qout1"].connect(remote_node.qmemory.ports["qin1"])
+        :param channel: The quantum channel
+        :param models: The models of the channel, by key
+        :param old_keys: The keys of the previous models of the channel
+        """
+        for key in old_keys:
+            if key not in models:
+                channel.models[key] = None
+        for key, model in models.items():
+            channel.models[key] = model
+
+    @staticmethod
+    def _models_keys(models: Union[dict, ModelsFactory]) -> List[str]:
+        """
+        Get the keys of the models given to the channels.
 
-        repeater.ports[port_pair1.destination].forward_input(repeater.qmemory.ports["qin3"])
+        :param models: The dictionary of models, or the factory of the models
+        :return: The keys of the models
+        """
+        if isinstance(models, ModelsFactory):
+            return models.model_keys
+        return list(models.keys()) if models is not None else []
 
     def _change_lengths(self, new_length: float):
         """
-        Change the lengths of the quantum channels
+        Change the lengths of the quantum channels (the channels are already connected, so only their length is
+        changed, which also changes the delay of the delay model and so the noise of the noise model)
 
-        :param new_length:
-        :return:
+        :param new_length: The new length of the quantum channels (in km)
         """
         assert (new_length >= 0)
 
         if new_length == self._channels_length:
             return
 
-        self._init_quantum_channels(new_length)
+        for channel in self._quantum_channels:
+            channel.length = new_length
 
     ############################################
     # GENERATE ENTANGLEMENT BETWEEN NODE PAIRS #
@@ -509,7 +897,8 @@ class StarNetwork:
         :raises AssertionError: If either `node1`, `node2`, or `node3` is not between 1 and `self._destinations_n - 1`,
         and one of the nodes is the same as the other,
         and `node1` is greater than `node2` and `node2` is greater than `node3`
-        :return: A dictionary containing the qubits and their fidelity
+        :return: A list of the results of the pairs with their fidelity (see entanglement_swapping), or a dictionary
+        with the error message if the qubits were lost or the trial timed out (see _timeout_result)
         """
         assert (1 <= node1 <= self._destinations_n - 1
                 and 1 <= node2 <= self._destinations_n - 1
@@ -517,8 +906,8 @@ class StarNetwork:
                 and node1 < node2 < node3
                 and node1 != node2 != node3)
 
-        tot_num_channels = self._repeater_mem_positions // 2  # 2 memories per channel for the repeater
-        assert tot_num_channels == 2
+        tot_num_channels = 2  # one channel of the repeater for each of the first two nodes
+        assert self._channels_n >= tot_num_channels
 
         # define memory_snapshot class
         memory_snapshot = MemorySnapshot(self._network, node1, node2, node3,
@@ -526,13 +915,21 @@ class StarNetwork:
                                          self.node_mem_positions,
                                          self.remote_node_mem_positions)
 
+        if debug:
+            # the snapshots show the memories of all the nodes of the protocol from the first link
+            self.build([node1, node2, node3])
         channels_n = [i for i in range(0, tot_num_channels)][::-1]  # reverse the list to start from the last channel
+        self._start_recording()
+        self._attempts = 0
 
         for i, channel_n in enumerate(channels_n):
             first_node = node1 if i == 0 else node2
 
             # this way uses only 1 mem position0 and 1 qchannel between nodes
-            self._perform_entanglement(first_node, node3, channel_n)
+            timeout = self._perform_entanglement(first_node, node3, channel_n)
+            if timeout is not None:
+                return self._timeout_result(timeout)
+            self._record(f"entanglement{i}")
 
             if debug:
                 expected_output = "4 Qubits and 4 None" if i == 0 else "all Qubits and 0 None"
@@ -543,6 +940,7 @@ class StarNetwork:
                     end_msg=expected_output)
 
         results = self.entanglement_swapping([node1, node2, node3], debug)
+        self._record("swapping")
 
         if debug:
             expected_output = "all None"
@@ -561,12 +959,147 @@ class StarNetwork:
         :param debug: If True, print the memory positions, before the entanglement swapping (default is False)
         :raises AssertionError: If either `node1` or `node2` is not between 1 and `self._destinations_n - 1` and `node1`
                                 and `node2` are the same node
-        :return: A dictionary containing the qubits and their fidelity
+        :return: A list of the results of the pairs with their fidelity (see entanglement_swapping), or a dictionary
+        with the error message if the qubits were lost or the trial timed out (see _timeout_result)
         """
         assert (1 <= node1 <= self._destinations_n - 1 and 1 <= node2 <= self._destinations_n - 1 and node1 != node2)
 
-        self._perform_entanglement(node1, node2)
-        return self.entanglement_swapping([node1, node2], debug)
+        self._start_recording()
+        self._attempts = 0
+        timeout = self._perform_entanglement(node1, node2)
+        if timeout is not None:
+            return self._timeout_result(timeout)
+        self._record("entanglement0")
+        results = self.entanglement_swapping([node1, node2], debug)
+        self._record("swapping")
+        return results
+
+    def multiplexed_entangle_nodes(self, nodes: List[int] = None, debug: bool = False):
+        """
+        Entangle each of the given nodes with the Remote Node, generating and swapping all the pairs in parallel:
+        every node uses its own multiplexed channel of the Repeater and of the Remote Node, all the pairs are generated
+        during a single run of the simulation, and then all the swaps are performed.
+
+        :param nodes: The nodes, followed by the Repeater, e.g. [1, 2, 3, 4] (default None, as many nodes as the
+        channels, up to all the nodes)
+        :param debug: If True, print the memory positions, before the entanglement swapping (default is False)
+        :raises AssertionError: If the last node is not the Repeater, the other nodes are not distinct nodes, or there
+        are more of them than the channels
+        :return: A list of the results of the pairs with their fidelity (see entanglement_swapping), or a dictionary
+        with the error message if the qubits were lost or the trial timed out (see _timeout_result)
+        """
+        repeater_n = self._destinations_n - 1
+        if nodes is None:
+            nodes = list(range(1, min(self._channels_n, repeater_n - 1) + 1)) + [repeater_n]
+        pairs_n = len(nodes) - 1
+        assert (1 <= pairs_n <= self._channels_n and nodes[-1] == repeater_n and len(set(nodes)) == len(nodes)
+                and all(1 <= node_n < repeater_n for node_n in nodes[:-1]))
+
+        self._start_recording()
+        self._attempts = 0
+        # the i-th node uses the channel pairs_n - 1 - i, as in protocol_a
+        timeout = self._perform_links([(node_n, repeater_n, pairs_n - 1 - i) for i, node_n in enumerate(nodes[:-1])])
+        if timeout is not None:
+            return self._timeout_result(timeout)
+        self._record("entanglement0")
+        results = self.entanglement_swapping(nodes, debug)
+        self._record("swapping")
+        return results
+
+    def harvest_entangle_nodes(self, node1: int = 1, node2: int = 4, samples: int = 1000, frequency: float = 1e5,
+                               on_sample: callable = None, debug: bool = False) -> int:
+        """
+        Entangle two nodes (one of which is the Repeater) continuously: the sources run clocked at the given frequency,
+        and the pairs of every cycle are swapped, corrected and measured as soon as they arrive (see
+        HarvestEntanglement), so that a single run of the simulation gives all the samples. The results of every
+        sample (the same of entangle_nodes) are streamed to on_sample.
+
+        :param node1: The index of the first node (default is 1)
+        :param node2: The index of the second node (default is 4, the Repeater)
+        :param samples: The number of samples (default 1000)
+        :param frequency: The frequency of the sources [Hz], its period must be longer than the delay of the channels
+        (default 1e5, a period of 10 us)
+        :param on_sample: Function called with the results of every sample (default None)
+        :param debug: If True, print the memory positions, before the entanglement swapping (default is False)
+        :raises AssertionError: If the nodes are not valid, or if none of them is the Repeater
+        :return: The number of samples, or the reason ("sim_time" or "wall_clock") if the simulation was stopped by a
+        limit
+        """
+        repeater_n = self._destinations_n - 1
+        assert (1 <= node1 <= repeater_n and 1 <= node2 <= repeater_n and node1 != node2
+                and repeater_n in [node1, node2])
+        period = 1e9 / frequency
+        delay = self._get_channel(self._channel_index(repeater_n)).compute_delay()
+        # the qubits of a cycle must arrive before the remote source generates the ones of the next cycle
+        if period <= delay + self._harvest_margin:
+            error_exit(f"The period of the sources ({period} ns) must be longer than the delay of the channels "
+                       f"({delay} ns)")
+
+        self._connect_source_to_destination(node1)
+        self._connect_source_to_destination(node2)
+        sources = [self._source.subcomponents["QuantumSource"],
+                   self._network.subcomponents["RemoteNode"].subcomponents["RemoteQuantumSource"]]
+
+        def harvest():
+            # the protocol waits for the programs of the swap
+            results = yield from self._entanglement_swapping_steps([node1, node2], debug)
+            # the qubits of the cycle that were not lost must not be mixed with the ones of the next cycle
+            self.clear_memories()
+            if on_sample is not None:
+                on_sample(results)
+
+        def stop():
+            for source in sources:
+                QuantumSourceFactory.set_external(source)
+
+        protocol = HarvestEntanglement(on_node=self._network.subcomponents["RemoteNode"], name="ProtocolHarvest",
+                                       input_port=self._network.subcomponents["RemoteNode"].qmemory.ports["qin0"],
+                                       delay=delay + self._harvest_margin, samples=samples, harvest=harvest,
+                                       on_stop=stop, tracer=self._event_tracer)
+        protocol.start()
+        self._protocols = [protocol]
+        for source in sources:
+            QuantumSourceFactory.set_clocked(source, frequency)
+
+        timeout = self._run_simulation()
+        if debug:
+            print(f"{protocol.samples_n} samples harvested in {sim_time()} nanoseconds")
+        protocol.stop()
+        if timeout is not None:
+            stop()
+            sim_reset()
+        self.clear_memories()
+        self._disconnect_source_from_destination(node1)
+        self._disconnect_source_from_destination(node2)
+        return timeout if timeout is not None else protocol.samples_n
+
+    def _start_recording(self):
+        """
+        Start a new trial of the recorder of the memories and of the tracer of the events, if any.
+        """
+        if self._memory_recorder is not None:
+            self._memory_recorder.start_trial()
+        if self._event_tracer is not None:
+            self._event_tracer.start_trial()
+
+    def _trace(self, component: str, event: str):
+        """
+        Trace an event, if there is a tracer.
+
+        :param component: The name of the component
+        :param event: The type of the event (see EVENT_TYPES)
+        """
+        if self._event_tracer is not None:
+            self._event_tracer.trace(component, event)
+
+    def _record(self, stage: str):
+        """
+        Record the memories at the given stage, if there is a recorder.
+
+        :param stage: The name of the stage (see PROTOCOL_STAGES)
+        """
+        if self._memory_recorder is not None:
+            self._memory_recorder.record(stage)
 
     def _perform_entanglement(self, node1: int, node2: int, channel_n=0):
         """
@@ -576,88 +1109,280 @@ class StarNetwork:
 
         :param node1: The index of the first node
         :param node2: The index of the second node
+        :param channel_n: The index of the channel of the source (and of the Repeater) (default 0)
+        :return: None, or the reason ("sim_time" or "wall_clock") if the simulation was stopped by a limit
         """
-        protocol_node1: GenerateEntanglement
-        protocol_node2: GenerateEntanglement
-
-        # Connect the source to the nodes
-        self._connect_source_to_destination(node1, channel_n)
-        self._connect_source_to_destination(node2, channel_n)
-
-        # select the sources that should be connected to the quantum channels and generate entanglement
-        channel_n_str = "" if channel_n == 0 else str(channel_n)
-        source_name = "QuantumSource" + channel_n_str
-        remote_source_name = "Remote" + source_name
-
-        # Initialize and start the protocols
-        protocol_source: GenerateEntanglement = GenerateEntanglement(on_node=self._network.subcomponents["Source"],
-                                                                     is_source=True, name="ProtocolSource",
-                                                                     qsource_name=source_name)
-
-        if node1 == self._destinations_n - 1 or node2 == self._destinations_n - 1:
-            protocol_remote = GenerateEntanglement(on_node=self._network.subcomponents["RemoteNode"],
-                                                   is_remote=True, name="ProtocolRemote",
-                                                   qsource_name=remote_source_name)
-
-            protocol_repeater = GenerateEntanglement(on_node=self._network.subcomponents["Repeater"],
-                                                     is_repeater=True, name="ProtocolRepeater")
-
-            if node1 == self._destinations_n - 1:
-                protocol_node1 = protocol_repeater
-                protocol_node2 = GenerateEntanglement(on_node=self._network.subcomponents[f"Node{node2}"],
-                                                      name=f"ProtocolNode{node2}")
-            elif node2 == self._destinations_n - 1:
-                protocol_node1 = GenerateEntanglement(on_node=self._network.subcomponents[f"Node{node1}"],
-                                                      name=f"ProtocolNode{node1}")
-                protocol_node2 = protocol_repeater
-
-            protocol_remote.start()
-        else:
-            protocol_node1 = GenerateEntanglement(on_node=self._network.subcomponents[f"Node{node1}"],
-                                                  name=f"ProtocolNode{node1}")
-            protocol_node2 = GenerateEntanglement(on_node=self._network.subcomponents[f"Node{node2}"],
-                                                  name=f"ProtocolNode{node2}")
+        return self._perform_links([(node1, node2, channel_n)])
 
-        protocol_source.start()
-        protocol_node1.start()
-        protocol_node2.start()
+    def _perform_links(self, links: List[Tuple[int, int, int]]):
+        """
+        Generate the bell pairs of the given links in parallel, in a single run of the simulation: every link sends
+        the qubits of a pair to its two nodes, using its own channel of the source (and of the Repeater and of the
+        Remote Node, if one of its nodes is the Repeater).
 
-        # Run the simulation
-        sim_run()
+        :param links: The list of the links, as tuples of the index of the first node, the index of the second node
+        and the index of the channel
+        :return: None, or the reason ("sim_time" or "wall_clock") if the simulation was stopped by a limit
+        """
+        repeater_n = self._destinations_n - 1
+        protocols: List[GenerateEntanglement] = []
+        sources: List[GenerateEntanglement] = []
+        for node1, node2, channel_n in links:
+            # Connect the source to the nodes
+            self._connect_source_to_destination(node1, channel_n)
+            self._connect_source_to_destination(node2, channel_n)
+
+            # select the sources that should be connected to the quantum channels and generate entanglement
+            channel_n_str = "" if channel_n == 0 else str(channel_n)
+            source_name = self.select_source(channel_n)
+            remote_source_name = "Remote" + source_name
+
+            # the source and the remote source repeat the generation until their qubits cross the channels
+            source_channels = [self._channels[self._channel_index(node1, channel_n)],
+                               self._channels[self._channel_index(node2, channel_n)]]
+            remote_channels = [self._channels[self._remote_channel_index(channel_n)]]
+
+            # Initialize the protocols
+            sources.append(GenerateEntanglement(on_node=self._network.subcomponents["Source"], is_source=True,
+                                                name="ProtocolSource" + channel_n_str, qsource_name=source_name,
+                                                tracer=self._event_tracer,
+                                                **self._attempt_parameters(source_channels)))
+            nodes_protocols = {}
+            # the protocols of the remote node and of the repeater are created first
+            for node_n in sorted([node1, node2], key=lambda n: n != repeater_n):
+                if node_n == repeater_n:
+                    sources.append(GenerateEntanglement(on_node=self._network.subcomponents["RemoteNode"],
+                                                        is_remote=True, name="ProtocolRemote" + channel_n_str,
+                                                        qsource_name=remote_source_name, tracer=self._event_tracer,
+                                                        **self._attempt_parameters(remote_channels)))
+                    nodes_protocols[node_n] = GenerateEntanglement(on_node=self._network.subcomponents["Repeater"],
+                                                                   is_repeater=True, tracer=self._event_tracer,
+                                                                   name="ProtocolRepeater" + channel_n_str)
+                else:
+                    nodes_protocols[node_n] = GenerateEntanglement(
+                        on_node=self._network.subcomponents[f"Node{node_n}"], name=f"ProtocolNode{node_n}",
+                        tracer=self._event_tracer)
+            protocols += [nodes_protocols[node1], nodes_protocols[node2]]
+
+        # Start the protocols, the remote sources first (as before the sources and the nodes)
+        protocols = sorted(sources, key=lambda protocol: not protocol.name.startswith("ProtocolRemote")) + protocols
+        self._protocols = protocols
+        for protocol in protocols:
+            protocol.start()
+
+        # Run the simulation, the successful attempts are not lost
+        loss_models = self._disable_loss_models() if self._repeat_until_success else None
+        timeout = self._run_simulation()
+        if loss_models is not None:
+            for channel, loss_model in zip(self._quantum_channels, loss_models):
+                channel.models["quantum_loss_model"] = loss_model
+            self._attempts += sum(protocol.attempts for protocol in sources)
         print(f"Entanglement simulation run in {sim_time()} nanoseconds")
+        if timeout is not None:
+            # stop the protocols still waiting, and discard the events and the qubits of the stopped trial
+            for protocol in protocols:
+                protocol.stop()
+            sim_reset()
+            self.clear_memories()
 
         # Disconnect the source from the nodes
-        self._disconnect_source_from_destination(node1)
-        self._disconnect_source_from_destination(node2)
+        for node1, node2, _ in links:
+            self._disconnect_source_from_destination(node1)
+            self._disconnect_source_from_destination(node2)
+        return timeout
+
+    def _attempt_parameters(self, channels: List[QuantumChannel]) -> Dict[str, float]:
+        """
+        Get the parameters of the repeated attempts of a source (see GenerateEntanglement): the probability that none
+        of its qubits is lost by the given channels, and the duration of an attempt (the delay of the source and the
+        round trip of the longest channel, for the herald).
+
+        :param channels: The channels crossed by the qubits of the source
+        :return: dictionary with the success_probability and the attempt_period, empty without repeat_until_success
+        """
+        if not self._repeat_until_success:
+            return {}
+        success_probability = 1.0
+        for channel in channels:
+            loss_model = channel.models["quantum_loss_model"]
+            if loss_model is not None:
+                success_probability *= (1 - getattr(loss_model, "p_loss_init", 0.0)) * \
+                                       10 ** (- channel.length * getattr(loss_model, "p_loss_length", 0.0) / 10)
+        if success_probability <= 0:
+            error_exit("The qubits are always lost, the generation cannot be repeated until success")
+        attempt_period = self._source_delay + 2 * max(channel.compute_delay() for channel in channels)
+        return dict(success_probability=success_probability, attempt_period=attempt_period)
+
+    def _disable_loss_models(self) -> list:
+        """
+        Remove the loss models of all the quantum channels.
+
+        :return: The list of the removed loss models (None for the channels without loss model)
+        """
+        loss_models = []
+        for channel in self._quantum_channels:
+            loss_models.append(channel.models["quantum_loss_model"])
+            channel.models["quantum_loss_model"] = None
+        return loss_models
+
+    def _run_simulation(self) -> Union[str, None]:
+        """
+        Run the simulation until there are no more events, or until one of the limits is reached: the simulation time
+        horizon (sim_time_horizon) or the wall-clock time limit (wall_time_limit). The wall-clock limit is enforced by
+        a watchdog thread that stops the engine (which checks the stop request between two events).
+
+        :return: None, or the reason ("sim_time" or "wall_clock") if the simulation was stopped by a limit
+        """
+        expired = threading.Event()
+        watchdog = None
+        if self._wall_time_limit > 0:
+            def stop():
+                expired.set()
+                sim_stop()
+
+            watchdog = threading.Timer(self._wall_time_limit, stop)
+            watchdog.daemon = True
+            watchdog.start()
+
+        end_time = sim_time() + self._sim_time_horizon
+        self._trace("Engine", "sim_run_start")
+        if self._sim_time_horizon > 0:
+            sim_run(end_time=end_time)
+        else:
+            sim_run()
+        self._trace("Engine", "sim_run_end")
+
+        if watchdog is not None:
+            watchdog.cancel()
+        if expired.is_set():
+            return "wall_clock"
+        # the engine stops before the horizon when there are no more events
+        if self._sim_time_horizon > 0 and sim_time() >= end_time:
+            return "sim_time"
+        return None
+
+    @staticmethod
+    def _timeout_result(reason: str) -> Dict[str, Union[str, bool]]:
+        """
+        Get the result of a trial that timed out.
+
+        :param reason: The limit that was reached ("sim_time" or "wall_clock")
+        :return: dictionary with the error message, like the one of the lost qubits, and the reason of the timeout
+        """
+        return {"message": f"The trial timed out ({reason} limit)", "error": True, "timeout": reason}
 
     def get_entanglement_swapping_parameters(self, nodes) -> Tuple[List[List[int]], List[int], List[int], int]:
+        """
+        Get the memory positions used by the entanglement swapping of the given nodes: with 2 nodes a single pair
+        (without the positions of the Bell measurement), with more nodes a pair for each node but the last one (the
+        Repeater), each one on its own channel of the Repeater and of the Remote Node.
+
+        :param nodes: The nodes, where the last one is the Repeater if there are more than 2 nodes
+        :return: tuple of the memory positions of the repeater of each Bell measurement, the memory positions of the
+        RemoteNode corrected by each measurement, the nodes of the qubits to pop, their memory positions, and the
+        number of memory positions of the repeater used
+        """
         length = len(nodes)
         if length == 2:
             m_mem_positions = [[]]
             positions = [-1]
-            nodes_list = nodes
+            nodes_list = list(nodes)
             mem_positions = [0, 0]
             repeater_memory_positions = 2
-        elif length == 3:
-            m_mem_positions = [[0, 1], [2, 3]]
-            positions = [0, 1]
-            nodes_list = nodes
-            nodes_list.append(nodes_list[-1])  # the last element again
-            mem_positions = [0, 0, 0, 1]  # 1 because "RemoteNode" has 2 mem positions
-            repeater_memory_positions = 4
+        elif 3 <= length <= self._channels_n + 1:
+            pairs_n = length - 1
+            # the channel k uses the memory positions 2k and 2k+1 of the repeater, and k of the remote node
+            m_mem_positions = [[2 * channel_n, 2 * channel_n + 1] for channel_n in range(pairs_n)]
+            positions = list(range(pairs_n))
+            nodes_list = list(nodes[:-1]) + [nodes[-1]] * pairs_n  # the last element again for each pair
+            mem_positions = [0] * pairs_n + list(range(pairs_n))
+            repeater_memory_positions = 2 * pairs_n
         else:
             error_exit("Invalid number of nodes for entanglement swapping")
 
         return m_mem_positions, positions, nodes_list, mem_positions, repeater_memory_positions
 
-    def get_bell_states(self, m_mem_positions: List[List[int]], debug: bool) -> List[int]:
-        repeater_memory = self._network.subcomponents["Repeater"].qmemory
-        states = []
-        for m_mem_position_pair in m_mem_positions:
-            _, state = perform_and_get_bell_measurement_w_state(repeater_memory, m_mem_position_pair, debug)
-            states.append(state)
+    def get_bell_states(self, program: BellMeasurementProgram, debug: bool):
+        """
+        Perform the Bell measurements of the swap with the program of the Repeater, forcing their outcomes with
+        stratified sampling. It is a generator: it yields the processor of the Repeater once the program is started,
+        and the caller resumes it when the program is over (see entanglement_swapping).
+
+        :param program: The program of the Bell measurements of the topology
+        :param debug: If True, print the outcomes of the measurements
+        :raises MemPositionEmptyError: If one of the memory positions is empty (the qubit was lost)
+        :return: The outcome of each measurement, in M format (0, 1, 2 or 3)
+        """
+        repeater_memory = self._get_destination(self._destinations_n - 1).qmemory
+        self._bell_probabilities = []
+        forced_outcomes = None
+        if self._stratified_bell_outcomes:
+            # the i-th measurement cycles through the outcomes every 4^i trials
+            forced_outcomes = [(self._stratum // 4 ** i) % 4 for i in range(program.measurements_n)]
+        program.forced_outcomes = forced_outcomes
+        yield from self._execute_program(repeater_memory, program)
+        states = program.outcomes
+        if self._stratified_bell_outcomes:
+            self._bell_probabilities = program.probabilities
+            self._stratum += 1
+        for i, state in enumerate(states):
+            self._trace("Repeater", "bell_measurement")
+            if debug:
+                print_bell_measurement(program.output[f"M{i}"], state)
         return states
 
+    def apply_corrections(self, program: CorrectionProgram, states: List[int], debug: bool):
+        """
+        Apply the corrections of the outcomes of the Bell measurements with the program of the RemoteNode. It is a
+        generator: it yields the processor of the RemoteNode once the program is started (if there is any gate to
+        apply), and the caller resumes it when the program is over (see entanglement_swapping).
+
+        :param program: The program of the corrections of the topology
+        :param states: The outcome of each measurement, in M format (0, 1, 2 or 3)
+        :param debug: If True, print the corrections
+        :raises MemPositionEmptyError: If one of the memory positions is empty (the qubit was lost)
+        """
+        remote_node_memory = self._get_destination(self._destinations_n).qmemory
+        program.outcomes = states
+        if program.gates_n > 0:
+            yield from self._execute_program(remote_node_memory, program)
+        for state, position in zip(states, program.memory_positions):
+            self._trace("RemoteNode", "correction")
+            if debug:
+                print(f"Applying the correction {CORRECTION_INSTRUCTIONS[state]} of the state {state} to the qubit "
+                      f"in memory position {position} in the RemoteNode")
+
+    @staticmethod
+    def _execute_program(processor, program: Union[BellMeasurementProgram, CorrectionProgram]):
+        """
+        Start a program on a processor, with the qubits of the program mapped to its memory positions. It is a
+        generator: it yields the processor once the program is started, the caller waits for the program to be over.
+
+        :param processor: The quantum processor
+        :param program: The program, with its memory positions
+        :raises MemPositionEmptyError: If one of the memory positions is empty (the qubit was lost)
+        """
+        if any(qubit is None for qubit in processor.peek(program.memory_positions)):
+            raise MemPositionEmptyError(f"Empty memory position in {program.memory_positions} of {processor.name}")
+        processor.execute_program(program, qubit_mapping=program.memory_positions)
+        yield processor
+
+    def _get_swap_programs(self, nodes_n: int, m_mem_positions: List[List[int]], positions: List[int]) \
+            -> Tuple[BellMeasurementProgram, CorrectionProgram]:
+        """
+        Get the programs of the entanglement swapping of the given number of nodes, built the first time they are used.
+
+        :param nodes_n: The number of the swapped nodes
+        :param m_mem_positions: The memory positions of the repeater of each Bell measurement
+        :param positions: The memory positions of the RemoteNode corrected by each measurement
+        :return: tuple of the program of the Repeater and of the program of the RemoteNode
+        """
+        programs = self._swap_programs.get(nodes_n)
+        if programs is None:
+            programs = BellMeasurementProgram(m_mem_positions), CorrectionProgram(positions)
+            self._swap_programs[nodes_n] = programs
+        return programs
+
     def try_discard_mem_positions_repeater(self, repeater_memory, repeater_memory_positions: int) -> None:
         for i in range(repeater_memory_positions):
             try:
@@ -666,24 +1391,50 @@ class StarNetwork:
                 pass
 
     def entanglement_swapping(self, nodes: List[int], debug: bool = False) \
-            -> List[Dict[str, Union[List[Qubit], float, bool]]]:
+            -> Union[List[PairResult], Dict[str, Union[str, bool]]]:
+        """
+        Given 2 or 3 nodes, perform entanglement swapping only if 1 of the nodes is the Repeater. The programs of the
+        swap (see swap_programs) are run by the simulation, after the generation of the pairs is over.
+
+        :param nodes: The  nodes, where the last one is the Remote Node
+        :param debug: If True, print the memory positions, before the entanglement swapping (default is False)
+        :return: A list of the compact results of the pairs (with the qubits only if keep_qubits is set), or a
+        dictionary with the error message if some qubits were lost
         """
-        Given 2 or 3 nodes, perform entanglement swapping only if 1 of the nodes is the Repeater.
+        steps = self._entanglement_swapping_steps(nodes, debug)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+            # the program just started is the only event left
+            sim_run()
+
+    def _entanglement_swapping_steps(self, nodes: List[int], debug: bool = False):
+        """
+        Perform the entanglement swapping of the given nodes (see entanglement_swapping). It is a generator: it yields
+        the processor of every program it starts, and it is resumed when the program is over, either after running the
+        simulation or by a protocol that waits for the program (see HarvestEntanglement).
 
         :param nodes: The  nodes, where the last one is the Remote Node
         :param debug: If True, print the memory positions, before the entanglement swapping (default is False)
-        :return: A dictionary containing the qubits and their fidelity (list of dictionaries)
+        :return: A list of the compact results of the pairs, or a dictionary with the error message if some qubits
+        were lost
         """
+        states = []
+        self._bell_probabilities = []
         m_mem_positions, positions, nodes_list, mem_positions, repeater_memory_positions = \
             self.get_entanglement_swapping_parameters(nodes)
 
-        repeater_memory = self._network.subcomponents["Repeater"].qmemory
-        remote_node_memory = self._network.subcomponents["RemoteNode"].qmemory
+        # the Repeater and the Remote Node are built only if they are used
+        swapped = any(single_node == self._destinations_n - 1 for single_node in nodes)
+        repeater_memory = self._get_destination(self._destinations_n - 1).qmemory if swapped else None
         try:
-            if any(single_node == self._destinations_n - 1 for single_node in nodes):
+            if swapped:
                 if debug:
                     print('entanglement_swapping with #nodes:' + str(len(nodes)))
-                states = self.get_bell_states(m_mem_positions, debug)
+                measurement, correction = self._get_swap_programs(len(nodes), m_mem_positions, positions)
+                states = yield from self.get_bell_states(measurement, debug)
 
                 # swap the qubits in memory position 0 and 1,
                 # and then apply the necessary gates
@@ -692,11 +1443,13 @@ class StarNetwork:
                 # check that len(states) ==  len(positions)
                 if len(states) != len(positions):
                     error_exit("Mismatch length between states and positions in entanglement swapping")
-                # apply gates for first and second state/position for l=3 otherwise -1
-                for i in range(len(states)):
-                    state = states[i]
-                    position = positions[i]
-                    apply_gates(state, remote_node_memory, position, debug)
+                # apply gates for first and second state/position for l=3 otherwise -1,
+                # unless the corrections are tracked as Pauli frames on the results (no gate is applied)
+                if self._pauli_frame:
+                    if debug:
+                        print(f"Tracking the corrections of the states {states} as Pauli frames")
+                else:
+                    yield from self.apply_corrections(correction, states, debug)
 
         except MemPositionEmptyError as e:
             print(e)
@@ -708,10 +1461,11 @@ class StarNetwork:
             qubits = [self._network.subcomponents[label].qmemory.pop(mem_pos)[0]
                       for label, mem_pos in zip(labels, mem_positions)]
             # peak in all the repeater memory positions, from 0 to 3 (both included)
-            for i in range(repeater_memory_positions):
+            for i in range(repeater_memory_positions if swapped else 0):
                 _, = repeater_memory.peek(i)
 
-            results = get_results_qubits(qubits)
+            results = get_results_qubits(qubits, states, self._keep_qubits, self._bell_probabilities,
+                                         self._pauli_frame)
             # try to discard the memory positions in the repeater
             if labels[-1] == "RemoteNode":  # same as node3_label: "RemoteNode"
                 # list of the memory positions from 0 to 3 (both included)
@@ -2,20 +2,33 @@ from netsquid.components import QSource, Port
 from netsquid.nodes import node
 from netsquid.protocols import NodeProtocol
 from netsquid.protocols.protocol import Signals
+from netsquid.util.simtools import get_random_state
+
+from src.helper.network.EventTracer import EventTracer
 
 
 class GenerateEntanglement(NodeProtocol):
     """
     Generate shared entanglement between two nodes.
+
+    The sources can repeat the generation until success (heralded generation): instead of simulating every failed
+    attempt, the number of failed attempts is sampled from the geometric distribution of the success probability of
+    an attempt, the source waits for that many attempt periods in a single step, and then triggers the successful
+    attempt (whose qubits must not be lost by the channels, see StarNetwork.repeat_until_success).
     """
     _is_source: bool = False
     _is_repeater: bool = False
     _is_remote: bool = False
     _qsource_name: node = None
     _qmem_input_ports: [Port] = []
+    _tracer: EventTracer = None
+    _success_probability: float = 1
+    _attempt_period: float = 0
+    _attempts: int = 0
 
     def __init__(self, on_node: node, name: str, is_source: bool = False, is_repeater: bool = False,
-                 is_remote: bool = False, qsource_name: node = None):
+                 is_remote: bool = False, qsource_name: node = None, tracer: EventTracer = None,
+                 success_probability: float = 1, attempt_period: float = 0):
         """
         Constructor for the GenerateEntanglement protocol class.
 
@@ -25,13 +38,23 @@ class GenerateEntanglement(NodeProtocol):
         :param is_repeater: Whether this protocol should act as a repeater
         :param is_remote: Whether this protocol should act as a remote_source
         :param qsource_name: Name of the qsource node to use for this protocol. If None, the first source node is used.
+        :param tracer: EventTracer to trace the events of this protocol. If None, the events are not traced.
+        :param success_probability: The probability that an attempt of the source succeeds, 1 to trigger the source
+        only once (default 1)
+        :param attempt_period: The duration of an attempt of the source [ns] (default 0)
+        :raises AssertionError: If the success probability is not in (0, 1] or the attempt period is negative
         """
         super().__init__(node=on_node, name=name)
+        assert (0 < success_probability <= 1 and attempt_period >= 0)
+        self._success_probability = success_probability
+        self._attempt_period = attempt_period
+        self._attempts = 0
 
         self._is_source = is_source
         self._is_repeater = is_repeater
         self._is_remote = is_remote
         self._qsource_name = qsource_name  # default is None
+        self._tracer = tracer
 
         if not self._is_source:
             self._qmem_input_ports.append(self.node.qmemory.ports["qin0"])
@@ -45,16 +68,61 @@ class GenerateEntanglement(NodeProtocol):
         """
         Send entangled qubits of the source to the two destination nodes.
         """
+        self._trace("protocol_start")
         if self._is_source or self._is_remote:
+            failed_attempts = self._sample_failed_attempts()
+            self._attempts = failed_attempts + 1
+            if failed_attempts > 0:
+                # skip all the failed attempts in a single step
+                yield self.await_timer(failed_attempts * self._attempt_period)
             self.node.subcomponents[self._qsource_name].trigger()
+            self._trace("source_trigger")
 
         if not self._is_source:
             yield self.await_port_input(self._qmem_input_ports[0])
+            self._trace("port_input")
             self.send_signal(Signals.SUCCESS, 0)
+            self._trace("signal")
 
         if self._is_remote:
             yield self.await_port_input(self._qmem_input_ports[1])
+            self._trace("port_input")
             self.send_signal(Signals.SUCCESS, 1)
+            self._trace("signal")
+
+    @classmethod
+    def trim_input_ports(cls):
+        """
+        Drop the input ports added to the list shared by all the protocols after the first two (the only ones awaited,
+        see run), so that the list does not grow with the trials.
+        """
+        del cls._qmem_input_ports[2:]
+
+    @property
+    def attempts(self) -> int:
+        """
+        :type: int, the number of attempts of the source until the success (0 before the source is triggered)
+        """
+        return self._attempts
+
+    def _sample_failed_attempts(self) -> int:
+        """
+        Sample the number of failed attempts before the successful one, from the random state of NetSquid.
+
+        :return: The number of failed attempts, 0 if every attempt succeeds
+        """
+        if self._success_probability >= 1:
+            return 0
+        return int(get_random_state().geometric(self._success_probability)) - 1
+
+    def _trace(self, event: str):
+        """
+        Trace an event of this protocol, if there is a tracer.
+
+        :param event: The type of the event (see EVENT_TYPES)
+        """
+        if self._tracer is not None:
+            self._tracer.trace(self.name, event)
 
     @property
     def is_connected(self) -> bool:
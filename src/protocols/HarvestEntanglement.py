@@ -0,0 +1,77 @@
+from netsquid.components import Port
+from netsquid.nodes import node
+from netsquid.protocols import NodeProtocol
+from netsquid.protocols.protocol import Signals
+
+from src.helper.network.EventTracer import EventTracer
+
+
+class HarvestEntanglement(NodeProtocol):
+    """
+    Harvest the pairs generated continuously by clocked sources (see QuantumSourceFactory.set_clocked): every time
+    a qubit of a new cycle arrives on the input port (e.g. the one of the remote source, which is never lost), the
+    protocol waits until the other qubits of the same cycle have crossed the channels, then harvests them (e.g.
+    swaps, corrects and measures them, and clears the memories for the next cycle), waiting for the programs started
+    by the harvest on the processors. The protocol stops after the given number of samples, and sends a SUCCESS
+    signal.
+    """
+    _samples_n: int = 0
+
+    def __init__(self, on_node: node, name: str, input_port: Port, delay: float, samples: int, harvest: callable,
+                 on_stop: callable = None, tracer: EventTracer = None):
+        """
+        Constructor for the HarvestEntanglement protocol class.
+
+        :param on_node: Node to run this protocol on
+        :param name: Name of the protocol
+        :param input_port: The port that receives a qubit at the start of every cycle
+        :param delay: The time to wait after the input for the other qubits of the cycle [ns]
+        :param samples: The number of samples to harvest
+        :param harvest: Generator function called (without arguments) to harvest the qubits of a cycle, it yields the
+        processor of every program it starts, and it is resumed when the program is over
+        :param on_stop: Function called (without arguments) after the last sample, e.g. to stop the sources
+        :param tracer: EventTracer to trace the events of this protocol. If None, the events are not traced.
+        """
+        super().__init__(node=on_node, name=name)
+        assert (delay >= 0 and samples > 0)
+        self._input_port = input_port
+        self._delay = delay
+        self._samples = samples
+        self._harvest = harvest
+        self._on_stop = on_stop
+        self._tracer = tracer
+        self._samples_n = 0
+
+    @property
+    def samples_n(self) -> int:
+        """
+        :type: int, the number of samples harvested
+        """
+        return self._samples_n
+
+    def run(self):
+        """
+        Harvest the qubits of every cycle, until the number of samples is reached.
+        """
+        self._trace("protocol_start")
+        while self._samples_n < self._samples:
+            yield self.await_port_input(self._input_port)
+            self._trace("port_input")
+            if self._delay > 0:
+                yield self.await_timer(self._delay)
+            for processor in self._harvest():
+                yield self.await_program(processor)
+            self._samples_n += 1
+        if self._on_stop is not None:
+            self._on_stop()
+        self.send_signal(Signals.SUCCESS, self._samples_n)
+        self._trace("signal")
+
+    def _trace(self, event: str):
+        """
+        Trace an event of this protocol, if there is a tracer.
+
+        :param event: The type of the event (see EVENT_TYPES)
+        """
+        if self._tracer is not None:
+            self._tracer.trace(self.name, event)
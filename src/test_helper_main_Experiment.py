@@ -1,8 +1,11 @@
 import os
 import unittest
 
+from netsquid import get_qstate_formalism
+
 from src.helper.main.Experiment import Experiment
 from src.helper.main.main import select_method
+from src.helper.statistics.ExactExpectation import ExactExpectation
 from src.network.StarNetwork import StarNetwork
 
 
@@ -31,6 +34,138 @@ class TestHelpersMainExperiment(unittest.TestCase):
         self.e.fig_path = new_fig
         self.assertEqual(new_fig, self.e.fig_path)
 
+    def test_common_random_numbers(self):
+        experiment = Experiment(StarNetwork())
+        self.assertIsNone(experiment.trial_seed(3))
+        experiment.common_random_numbers = True
+        # without a seed the trials are seeded from 0
+        self.assertEqual(3, experiment.trial_seed(3))
+        experiment.seed = 10
+        self.assertEqual(13, experiment.trial_seed(3))
+
+        experiment.model_variants = ["empty", "combined:t1=1e-5"]
+        self.assertEqual(["empty", "combined:t1=1e-5"], [str(models) for models in experiment.model_variants])
+
+        method = select_method(experiment._network, "entangle_nodes", 2)
+        experiment.models = "combined:seed=1"
+        experiment.model_variants = ["combined:seed=2"]
+        experiment.num_each_simulation = 5
+        experiment._lengths = [10, 20]
+        experiment.csv_path = self.out_folder + "/data" + self.test_name + "_crn.csv"
+        experiment.fig_path = self.out_folder + "/fidelity-over-length" + self.test_name + "_crn.png"
+        experiment._network.build([1, 2])
+        base_models = experiment._network.channel_models
+        experiment.run(method, [1, 2])
+        # the models of the network are swapped back at every length, not rebuilt by the factory
+        for models, channel in zip(base_models, experiment._network.quantum_channels):
+            self.assertIs(models["quantum_loss_model"], channel.models["quantum_loss_model"])
+
+        with open(experiment.csv_path) as csv_file:
+            header, first, second = [line.strip().split(",") for line in csv_file.readlines()]
+        self.assertIn("length_diff_ci_high", header)
+        self.assertIn("variant0_diff", header)
+        # the variant differs only by the seed of its factory, which is reseeded for every trial
+        self.assertEqual(0.0, float(first[header.index("variant0_diff")]))
+        self.assertEqual("nan", first[header.index("length_diff")])
+        self.assertNotEqual("nan", second[header.index("length_diff")])
+        self.assertEqual("combined:seed=1", str(experiment.models))
+
+        os.remove(experiment.csv_path)
+        os.remove(experiment.fig_path)
+
+    def test_control_variate(self):
+        experiment = Experiment(StarNetwork())
+        self.assertEqual((3, 6), experiment._crossings(2, [1, 2, 4]))
+        self.assertEqual((2, 2), experiment._crossings(1, [1, 2]))
+        # without nodes the methods run on their default ones, which go through the repeater
+        network = experiment._network
+        self.assertEqual([1, 4], experiment._effective_nodes(network.entangle_nodes, []))
+        self.assertEqual([1, 2, 4], experiment._effective_nodes(network.protocol_a, []))
+        self.assertEqual([1, 2], experiment._effective_nodes(network.entangle_nodes, [1, 2]))
+        self.assertEqual((3, 6), experiment._crossings(2, experiment._effective_nodes(network.protocol_a, [])))
+        self.assertIsNone(experiment._fidelity_predictor())
+
+        experiment.control_variate = True
+        experiment.models = "combined"
+        method = select_method(experiment._network, "entangle_nodes", 2)
+        experiment.num_each_simulation = 10
+        experiment._lengths = [10]
+        experiment.csv_path = self.out_folder + "/data" + self.test_name + "_cv.csv"
+        experiment.fig_path = self.out_folder + "/fidelity-over-length" + self.test_name + "_cv.png"
+        experiment.run(method, [1, 4])
+
+        with open(experiment.csv_path) as csv_file:
+            header, values = [line.strip().split(",") for line in csv_file.readlines()]
+        self.assertIn("cv_fidelity_ci_high", header)
+        self.assertLessEqual(float(values[header.index("cv_fidelity")]), 1)
+        self.assertEqual(10, experiment.statistics[0].control_variate.n)
+
+        os.remove(experiment.csv_path)
+        os.remove(experiment.fig_path)
+
+    def test_stratified_bell_outcomes(self):
+        experiment = Experiment(StarNetwork())
+        experiment.stratified_bell_outcomes = True
+        experiment.models = "combined"
+        experiment._lengths = [10, 20]
+        experiment.csv_path = self.out_folder + "/data" + self.test_name + "_st.csv"
+        experiment.fig_path = self.out_folder + "/fidelity-over-length" + self.test_name + "_st.png"
+        formalism = get_qstate_formalism()
+        # with 3 trials the outcome 3 would never be forced
+        experiment.num_each_simulation = 3
+        with self.assertRaises(SystemExit):
+            experiment.run(select_method(experiment._network, "entangle_nodes", 2), [1, 4])
+        experiment.num_each_simulation = 4
+        experiment.run(select_method(experiment._network, "entangle_nodes", 2), [1, 4])
+        self.assertEqual(formalism, get_qstate_formalism())
+
+        # every length forces each outcome once (the lost trials have no outcome)
+        for statistics in experiment.statistics:
+            sampled = [statistics.outcomes_fidelity[k].n for k in range(4)]
+            self.assertTrue(all(n <= 1 for n in sampled))
+
+        os.remove(experiment.csv_path)
+        os.remove(experiment.fig_path)
+
+    def test_continuous_frequency(self):
+        experiment = Experiment(StarNetwork())
+        experiment.continuous_frequency = 1e5
+        experiment.models = "combined"
+        experiment.num_each_simulation = 5
+        experiment._lengths = [10]
+        experiment.csv_path = self.out_folder + "/data" + self.test_name + "_continuous.csv"
+        experiment.fig_path = self.out_folder + "/fidelity-over-length" + self.test_name + "_continuous.png"
+        with self.assertRaises(SystemExit):
+            experiment.run(select_method(experiment._network, "protocol_a", 0), [])
+        # without nodes the default ones of entangle_nodes (1, 4) are harvested
+        experiment.run(select_method(experiment._network, "entangle_nodes", 0), [])
+        self.assertEqual(5, experiment.statistics[0].trials)
+
+        os.remove(experiment.csv_path)
+        os.remove(experiment.fig_path)
+
+    def test_exact_expectation(self):
+        experiment = Experiment(StarNetwork())
+        experiment.exact_expectation = True
+        experiment.models = "combined"
+        experiment._lengths = [10]
+        experiment.csv_path = self.out_folder + "/data" + self.test_name + "_exact.csv"
+        experiment.fig_path = self.out_folder + "/fidelity-over-length" + self.test_name + "_exact.png"
+        # the default nodes of protocol_a (1, 2, 4) go through the repeater
+        experiment.run(select_method(experiment._network, "protocol_a", 0), [])
+
+        with open(experiment.csv_path) as csv_file:
+            header, values = [line.strip().split(",") for line in csv_file.readlines()]
+        models = experiment._network.quantum_channels[0].models
+        expectation = ExactExpectation.from_models(models["quantum_loss_model"], models["quantum_noise_model"],
+                                                   models["quantum_delay_model"])
+        self.assertAlmostEqual(expectation.pair_fidelity(10 / 1000), float(values[header.index("pair_fidelity")]))
+        self.assertIn("outcome0_probability", header)
+        self.assertEqual([], experiment.statistics)
+
+        os.remove(experiment.csv_path)
+        os.remove(experiment.fig_path)
+
     def test_run(self):
         method_name = "protocol_a"
         nodes: list = [1, 2, 4]
@@ -42,6 +177,7 @@ class TestHelpersMainExperiment(unittest.TestCase):
         self.e.csv_path = new_csv
         new_fig = self.out_folder + "/fidelity-over-length" + self.test_name + ".png"
         self.e.fig_path = new_fig
+        self.e.store_records = True
 
         self.e.run(method, nodes, debug)
 
@@ -51,6 +187,8 @@ class TestHelpersMainExperiment(unittest.TestCase):
         csv_file.close()
 
         self.assertEqual(101, len(lines))  # Check if there are 101 lines in the CSV file
+        self.assertTrue(lines[0].startswith("length,fidelity,fidelity_var,fidelity_ci_low,fidelity_ci_high"))
+        self.assertIn("success_rate,loss_rate,timeout_rate,pair0_fidelity", lines[0])
 
         # Check if the png file exists
         fig_file = open(self.e.fig_path, "rb")
@@ -59,6 +197,16 @@ class TestHelpersMainExperiment(unittest.TestCase):
 
         self.assertGreater(len(lines), 1)  # Check if there is more than one line in the PNG file
 
+        # Check the records, protocol_a gives 2 pairs (or a single failed record) for each trial of every length
+        records = self.e.records
+        self.assertGreaterEqual(len(records), 100)
+        self.assertLessEqual(len(records), 200)
+        self.assertEqual(10, records["length"][0])
+        self.assertTrue(((0 <= records["fidelity"]) & (records["fidelity"] <= 1)).all())
+        # Check the statistics of each length
+        self.assertEqual(100, len(self.e.statistics))
+        self.assertEqual(1, self.e.statistics[0].trials)
+
         # delete the csv and png files
         os.remove(self.e.csv_path)
         os.remove(self.e.fig_path)
@@ -0,0 +1,38 @@
+import tracemalloc
+import unittest
+
+from src.helper.benchmark.soak import rss_bytes, top_growth, per_trials, soak
+
+
+class TestHelpersBenchmarkSoak(unittest.TestCase):
+
+    def test_rss_bytes(self):
+        self.assertGreater(rss_bytes(), 0)
+
+    def test_per_trials(self):
+        self.assertEqual(2000, per_trials(100, 500))
+        self.assertEqual(0, per_trials(100, 0))
+
+    def test_top_growth(self):
+        tracemalloc.start()
+        try:
+            start = tracemalloc.take_snapshot()
+            kept = [bytearray(1024) for _ in range(100)]
+            end = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        growth = top_growth(start, end, 3)
+        self.assertLessEqual(len(growth), 3)
+        # the largest site is the one of the kept arrays, in this file
+        site, size, count = growth[0]
+        self.assertIn("test_helpers_benchmark_soak.py", site)
+        self.assertGreaterEqual(size, 100 * 1024)
+        self.assertGreaterEqual(count, 100)
+        self.assertEqual(100, len(kept))
+
+    def test_soak(self):
+        result = soak(20, "empty", every=10, warmup=2, top=5)
+        self.assertEqual([0, 10, 20], [trial for trial, _, _ in result["samples"]])
+        self.assertAlmostEqual(1, result["fidelity"])
+        self.assertLessEqual(len(result["top"]), 5)
+        self.assertIn("traced_growth", result)
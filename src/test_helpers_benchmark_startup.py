@@ -0,0 +1,31 @@
+import unittest
+
+from src.helper.benchmark.startup import parse_import_times, startup_violations, measure_import_times, \
+    HEAVY_MODULES, SIMULATION_MODULES, SINGLE_RUN_CODE
+
+
+class TestHelpersBenchmarkStartup(unittest.TestCase):
+
+    def test_parse_import_times(self):
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       120 |        120 |   src.helper.error.error\n"
+                  "import time:       300 |        420 | src.main\n"
+                  "some other line")
+        self.assertEqual({"src.helper.error.error": (120, 120), "src.main": (300, 420)},
+                         parse_import_times(stderr))
+
+    def test_measure_import_times(self):
+        times = measure_import_times("src.main")
+        self.assertIn("src.main", times)
+        self.assertIn("src.helper.main.main", times)
+
+    def test_lazy_imports(self):
+        # parsing the arguments and the help do not load NetSquid, numpy or the plotting libraries
+        self.assertEqual([], startup_violations("import src.main", SIMULATION_MODULES + HEAVY_MODULES))
+        code = ("import sys\nfrom src.main import handle_args\nsys.argv = ['main.py', 'help']\n"
+                "try:\n    handle_args()\nexcept SystemExit:\n    pass")
+        self.assertEqual([], startup_violations(code, SIMULATION_MODULES + HEAVY_MODULES))
+
+    def test_single_run_imports(self):
+        # a single simulation (experiment_num=0) does not load the dataframe and plotting libraries
+        self.assertEqual([], startup_violations(SINGLE_RUN_CODE, HEAVY_MODULES))
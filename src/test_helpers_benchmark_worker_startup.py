@@ -0,0 +1,18 @@
+import unittest
+
+from src.helper.benchmark.worker_startup import measure_worker, BUILD_CODE, RESTORE_CODE
+
+
+class TestHelpersBenchmarkWorkerStartup(unittest.TestCase):
+
+    def test_measure_worker(self):
+        imports, network = measure_worker("import time\nimports = 0.5\nstart = time.perf_counter()\n")
+        self.assertEqual(0.5, imports)
+        self.assertGreaterEqual(network, 0)
+        with self.assertRaises(RuntimeError):
+            measure_worker("raise ValueError()\n")
+
+    def test_codes(self):
+        # the workers build the network, or restore it from the file of the snapshot
+        self.assertIn("StarNetwork(select_models('empty')).build()", BUILD_CODE.format(models="select_models('empty')"))
+        self.assertIn("NetworkTemplate.restore(f.read())", RESTORE_CODE.format(path="/tmp/network.pickle"))
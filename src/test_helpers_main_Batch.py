@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.helper.main.Batch import read_manifest, validate_entry, order_runs, estimate_cost, write_summary, \
+    run_batch, template_networks, install_networks, get_network, check_summary_path, SUMMARY_COLUMNS, SUMMARY_PATH
+
+
+class TestHelpersMainBatch(unittest.TestCase):
+    folder = tempfile.mkdtemp()
+    runs = [dict(models_name="empty", method_name="entangle_nodes", nodes=[1, 4], debug=False, experiment_num=0),
+            dict(models_name="combined", method_name="protocol_a", nodes=[1, 2, 4], debug=True, experiment_num=2)]
+
+    def test_read_manifest(self):
+        json_path = os.path.join(self.folder, "manifest.json")
+        with open(json_path, "w") as f:
+            json.dump({"runs": self.runs}, f)
+        self.assertEqual(self.runs, read_manifest(json_path))
+
+        csv_path = os.path.join(self.folder, "manifest.csv")
+        with open(csv_path, "w") as f:
+            f.write("models_name,method_name,nodes,debug,experiment_num\n"
+                    "empty,entangle_nodes,\"1,4\",False,0\n"
+                    "combined,protocol_a,1;2;4,True,2\n")
+        self.assertEqual(self.runs, read_manifest(csv_path))
+
+        with self.assertRaises(SystemExit) as cm:
+            read_manifest(os.path.join(self.folder, "manifest.txt"))
+        self.assertEqual("Invalid manifest, please provide a .json, .csv or .toml file", cm.exception.args[0])
+
+    def test_validate_entry(self):
+        self.assertEqual(dict(models_name="empty", method_name="protocol_a", nodes=[], debug=False, experiment_num=0),
+                         validate_entry({}))
+        with self.assertRaises(SystemExit) as cm:
+            validate_entry({"method_name": "protocol_b"})
+        self.assertEqual("Invalid method_name, please provide 'protocol_a' or 'entangle_nodes'", cm.exception.args[0])
+        with self.assertRaises(SystemExit) as cm:
+            validate_entry({"nodes": "1,5"})
+        self.assertEqual("Invalid nodes, please provide a list of integers between 1 and 4", cm.exception.args[0])
+
+    def test_order_runs(self):
+        self.assertEqual(1, estimate_cost(self.runs[0]))
+        self.assertEqual(400, estimate_cost(self.runs[1]))
+        ordered = order_runs(self.runs)
+        self.assertEqual([1, 0], [run["index"] for run in ordered])
+
+    def test_write_summary(self):
+        rows = [dict(index=0, models_name="empty", method_name="entangle_nodes", nodes="1,4", debug=False,
+                     experiment_num=0, status="ok", seconds=0.1, fidelity="1.0", message="")]
+        path = os.path.join(self.folder, "summary.csv")
+        msg = write_summary(rows, path)
+        self.assertTrue(msg.startswith("index | models_name"))
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(",".join(SUMMARY_COLUMNS), lines[0])
+        self.assertEqual(2, len(lines))
+
+    def test_check_summary_path(self):
+        # the default summary goes in the out folder next to src, not relative to the current directory
+        src_folder = os.path.dirname(os.path.abspath(__file__))
+        self.assertEqual(os.path.join(os.path.dirname(src_folder), "out", "batch-summary.csv"), SUMMARY_PATH)
+        path = os.path.join(self.folder, "new", "summary.csv")
+        self.assertEqual(path, check_summary_path(path))
+        self.assertTrue(os.path.isdir(os.path.dirname(path)))
+        # a folder that can not be created fails before running anything
+        blocker = os.path.join(self.folder, "file")
+        open(blocker, "w").close()
+        with self.assertRaises(SystemExit):
+            check_summary_path(os.path.join(blocker, "summary.csv"))
+
+    def test_run_batch(self):
+        runs = [self.runs[0], dict(self.runs[0], nodes=[1, 2, 4])]
+        rows = run_batch(runs)
+        self.assertEqual([0, 1], [row["index"] for row in rows])
+        self.assertEqual("ok", rows[0]["status"])
+        self.assertNotEqual("", rows[0]["fidelity"])
+        # the second run has too many nodes for entangle_nodes, it fails without stopping the batch
+        self.assertEqual("error", rows[1]["status"])
+
+    def test_template_networks(self):
+        # the forked workers inherit the networks, the other ones restore their snapshots (if they can be pickled)
+        forked = template_networks(["empty"], "fork")
+        self.assertEqual(["empty"], list(forked.keys()))
+        spawned = template_networks(["empty"], "spawn")
+        self.assertTrue(all(isinstance(snapshot, bytes) for snapshot in spawned.values()))
+        install_networks(forked)
+        self.assertIs(forked["empty"], get_network("empty"))
+        rows = run_batch([self.runs[0], dict(self.runs[0], models_name="combined")], processes=2)
+        self.assertEqual(["ok", "ok"], [row["status"] for row in rows])
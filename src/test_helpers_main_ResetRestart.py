@@ -1,6 +1,7 @@
 import unittest
 
 from src.helper.main.ResetRestart import reset_and_restart_simulation, check_reset_restart
+from src.network.StarNetwork import StarNetwork
 
 
 class TestHelpersMainResetRestart(unittest.TestCase):
@@ -23,6 +24,23 @@ class TestHelpersMainResetRestart(unittest.TestCase):
         # out ends with "Exit code: "
         self.assertTrue(out.endswith("Exit code: 0"))
 
+    def test_reset_and_restart_simulation_subprocess(self):
+        out = reset_and_restart_simulation(self.debug, subprocess_restart=True)
+        self.assertTrue(out.startswith("Standard output of the program: "))
+        self.assertIn("Parsed arguments:", out)
+        self.assertTrue(out.endswith("Exit code: 0"))
+
+    def test_reset_and_restart_simulation_reuse_network(self):
+        star_network = StarNetwork({})
+        args = ("empty", "entangle_nodes", [1, 4], False, 0)
+        out = reset_and_restart_simulation(self.debug, args=args, star_network=star_network)
+        self.assertNotIn("Parsed arguments:", out)
+        self.assertIn("Results: ", out)
+        self.assertTrue(out.endswith("Exit code: 0"))
+        # invalid arguments exit with code 1, as the interpreter would do
+        out = reset_and_restart_simulation(self.debug, args=("empty", "entangle_nodes", [1, 2, 4], False, 0))
+        self.assertTrue(out.endswith("Exit code: 1"))
+
     def test_check_reset_restart(self):
         new_flag = check_reset_restart(True, self.debug)
         self.assertFalse(new_flag)
@@ -0,0 +1,106 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from src.helper.main.SimulationServer import NetworkRunner, SimulationServer, parse_address, validate_job, \
+    result_record, submit_jobs
+
+
+class TestHelpersMainSimulationServer(unittest.TestCase):
+    # create a callable runner for testing, it yields the length of the channel as the fidelity of every trial
+    @staticmethod
+    def runner(job: dict):
+        for trial in range(job["trials"]):
+            yield {"fidelity": [job["length"]], "error": False, "trial": trial}
+
+    def test_parse_address(self):
+        self.assertEqual((socket.AF_INET, ("127.0.0.1", 5005)), parse_address("127.0.0.1:5005"))
+        self.assertEqual((socket.AF_UNIX, "/tmp/server.sock"), parse_address("unix:/tmp/server.sock"))
+
+    def test_validate_job(self):
+        job = validate_job({"method": "entangle_nodes", "nodes": [1, 4], "trials": 2})
+        self.assertEqual({"id": None, "method": "entangle_nodes", "nodes": [1, 4], "models": "empty",
+                          "length": 1000, "trials": 2, "seed": None}, job)
+        with self.assertRaises(ValueError):
+            validate_job({"models": "invalid"})
+        with self.assertRaises(ValueError):
+            validate_job({"trials": 0})
+        with self.assertRaises(ValueError):
+            validate_job([])
+        # the parameterized models are valid, the nodes must exist and fit the method
+        self.assertEqual("combined:t1=1e-5", validate_job({"models": "combined:t1=1e-5"})["models"])
+        for nodes in [[1, 5], [0, 4], [1, 1], [1, 2, 4]]:
+            with self.assertRaises(ValueError):
+                validate_job({"method": "entangle_nodes", "nodes": nodes})
+        with self.assertRaises(ValueError):
+            validate_job({"method": "protocol_a", "nodes": [1, 4]})
+
+    def test_result_record(self):
+        self.assertEqual({"fidelity": [], "error": True},
+                         result_record({"message": "Some Qubits were lost during transfer", "error": True}))
+        self.assertEqual({"fidelity": [1.0, 0.5], "error": False},
+                         result_record([{"fidelity": 1.0, "error": False}, {"fidelity": 0.5, "error": False}]))
+
+    def test_tcp_server(self):
+        server = SimulationServer("127.0.0.1:0", runner=self.runner)
+        server.start()
+        host, port = server.address
+        records = list(submit_jobs(f"{host}:{port}", [{"id": 1, "length": 10, "trials": 2},
+                                                      {"id": 2, "models": "invalid"}]))
+        server.stop()
+        self.assertEqual([{"fidelity": [10], "error": False, "trial": 0, "id": 1},
+                          {"fidelity": [10], "error": False, "trial": 1, "id": 1},
+                          {"id": 1, "done": True},
+                          {"id": 2,
+                           "message": "Invalid models, please provide one of ['combined', 'empty'], optionally "
+                                      "followed by the parameters (e.g. 'combined:t1=1e-5,seed=7')",
+                           "error": True, "done": True}],
+                         records)
+
+    def test_network_runner(self):
+        runner = NetworkRunner()
+        records = list(runner(validate_job({"method": "entangle_nodes", "models": "combined", "trials": 2})))
+        self.assertEqual([0, 1], [record["trial"] for record in records])
+        # the warm network is left clean for the next job
+        self.assertEqual(0, runner.network("combined")._state_checksum())
+
+    def test_network_runner_seed(self):
+        runner = NetworkRunner()
+        job = validate_job({"method": "entangle_nodes", "nodes": [1, 4], "models": "combined:seed=7", "trials": 5,
+                            "seed": 3})
+        first = list(runner(job))
+        # the generators of the loss models advance with the jobs in between, the seed resets them
+        list(runner(validate_job({"method": "protocol_a", "models": "combined:seed=7", "trials": 3})))
+        self.assertEqual(first, list(runner(job)))
+
+    def test_unix_server(self):
+        path = os.path.join(tempfile.mkdtemp(), "server.sock")
+        server = SimulationServer("unix:" + path, runner=self.runner)
+        server.start()
+        records = list(submit_jobs("unix:" + path, [{"id": 3, "length": 20}]))
+        server.stop()
+        self.assertEqual([{"fidelity": [20], "error": False, "trial": 0, "id": 3}, {"id": 3, "done": True}], records)
+        self.assertFalse(os.path.exists(path))
+
+    def test_backpressure(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_runner(job: dict):
+            started.set()
+            release.wait()
+            yield {"fidelity": [], "error": False, "trial": 0}
+
+        server = SimulationServer("127.0.0.1:0", runner=blocking_runner, queue_size=1, queue_timeout=0.1)
+        server.start()
+        # the first job is executed (and blocked), the second one fills the queue, the third one is rejected
+        server.submit(validate_job({"id": 1}))
+        started.wait()
+        server.submit(validate_job({"id": 2}))
+        host, port = server.address
+        records = list(submit_jobs(f"{host}:{port}", [{"id": 3}]))
+        release.set()
+        server.stop()
+        self.assertEqual([{"id": 3, "message": "busy", "error": True, "done": True}], records)
@@ -1,7 +1,7 @@
 import unittest
 
 from src.helper.main.converter.converter import converter_string_boolean, converter_string_int, \
-    converter_string_list_int, converter_exit
+    converter_string_list_int, converter_exit, converter_string_models, converter_string_value
 
 
 class TestHelpersMainConverterConverter(unittest.TestCase):
@@ -63,3 +63,17 @@ class TestHelpersMainConverterConverter(unittest.TestCase):
                          converter_string_list_int("1,2,3,a"))
         self.assertEqual(self.fail_tuple,
                          converter_string_list_int("1.2"))
+
+    def test_converter_string_value(self):
+        self.assertEqual((True, False), converter_string_value("True"))
+        self.assertEqual((7, False), converter_string_value("7"))
+        self.assertEqual((1e-5, False), converter_string_value("1e-5"))
+        self.assertEqual(self.fail_tuple, converter_string_value("abc"))
+
+    def test_converter_string_models(self):
+        self.assertEqual((("combined", {}), False), converter_string_models("combined"))
+        self.assertEqual((("combined", {"t1": 1e-5, "seed": 7}), False),
+                         converter_string_models("combined:t1=1e-5,seed=7"))
+        self.assertEqual(self.fail_tuple, converter_string_models("combined:t1"))
+        self.assertEqual(self.fail_tuple, converter_string_models("combined:=1"))
+        self.assertEqual(self.fail_tuple, converter_string_models("combined:t1=abc"))
@@ -1,8 +1,8 @@
 import unittest
 
 from src.helper.main.main import run_method_with_nodes, show_help, select_models, select_method, checker
-from src.models.Combined import Combined
 from src.models.Empty import Empty
+from src.models.ModelsFactory import ModelsFactory
 
 
 class TestHelpersMainMain(unittest.TestCase):
@@ -29,7 +29,8 @@ class TestHelpersMainMain(unittest.TestCase):
         self.assertEqual("error", cm.exception.args[0])
 
     def test_show_help(self):
-        self.assertEqual("Command line arguments:- models_name: str, default='empty', choices=['combined', 'empty']- "
+        self.assertEqual("Command line arguments:- models_name: str, default='empty', choices=['combined', 'empty'], "
+                         "optionally followed by the parameters of the models (e.g. 'combined:t1=1e-5,seed=7')- "
                          "method_name: str, default='protocol_a', choices=['protocol_a', 'entangle_nodes']- nodes: "
                          "str, default='1,2,4', choices of int=[1, 2, 3, 4], length=[0, 2, 3],use ',' to separate the "
                          "nodes (e.g. '1,2,4' or '1,4' or '1,3')- debug: bool, default=False, if True, print debug "
@@ -38,14 +39,25 @@ class TestHelpersMainMain(unittest.TestCase):
                          show_help())
 
     def test_select_models(self):
-        self.assertEqual(Combined.models,
+        self.assertEqual(ModelsFactory("combined"),
                          select_models("combined"))
-        self.assertEqual(Empty.empty_models,
+        self.assertEqual(ModelsFactory("empty"),
                          select_models("empty"))
+        self.assertEqual(ModelsFactory("combined", t1=1e-5, seed=7),
+                         select_models("combined:t1=1e-5,seed=7"))
+        self.assertEqual(Empty.empty_models, select_models("empty").get())
         with self.assertRaises(SystemExit) as cm:
             select_models("invalid")
         self.assertEqual("Invalid models name, please provide one of the following: ['combined', 'empty']",
                          cm.exception.args[0])
+        with self.assertRaises(SystemExit) as cm:
+            select_models("combined:t1")
+        self.assertEqual("Invalid models parameters, please provide them as 'name:key=value,key=value'",
+                         cm.exception.args[0])
+        with self.assertRaises(SystemExit) as cm:
+            select_models("combined:t3=1")
+        self.assertEqual("Invalid models parameters ['t3'], please provide some of the following: "
+                         "['p_loss_init', 'p_loss_length', 't1', 't2', 'c', 'cached', 'seed', 'bias']", cm.exception.args[0])
 
     # skipped since tests below are sufficient
     # def test_select_method_uncheck(self):
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.helper.network.EventTracer import EventTracer, EVENT_TYPES
+from src.network.StarNetwork import StarNetwork
+
+
+class TestHelpersNetworkEventTracer(unittest.TestCase):
+    folder = tempfile.mkdtemp()
+
+    def test_ring_buffer(self):
+        tracer = EventTracer(capacity=3)
+        tracer.start_trial()
+        for component in ["A", "B", "A", "C", "B"]:
+            tracer.trace(component, "signal")
+        self.assertEqual(5, tracer.total)
+        self.assertEqual(5, tracer.trial_events["signal"])
+        self.assertEqual(5, tracer.trial_events_n)
+        # only the last 3 events are kept, in chronological order
+        records = tracer.records()
+        self.assertEqual(3, len(records))
+        self.assertEqual(["A", "B", "C"], tracer.components())
+        self.assertEqual([0, 2, 1], list(records["component"]))
+        self.assertTrue((np.diff(records["wall_time"]) >= 0).all())
+
+        tracer.start_trial()
+        self.assertEqual(0, tracer.trial_events_n)
+        with self.assertRaises(ValueError):
+            tracer.trace("A", "invalid")
+
+    def test_export(self):
+        tracer = EventTracer()
+        tracer.start_trial()
+        tracer.trace("Engine", "sim_run_start")
+        tracer.trace("Engine", "sim_run_end")
+
+        with open(tracer.export_chrome_trace(os.path.join(self.folder, "trace.json"))) as f:
+            trace = json.load(f)
+        instants = [event for event in trace["traceEvents"] if event["ph"] == "i"]
+        self.assertEqual(["sim_run_start", "sim_run_end"], [event["name"] for event in instants])
+        self.assertEqual("Engine", instants[0]["cat"])
+
+        with np.load(tracer.export_binary(os.path.join(self.folder, "trace.npz"))) as data:
+            self.assertEqual(2, len(data["records"]))
+            self.assertEqual(EVENT_TYPES, list(data["events"]))
+
+    def test_star_network_events(self):
+        star_network = StarNetwork({})
+        tracer = EventTracer()
+        star_network.event_tracer = tracer
+        star_network.protocol_a()
+        star_network.event_tracer = None
+        events = tracer.trial_events
+        self.assertEqual(2, events["sim_run_start"])
+        self.assertEqual(2, events["bell_measurement"])
+        self.assertGreater(events["port_input"], 0)
+        self.assertIn("ProtocolRepeater", tracer.components())
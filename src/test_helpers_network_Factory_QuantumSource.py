@@ -1,6 +1,7 @@
 import unittest
 
 from netsquid import b00
+from netsquid.components import SourceStatus
 from netsquid.components.component import ConstrainedMap
 from netsquid.qubits import StateSampler
 
@@ -19,3 +20,13 @@ class TestHelpersNetworkFactoryQuantumSource(unittest.TestCase):
                          self.factory.get(name).properties)
         self.assertEqual(type(StateSampler([b00])),
                          type(self.factory.get(name).state_sampler))
+
+    def test_set_clocked(self):
+        source = self.factory.get("clocked")
+        QuantumSourceFactory.set_clocked(source, 1e6)
+        self.assertEqual(SourceStatus.INTERNAL, source.status)
+        self.assertEqual(1e6, source.frequency)
+        QuantumSourceFactory.set_external(source)
+        self.assertEqual(SourceStatus.EXTERNAL, source.status)
+        with self.assertRaises(AssertionError):
+            QuantumSourceFactory.set_clocked(source, 0)
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from netsquid.qubits import create_qubits
+
+from src.helper.network.MemoryRecorder import MemoryRecorder, PROTOCOL_STAGES
+from src.network.StarNetwork import StarNetwork
+
+
+class TestHelpersNetworkMemoryRecorder(unittest.TestCase):
+
+    def test_record(self):
+        star_network = StarNetwork({})
+        recorder = MemoryRecorder(star_network.network, ["before", "after"], capacity=2, every=2,
+                                  density_matrices=True, memories=["Repeater", "RemoteNode"])
+        self.assertEqual(["Repeater_m0", "Repeater_m1", "Repeater_m2", "Repeater_m3", "RemoteNode_m0",
+                          "RemoteNode_m1"], recorder.labels)
+        remote_node_memory = star_network.network.subcomponents["RemoteNode"].qmemory
+
+        for trial in range(5):
+            recorder.start_trial()
+            recorder.record("before")
+            remote_node_memory.put(create_qubits(1), positions=[1])
+            recorder.record("after")
+            recorder.record("not chosen")
+            remote_node_memory.discard(1)
+
+        # only the trials 0 and 2 are recorded (every 2 trials, capacity 2)
+        self.assertEqual(2, recorder.recorded)
+        self.assertEqual((2, 2, 6), recorder.occupancy.shape)
+        self.assertFalse(recorder.occupancy[:, 0].any())
+        self.assertEqual([False] * 5 + [True], list(recorder.occupancy[0, 1]))
+        # the qubit is |0>
+        self.assertEqual(1, recorder.density[1, 1, 5, 0, 0])
+
+        path = recorder.dump(os.path.join(tempfile.mkdtemp(), "memories.npz"))
+        data = MemoryRecorder.load(path)
+        self.assertEqual([0, 2], list(data["trials"]))
+        self.assertEqual(["before", "after"], list(data["stages"]))
+        self.assertEqual(recorder.occupancy.tolist(), data["occupancy"].tolist())
+
+    def test_star_network_stages(self):
+        star_network = StarNetwork({})
+        recorder = MemoryRecorder(star_network.network, PROTOCOL_STAGES,
+                                  memories=["Node1", "Node2", "Repeater", "RemoteNode"])
+        star_network.memory_recorder = recorder
+        star_network.protocol_a()
+        star_network.memory_recorder = None
+        self.assertEqual(1, recorder.recorded)
+        # all the qubits are in the memories before the swapping, and none after
+        self.assertTrue(recorder.occupancy[0, 1].all())
+        self.assertFalse(recorder.occupancy[0, 2].any())
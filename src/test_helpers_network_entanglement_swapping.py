@@ -5,6 +5,7 @@ from netsquid.qubits import create_qubits
 from src.helper.network.entanglement_swapping import perform_and_get_bell_measurement_w_state, get_results, apply_gates, \
     get_results_qubits
 
+from src.helper.network.entanglement_swapping_utils.results import PairResult
 from src.network.StarNetwork import StarNetwork
 
 
@@ -100,15 +101,15 @@ class TestHelpersNetworkEntanglementSwapping(unittest.TestCase):
     def test_get_results(self):
         channel_1_pair = [self.q0, self.q3]
         channel_0_pair = [self.q1, self.q2]
-        results = get_results([channel_1_pair, channel_0_pair])
+        results = get_results([channel_1_pair, channel_0_pair], bell_states=[1, 2], keep_qubits=True)
         # check that the results are a list
         self.assertIsInstance(results, list)
         # check that the results have two elements
         self.assertEqual(2, len(results))
-        # check that the results are a list of dictionaries
-        self.assertIsInstance(results[0], dict)
-        self.assertIsInstance(results[1], dict)
-        # check that the dictionaries have the keys 'qubits', 'fidelity', and 'error'
+        # check that the results are a list of compact results
+        self.assertIsInstance(results[0], PairResult)
+        self.assertIsInstance(results[1], PairResult)
+        # check that the results have the keys 'qubits', 'fidelity', and 'error'
         self.assertIn('qubits', results[0].keys())
         self.assertIn('fidelity', results[0].keys())
         self.assertIn('error', results[0].keys())
@@ -129,3 +130,18 @@ class TestHelpersNetworkEntanglementSwapping(unittest.TestCase):
         # check that the 'error' key has a boolean value
         self.assertIsInstance(results[0]['error'], bool)
         self.assertIsInstance(results[1]['error'], bool)
+        # check the pair ids and the bell states
+        self.assertEqual([0, 1], [result.pair_id for result in results])
+        self.assertEqual([1, 2], [result.bell_state for result in results])
+
+        # the qubits are not retained by default
+        results = get_results([channel_1_pair, channel_0_pair])
+        self.assertNotIn('qubits', results[0].keys())
+        self.assertEqual([-1, -1], [result.bell_state for result in results])
+
+    def test_get_results_qubits_bell_states(self):
+        # the first pair is corrected by the second measurement (memory position 1 of the RemoteNode)
+        results = get_results_qubits(self.qubits, [2, 3])
+        self.assertEqual([3, 2], [result.bell_state for result in results])
+        results = get_results_qubits([self.q0, self.q1], [1])
+        self.assertEqual([1], [result.bell_state for result in results])
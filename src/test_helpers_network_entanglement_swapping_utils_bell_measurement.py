@@ -1,9 +1,11 @@
 import unittest
 
+import netsquid as ns
+import numpy as np
 from netsquid.qubits import create_qubits, ketstates
 
 from src.helper.network.entanglement_swapping_utils.bell_measurement import perform_bell_measurement, \
-    print_bell_measurement
+    print_bell_measurement, bell_state_vector, perform_forced_bell_measurement
 from src.network.StarNetwork import StarNetwork
 
 
@@ -57,3 +59,35 @@ class TestHelpersNetworkEntanglementSwappingUtilsBellMeasurement(unittest.TestCa
                     f"B/Bell states/Ket vectors format for the states: {ketstates.BellIndex(self.state_2_positions)}\n"
         self.assertEqual(expected2,
                          print_bell_measurement(self.m_2_positions, self.state_2_positions))
+
+    def test_bell_state_vector(self):
+        vectors = np.array([bell_state_vector(k) for k in range(4)])
+        # the 4 Bell states are an orthonormal basis, and the outcome 0 is |00> + |11>
+        np.testing.assert_allclose(np.eye(4), vectors @ vectors.conj().T, atol=1e-12)
+        np.testing.assert_allclose(ketstates.b00.flatten(), vectors[0], atol=1e-12)
+
+    def test_perform_forced_bell_measurement(self):
+        formalism = ns.get_qstate_formalism()
+        ns.set_qstate_formalism(ns.QFormalism.DM)
+        try:
+            star_network = StarNetwork()
+            star_network.stratified_bell_outcomes = True
+            outcomes = []
+            for _ in range(4):
+                results = star_network.entangle_nodes(1, 4)
+                outcomes.append(results[0].bell_state)
+                # without noise every outcome has probability 1/4, and the corrected pair is |00> + |11>
+                self.assertAlmostEqual(0.25, results[0].outcome_probability)
+                self.assertAlmostEqual(1, results[0].fidelity)
+            self.assertEqual([0, 1, 2, 3], outcomes)
+
+            repeater_memory = star_network.network.subcomponents["Repeater"].qmemory
+            qubits = create_qubits(2)
+            ns.qubits.assign_qstate(qubits, ketstates.b00)
+            repeater_memory.put(qubits, positions=[0, 1])
+            # the outcome 1 is impossible for |00> + |11>, the most likely one is used instead
+            probabilities, outcome = perform_forced_bell_measurement(repeater_memory, [0, 1], 1)
+            self.assertEqual(0, outcome)
+            np.testing.assert_allclose([1, 0, 0, 0], probabilities, atol=1e-12)
+        finally:
+            ns.set_qstate_formalism(formalism)
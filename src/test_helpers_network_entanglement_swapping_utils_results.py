@@ -1,8 +1,9 @@
 import unittest
 
-from netsquid.qubits import create_qubits
+from netsquid.qubits import assign_qstate, create_qubits
 
-from src.helper.network.entanglement_swapping_utils.results import calc_fidelity, get_result
+from src.helper.network.entanglement_swapping_utils.bell_measurement import bell_state_vector
+from src.helper.network.entanglement_swapping_utils.results import calc_fidelity, get_result, PairResult
 
 
 class TestHelpersNetworkEntanglementSwappingUtilsResults(unittest.TestCase):
@@ -15,5 +16,37 @@ class TestHelpersNetworkEntanglementSwappingUtilsResults(unittest.TestCase):
                          calc_fidelity(self.qbits_pair))
 
     def test_get_results(self):
-        self.assertEqual({"qubits": self.qbits_pair, "fidelity": calc_fidelity(self.qbits_pair), "error": False},
-                         get_result(self.qbits_pair))
+        # the qubits are not retained by default
+        result = get_result(self.qbits_pair)
+        self.assertEqual({"fidelity": calc_fidelity(self.qbits_pair), "error": False, "pair_id": 0, "bell_state": -1,
+                          "sim_time": 0.0, "wall_time": 0.0},
+                         result.to_dict())
+        self.assertNotIn("qubits", result)
+        with self.assertRaises(KeyError):
+            _ = result["qubits"]
+
+        result = get_result(self.qbits_pair, pair_id=1, bell_state=3, keep_qubits=True)
+        self.assertEqual(self.qbits_pair, result["qubits"])
+        self.assertEqual(calc_fidelity(self.qbits_pair), result["fidelity"])
+        self.assertEqual(1, result.pair_id)
+        self.assertEqual(3, result.bell_state)
+
+    def test_pauli_frame(self):
+        for outcome in range(4):
+            pair = create_qubits(num_qubits=2, system_name="F")
+            assign_qstate(pair, bell_state_vector(outcome))
+            # the uncorrected pair has the Bell state of the outcome, the fidelity is with the frame-adjusted state
+            result = get_result(pair, bell_state=outcome, pauli_frame=outcome)
+            self.assertAlmostEqual(1, result.fidelity)
+            self.assertEqual(outcome, result["pauli_frame"])
+            if outcome != 0:
+                self.assertAlmostEqual(0, get_result(pair, bell_state=outcome).fidelity)
+        self.assertNotIn("pauli_frame", get_result(self.qbits_pair))
+
+    def test_pair_result(self):
+        result = PairResult(0.5, pair_id=1)
+        self.assertEqual(PairResult(0.5, pair_id=1), result)
+        self.assertNotEqual(PairResult(0.5, pair_id=0), result)
+        # the slots do not allow new attributes (and the per instance dictionary)
+        with self.assertRaises(AttributeError):
+            result.qstate = None
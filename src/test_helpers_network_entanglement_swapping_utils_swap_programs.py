@@ -0,0 +1,58 @@
+import unittest
+
+import netsquid as ns
+from netsquid.qubits import create_qubits, ketstates
+
+from src.helper.network.entanglement_swapping_utils.bell_measurement import bell_state_vector
+from src.helper.network.entanglement_swapping_utils.swap_programs import BellMeasurementProgram, CorrectionProgram
+from src.network.StarNetwork import StarNetwork
+
+
+class TestHelpersNetworkEntanglementSwappingUtilsSwapPrograms(unittest.TestCase):
+
+    def test_bell_measurement_program(self):
+        star_network = StarNetwork()
+        repeater_memory = star_network.network.subcomponents["Repeater"].qmemory
+        program = BellMeasurementProgram([[0, 1], [2, 3]])
+        self.assertEqual(2, program.measurements_n)
+        self.assertEqual([0, 1, 2, 3], program.memory_positions)
+        self.assertEqual([0, 1], BellMeasurementProgram([[]]).memory_positions)
+        # the pairs of the repeater are in the Bell states of the outcomes 0 and 3
+        for forced_outcomes in [None, [0, 1]]:
+            for positions, outcome in [([0, 1], 0), ([2, 3], 3)]:
+                qubits = create_qubits(2)
+                ns.qubits.assign_qstate(qubits, bell_state_vector(outcome))
+                repeater_memory.put(qubits, positions=positions)
+            program.forced_outcomes = forced_outcomes
+            repeater_memory.execute_program(program, qubit_mapping=program.memory_positions)
+            ns.sim_run()
+            # the forced outcome 1 is impossible, the most likely one is used instead
+            self.assertEqual([0, 3], program.outcomes)
+        for probability in program.probabilities:
+            self.assertAlmostEqual(1, probability)
+        with self.assertRaises(AssertionError):
+            program.forced_outcomes = [0]
+
+    def test_correction_program(self):
+        star_network = StarNetwork()
+        remote_node_memory = star_network.network.subcomponents["RemoteNode"].qmemory
+        program = CorrectionProgram([1])
+        self.assertEqual([0], CorrectionProgram([-1]).memory_positions)
+        # the combined correction of every outcome brings its Bell state back to |00> + |11>
+        for outcome in range(4):
+            qubits = create_qubits(2)
+            ns.qubits.assign_qstate(qubits, bell_state_vector(outcome))
+            remote_node_memory.put(qubits[1], positions=1)
+            program.outcomes = [outcome]
+            self.assertEqual(0 if outcome == 0 else 1, program.gates_n)
+            remote_node_memory.execute_program(program, qubit_mapping=program.memory_positions)
+            ns.sim_run()
+            self.assertAlmostEqual(1, ns.qubits.fidelity(qubits, ketstates.b00))
+            remote_node_memory.discard(1)
+        with self.assertRaises(AssertionError):
+            program.outcomes = [0, 0]
+        # the swaps of the network reuse the programs of each topology, in every mode
+        star_network.entangle_nodes(1, 4)
+        star_network.protocol_a()
+        star_network.entangle_nodes(2, 4, debug=True)
+        self.assertEqual([2, 3], sorted(star_network._swap_programs.keys()))
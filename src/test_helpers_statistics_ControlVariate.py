@@ -0,0 +1,49 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.helper.statistics.ControlVariate import ControlVariate
+
+
+class TestHelpersStatisticsControlVariate(unittest.TestCase):
+    rng = np.random.RandomState(42)
+    controls = rng.uniform(0, 1, 1000)
+    # values correlated with the controls (expected value 0.5 + 0.5 * 0.5)
+    values = 0.5 + 0.5 * controls + rng.normal(0, 0.05, 1000)
+
+    def test_estimate(self):
+        control_variate = ControlVariate(0.5)
+        self.assertTrue(math.isnan(control_variate.estimate))
+        self.assertEqual(0.0, control_variate.coefficient)
+        for value, control in zip(self.values, self.controls):
+            control_variate.add(value, control)
+        self.assertEqual(1000, control_variate.n)
+        self.assertAlmostEqual(np.mean(self.values), control_variate.mean)
+        self.assertAlmostEqual(0.5, control_variate.coefficient, delta=0.02)
+        # the standard error is much smaller than the one of the plain mean
+        self.assertGreater(control_variate.variance_reduction, 5)
+        self.assertLess(control_variate.sem * 2, np.std(self.values, ddof=1) / math.sqrt(1000))
+        self.assertAlmostEqual(0.75, control_variate.estimate, delta=4 * control_variate.sem)
+        self.assertEqual(["cv", "cv_ci_low", "cv_ci_high", "cv_coefficient", "cv_variance_reduction"],
+                         list(control_variate.columns("cv").keys()))
+
+    def test_merge(self):
+        merged = ControlVariate(0.5)
+        single = ControlVariate(0.5)
+        for chunk in np.array_split(np.arange(1000), 3):
+            worker = ControlVariate(0.5)
+            for i in chunk:
+                worker.add(self.values[i], self.controls[i])
+                single.add(self.values[i], self.controls[i])
+            merged.merge(worker)
+        self.assertEqual(single.n, merged.n)
+        self.assertAlmostEqual(single.estimate, merged.estimate)
+        self.assertAlmostEqual(single.coefficient, merged.coefficient)
+        self.assertAlmostEqual(single.sem, merged.sem)
+        with self.assertRaises(AssertionError):
+            merged.merge(ControlVariate(0.4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from src.helper.statistics.ExactExpectation import ExactExpectation, PHI_PLUS
+from src.helper.statistics.FidelityPredictor import FidelityPredictor
+
+
+class TestHelpersStatisticsExactExpectation(unittest.TestCase):
+
+    def test_no_models(self):
+        expectation = ExactExpectation()
+        self.assertAlmostEqual(1.0, expectation.pair_fidelity(100))
+        self.assertAlmostEqual(1.0, expectation.pair_fidelity(100, swapped=False))
+        # without noise every outcome is equally likely, and corrected back to |00> + |11>
+        columns = expectation.columns(100, pairs_n=2)
+        for outcome in range(4):
+            self.assertAlmostEqual(0.25, columns[f"outcome{outcome}_probability"])
+            self.assertAlmostEqual(1.0, columns[f"outcome{outcome}_fidelity"])
+        self.assertEqual(1.0, columns["success_rate"])
+        self.assertNotIn("outcome0_probability", expectation.columns(100, swapped=False))
+
+    def test_noise(self):
+        predictor = FidelityPredictor(t1=10000, t2=8000)
+        expectation = ExactExpectation(predictor)
+        np.testing.assert_allclose(PHI_PLUS, ExactExpectation().cross(PHI_PLUS, 0, 1))
+        # the twirl of a single crossing is exact for the fidelity
+        rho = expectation.cross(PHI_PLUS, 1, 1)
+        self.assertAlmostEqual(predictor.pair_fidelity(1, 1), ExactExpectation.fidelity(rho))
+        self.assertAlmostEqual(1.0, np.trace(expectation.pair_state(1)).real)
+        self.assertLess(expectation.pair_fidelity(1), expectation.pair_fidelity(1, swapped=False))
+        # the twirled prediction is exact only for the dephasing, the amplitude damping keeps more of the fidelity
+        self.assertLess(predictor.pair_fidelity(1, 3), expectation.pair_fidelity(1))
+        dephasing = FidelityPredictor(t2=8000)
+        self.assertAlmostEqual(dephasing.pair_fidelity(1, 3), ExactExpectation(dephasing).pair_fidelity(1))
+        # never below the fidelity of the maximally mixed state
+        self.assertAlmostEqual(0.25, expectation.pair_fidelity(1000), 3)
+        self.assertAlmostEqual(1.0, sum(expectation.columns(1)[f"outcome{k}_probability"] for k in range(4)))
+
+    def test_loss(self):
+        predictor = FidelityPredictor(p_loss_init=0.1, p_loss_length=0.2)
+        expectation = ExactExpectation(predictor)
+        columns = expectation.columns(1, pairs_n=2)
+        success = predictor.success_probability(1, 6)
+        self.assertAlmostEqual(success, columns["success_rate"])
+        self.assertAlmostEqual(1 - success, columns["loss_rate"])
+        # a lost trial counts as pairs_n pairs with fidelity 0, as much as in the fidelity of the trials
+        self.assertAlmostEqual(success, columns["fidelity"])
+        self.assertAlmostEqual(success, columns["trial_fidelity"])
+        self.assertAlmostEqual(1.0, expectation.columns(1, pairs_n=2, repeat_until_success=True)["fidelity"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.helper.statistics.FidelityPredictor import FidelityPredictor
+
+
+class TestHelpersStatisticsFidelityPredictor(unittest.TestCase):
+
+    def test_no_models(self):
+        predictor = FidelityPredictor()
+        self.assertEqual(0.0, predictor.loss_probability(100))
+        self.assertEqual(1.0, predictor.pair_fidelity(100, 3))
+        self.assertEqual(1.0, predictor.success_probability(100, 6))
+        self.assertEqual((0.0, 0.0, 200000), (predictor._t1, predictor._t2, predictor._c))
+        self.assertEqual(1.0, FidelityPredictor.from_models().pair_fidelity(100, 3))
+
+    def test_loss(self):
+        predictor = FidelityPredictor(p_loss_init=0.1, p_loss_length=0.2)
+        self.assertAlmostEqual(1 - 0.9 * 10 ** (-0.02), predictor.loss_probability(1))
+        self.assertAlmostEqual((0.9 * 10 ** (-0.02)) ** 3, predictor.success_probability(1, 3))
+
+    def test_pair_fidelity(self):
+        # 1 km takes 5000 ns
+        predictor = FidelityPredictor(t1=10000, t2=8000)
+        gamma, dephase_prob = predictor.noise_parameters(1)
+        self.assertAlmostEqual(1 - math.exp(-0.5), gamma)
+        # the fidelity of a single crossing is the one of the amplitude damping and dephasing channel on |00> + |11>
+        kraus = [np.array([[1, 0], [0, math.sqrt(1 - gamma)]]), np.array([[0, math.sqrt(gamma)], [0, 0]])]
+        kraus = [d @ a for d in [math.sqrt(1 - dephase_prob) * np.eye(2),
+                                 math.sqrt(dephase_prob) * np.diag([1, -1])] for a in kraus]
+        bell = np.array([1, 0, 0, 1]) / math.sqrt(2)
+        fidelity = sum(abs(bell.conj() @ np.kron(np.eye(2), k) @ bell) ** 2 for k in kraus)
+        self.assertAlmostEqual(fidelity, predictor.pair_fidelity(1, 1))
+        # more crossings give a lower fidelity, never below the one of the maximally mixed state
+        self.assertLess(predictor.pair_fidelity(1, 3), predictor.pair_fidelity(1, 2))
+        self.assertAlmostEqual(0.25, predictor.pair_fidelity(1000, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
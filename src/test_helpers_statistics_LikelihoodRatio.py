@@ -0,0 +1,46 @@
+import math
+import unittest
+
+from src.helper.statistics.LikelihoodRatio import LikelihoodRatio
+
+
+class TestHelpersStatisticsLikelihoodRatio(unittest.TestCase):
+
+    def test_update(self):
+        likelihood_ratio = LikelihoodRatio()
+        self.assertEqual(1, likelihood_ratio.value)
+        likelihood_ratio.update(0.1, 0.5)
+        likelihood_ratio.update(0.9, 0.5)
+        self.assertAlmostEqual(0.1 / 0.5 * 0.9 / 0.5, likelihood_ratio.value)
+        self.assertEqual(2, likelihood_ratio.events)
+        with self.assertRaises(AssertionError):
+            likelihood_ratio.update(0.1, 0)
+        # many small ratios do not underflow in log space
+        for _ in range(1000):
+            likelihood_ratio.update(1e-3, 1)
+        self.assertEqual(0.0, likelihood_ratio.value)
+        self.assertFalse(math.isnan(likelihood_ratio._log_value))
+        likelihood_ratio.reset()
+        self.assertEqual((1, 0), (likelihood_ratio.value, likelihood_ratio.events))
+
+    def test_biased_probability(self):
+        self.assertEqual(0.5, LikelihoodRatio.biased_probability(0.05, 10, 0.9))
+        self.assertEqual(0.9, LikelihoodRatio.biased_probability(0.5, 10, 0.9))
+        # never lower than the real probability
+        self.assertEqual(0.95, LikelihoodRatio.biased_probability(0.95, 10, 0.9))
+        self.assertEqual(0.0, LikelihoodRatio.biased_probability(0.0, 10, 0.9))
+
+    def test_unbiased_estimate(self):
+        # estimate a rare failure (p = 0.01) by sampling it with q = 0.5
+        p, q, trials = 0.01, 0.5, 2000
+        estimate = 0.0
+        for trial in range(trials):
+            failed = trial % 2 == 0  # exactly half of the trials fail, as expected with q = 0.5
+            likelihood_ratio = LikelihoodRatio()
+            likelihood_ratio.update(p if failed else 1 - p, q if failed else 1 - q)
+            estimate += likelihood_ratio.value * failed
+        self.assertAlmostEqual(p, estimate / trials)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.helper.statistics.StreamingStatistics import StreamingStatistics, SweepPointStatistics
+
+
+class TestHelpersStatisticsStreamingStatistics(unittest.TestCase):
+    values = np.random.RandomState(42).uniform(0, 1, 1000)
+
+    # create a class for testing, with the fields of PairResult used by the statistics
+    class Pair:
+        def __init__(self, fidelity: float, pair_id: int, bell_state: int = -1, outcome_probability: float = math.nan):
+            self.fidelity = fidelity
+            self.pair_id = pair_id
+            self.bell_state = bell_state
+            self.outcome_probability = outcome_probability
+
+    def test_streaming_statistics(self):
+        statistics = StreamingStatistics()
+        self.assertTrue(math.isnan(statistics.mean))
+        self.assertTrue(math.isnan(statistics.variance))
+        self.assertTrue(math.isnan(statistics.quantile(0.5)))
+        for value in self.values:
+            statistics.add(value)
+        self.assertEqual(1000, statistics.n)
+        self.assertAlmostEqual(np.mean(self.values), statistics.mean)
+        self.assertAlmostEqual(np.var(self.values, ddof=1), statistics.variance)
+        # the quantiles have the resolution of the histogram (1 / 1000)
+        for q in [0.05, 0.5, 0.95]:
+            self.assertAlmostEqual(np.quantile(self.values, q), statistics.quantile(q), delta=0.002)
+        ci_low, ci_high = statistics.confidence_interval()
+        self.assertLess(ci_low, statistics.mean)
+        self.assertGreater(ci_high, statistics.mean)
+        self.assertAlmostEqual(2 * 1.96 * np.std(self.values, ddof=1) / math.sqrt(1000), ci_high - ci_low)
+        self.assertEqual(["f", "f_var", "f_ci_low", "f_ci_high", "f_p5", "f_median", "f_p95"],
+                         list(statistics.columns("f").keys()))
+
+    def test_merge(self):
+        merged = StreamingStatistics()
+        single = StreamingStatistics()
+        for chunk in np.array_split(self.values, 3):
+            worker = StreamingStatistics()
+            for value in chunk:
+                worker.add(value)
+                single.add(value)
+            merged.merge(worker)
+        self.assertEqual(single.n, merged.n)
+        self.assertAlmostEqual(single.mean, merged.mean)
+        self.assertAlmostEqual(single.variance, merged.variance)
+        self.assertEqual(single.quantile(0.5), merged.quantile(0.5))
+        with self.assertRaises(AssertionError):
+            merged.merge(StreamingStatistics(bins=10))
+
+    def test_sweep_point_statistics(self):
+        statistics = SweepPointStatistics(2)
+        statistics.add_trial([self.Pair(1.0, 0), self.Pair(0.5, 1)])
+        statistics.add_trial({"message": "Some Qubits were lost during transfer", "error": True})
+        self.assertEqual(2, statistics.trials)
+        self.assertEqual(1, statistics.lost)
+        self.assertEqual(0.5, statistics.success_rate)
+        self.assertEqual(0.5, statistics.loss_rate)
+        # the lost trial counts as 2 pairs with fidelity 0, the mean of the fidelity of the trials (0.75 and 0)
+        self.assertEqual(4, statistics.fidelity.n)
+        self.assertAlmostEqual(0.375, statistics.fidelity.mean)
+        self.assertEqual(1.0, statistics.pairs[0].mean)
+        self.assertEqual(0.5, statistics.pairs[1].mean)
+        columns = statistics.columns()
+        self.assertEqual(0.375, columns["fidelity"])
+        self.assertEqual(2, columns["trials"])
+        self.assertIn("pair1_fidelity_p95", columns)
+
+        other = SweepPointStatistics(2)
+        other.add_trial([self.Pair(1.0, 0), self.Pair(1.0, 1)])
+        statistics.merge(other)
+        self.assertEqual(3, statistics.trials)
+        self.assertAlmostEqual(1 / 3, statistics.loss_rate)
+        self.assertEqual(2, statistics.pairs[1].n)
+        # entangle_nodes has a single pair, without the columns of each pair
+        self.assertNotIn("pair0_fidelity", SweepPointStatistics(1).columns())
+
+    def test_sweep_point_statistics_timeouts(self):
+        statistics = SweepPointStatistics(1)
+        statistics.add_trial([self.Pair(1.0, 0)])
+        statistics.add_trial({"message": "The trial timed out (sim_time limit)", "error": True, "timeout": "sim_time"})
+        # a timed out trial is also a lost one
+        self.assertEqual(1, statistics.timeouts)
+        self.assertEqual(1, statistics.lost)
+        self.assertEqual(0.5, statistics.timeout_rate)
+        self.assertEqual(0.5, statistics.columns()["timeout_rate"])
+        self.assertEqual(1, SweepPointStatistics(1).merge(statistics).timeouts)
+
+    def test_sweep_point_statistics_importance_sampling(self):
+        statistics = SweepPointStatistics(2, importance_sampling=True)
+        statistics.add_trial([self.Pair(1.0, 0), self.Pair(0.5, 1)], weight=1.5)
+        statistics.add_trial({"message": "Some Qubits were lost during transfer", "error": True}, weight=0.5)
+        self.assertAlmostEqual((1.5 * 0.75 + 0) / 2, statistics.weighted_fidelity.mean)
+        self.assertAlmostEqual((0 + 0.5) / 2, statistics.weighted_failure.mean)
+        self.assertAlmostEqual(2 ** 2 / (1.5 ** 2 + 0.5 ** 2), statistics.effective_sample_size)
+        columns = statistics.columns()
+        self.assertIn("is_fidelity_ci_high", columns)
+        self.assertIn("is_failure", columns)
+        self.assertIn("is_effective_trials", columns)
+        self.assertNotIn("is_fidelity", SweepPointStatistics(2).columns())
+        # the weights have no upper bound: the means are exact, the quantiles of the weighted values are left out
+        statistics.add_trial([self.Pair(1.0, 0), self.Pair(1.0, 1)], weight=50)
+        self.assertAlmostEqual((1.5 * 0.75 + 0 + 50) / 3, statistics.columns()["is_fidelity"])
+        self.assertNotIn("is_fidelity_p95", statistics.columns())
+        self.assertNotIn("is_failure_median", statistics.columns())
+        with self.assertRaises(AssertionError):
+            statistics.merge(SweepPointStatistics(2))
+
+    def test_sweep_point_statistics_stratified(self):
+        statistics = SweepPointStatistics(1, stratified=True)
+        self.assertTrue(math.isnan(statistics.stratified_fidelity[0]))
+        # the outcomes 0 and 1 are sampled twice, but outcome 0 is 3 times more likely
+        for outcome, fidelity in [(0, 1.0), (1, 0.6), (0, 1.0), (1, 0.2)]:
+            statistics.add_trial([self.Pair(fidelity, 0, outcome, 0.75 if outcome == 0 else 0.25)])
+        statistics.add_trial({"message": "Some Qubits were lost during transfer", "error": True})
+        # the outcomes 2 and 3 were never sampled, without their strata the estimate would be biased
+        self.assertTrue(math.isnan(statistics.stratified_fidelity[0]))
+        self.assertTrue(math.isnan(statistics.columns()["st_fidelity"]))
+        for outcome in [2, 3, 2, 3]:
+            statistics.add_trial([self.Pair(0.5, 0, outcome, 0.0)])
+        estimate, sem = statistics.stratified_fidelity
+        self.assertAlmostEqual(8 / 9 * (0.75 * 1.0 + 0.25 * 0.4), estimate)
+        self.assertAlmostEqual(8 / 9 * 0.25 * math.sqrt(0.08 / 2), sem)
+        columns = statistics.columns()
+        self.assertEqual(2, columns["outcome1_trials"])
+        self.assertAlmostEqual(0.4, columns["outcome1_fidelity"])
+        self.assertEqual(0.75, columns["outcome0_probability"])
+        self.assertEqual(0.0, columns["outcome2_probability"])
+        self.assertLess(columns["st_fidelity_ci_low"], columns["st_fidelity_ci_high"])
+        self.assertEqual(4, SweepPointStatistics(1, stratified=True).merge(statistics).outcomes_fidelity[0].n + 2)
+        # the probability of the outcome changes with the trial: the estimate is the mean of the products
+        statistics = SweepPointStatistics(1, stratified=True)
+        for outcome, probability, fidelity in [(0, 0.9, 1.0), (0, 0.5, 0.0), (1, 0.0, 1.0), (2, 0.0, 1.0),
+                                               (3, 0.0, 1.0)]:
+            statistics.add_trial([self.Pair(fidelity, 0, outcome, probability)])
+        self.assertAlmostEqual(0.45, statistics.stratified_fidelity[0])
+        self.assertAlmostEqual(0.45, statistics.stratified_fidelity[1])
+
+    def test_trial_fidelity(self):
+        self.assertEqual(0.75, SweepPointStatistics.trial_fidelity([self.Pair(1.0, 0), self.Pair(0.5, 1)]))
+        self.assertEqual(0.0, SweepPointStatistics.trial_fidelity({"message": "Some Qubits were lost during transfer",
+                                                                  "error": True}))
+
+    def test_sweep_point_statistics_control_variate(self):
+        statistics = SweepPointStatistics(1, expected_control=0.5 * 0.9)
+        # the control is the predicted fidelity (0.9) of the successful trials
+        statistics.add_trial([self.Pair(0.8, 0)], control=0.9)
+        statistics.add_trial({"message": "Some Qubits were lost during transfer", "error": True}, control=0.0)
+        statistics.add_trial([self.Pair(0.8, 0)], control=0.9)
+        # the fidelity is proportional to the control, so the estimate is exact
+        self.assertAlmostEqual(0.4, statistics.control_variate.estimate)
+        columns = statistics.columns()
+        self.assertAlmostEqual(1.6 / 3, columns["cv_trial_fidelity"])
+        self.assertAlmostEqual(0.4, columns["cv_fidelity"])
+        self.assertIn("cv_fidelity_variance_reduction", columns)
+        self.assertNotIn("cv_fidelity", SweepPointStatistics(1).columns())
+        with self.assertRaises(AssertionError):
+            statistics.add_trial([self.Pair(0.8, 0)])
@@ -0,0 +1,64 @@
+import unittest
+
+from numpy.random import RandomState
+
+from src.models.ModelsFactory import ModelsFactory
+from src.models.single.CachedT1T2NoiseModel import CachedT1T2NoiseModel
+from src.network.StarNetwork import StarNetwork
+
+
+class TestModelsModelsFactory(unittest.TestCase):
+
+    def test_from_string(self):
+        factory = ModelsFactory.from_string("combined:t1=1e-5,cached=False,seed=7")
+        self.assertEqual("combined", factory.name)
+        self.assertEqual({"t1": 1e-5, "cached": False, "seed": 7}, factory.parameters)
+        self.assertEqual("combined:t1=1e-05,cached=False,seed=7", repr(factory))
+        self.assertEqual(ModelsFactory("combined", t1=1e-5, cached=False, seed=7), factory)
+        self.assertNotEqual(ModelsFactory("combined"), factory)
+        self.assertEqual("empty", repr(ModelsFactory.from_string("empty")))
+
+        self.assertTrue(ModelsFactory.is_valid("combined:p_loss_length=0.3"))
+        self.assertFalse(ModelsFactory.is_valid("combined:t3=1"))
+        self.assertFalse(ModelsFactory.is_valid("combined:t1"))
+        self.assertFalse(ModelsFactory.is_valid("invalid"))
+        self.assertFalse(ModelsFactory.is_valid(None))
+
+    def test_get(self):
+        self.assertEqual({}, ModelsFactory("empty").get())
+        self.assertEqual([], ModelsFactory("empty").model_keys)
+
+        factory = ModelsFactory("combined", p_loss_length=0.3, t1=1e-5, c=100000)
+        models1, models2 = factory.get(), factory.get()
+        self.assertEqual(factory.model_keys, list(models1.keys()))
+        # new instances every time
+        for key in factory.model_keys:
+            self.assertIsNot(models1[key], models2[key])
+        self.assertEqual(0.3, models1["quantum_loss_model"].p_loss_length)
+        self.assertIsInstance(models1["quantum_noise_model"], CachedT1T2NoiseModel)
+        self.assertEqual(1e-5, models1["quantum_noise_model"].T1)
+        self.assertEqual(100000, models1["quantum_delay_model"].c)
+
+    def test_rng(self):
+        # the loss models of the channels get different, but reproducible, generators
+        rngs1 = [ModelsFactory("combined", seed=7).get()["quantum_loss_model"].rng for _ in range(2)]
+        factory = ModelsFactory("combined", rng=RandomState(7))
+        rngs2 = [factory.get()["quantum_loss_model"].rng for _ in range(2)]
+        self.assertEqual(rngs1[0].randint(1000), rngs2[0].randint(1000))
+        self.assertNotEqual(rngs2[0].get_state()[1].tolist(), rngs2[1].get_state()[1].tolist())
+
+    def test_star_network(self):
+        star_network = StarNetwork(ModelsFactory("combined", seed=1))
+        noise_models = [channel.models["quantum_noise_model"] for channel in star_network.quantum_channels]
+        self.assertEqual(len(noise_models), len(set(map(id, noise_models))))
+        # the models of the connected channels are replaced
+        star_network.models = ModelsFactory("empty")
+        for channel in star_network.quantum_channels:
+            self.assertIsNone(channel.models["quantum_noise_model"])
+        star_network.models = ModelsFactory("combined", t1=1e-5)
+        for channel in star_network.quantum_channels:
+            self.assertEqual(1e-5, channel.models["quantum_noise_model"].T1)
+
+
+if __name__ == '__main__':
+    unittest.main()
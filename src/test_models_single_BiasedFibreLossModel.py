@@ -0,0 +1,51 @@
+import unittest
+
+import netsquid as ns
+from netsquid.qubits import qubitapi as qapi
+from numpy.random import RandomState
+
+from src.helper.statistics.LikelihoodRatio import LikelihoodRatio
+from src.models.ModelsFactory import ModelsFactory
+from src.models.single.BiasedFibreLossModel import BiasedFibreLossModel
+from src.models.single.BiasedT1T2NoiseModel import BiasedT1T2NoiseModel
+
+
+class TestModelsSingleBiasedFibreLossModel(unittest.TestCase):
+
+    def test_unbiased_loss_probability(self):
+        likelihood_ratio = LikelihoodRatio()
+        model = BiasedFibreLossModel(0.01, 0.25, RandomState(1), 10, likelihood_ratio)
+        p = model.loss_probability(1)
+        trials, estimate, lost_n = 4000, 0.0, 0
+        for _ in range(trials):
+            likelihood_ratio.reset()
+            qubits = qapi.create_qubits(1)
+            model.error_operation(qubits, length=1)
+            lost = qubits[0] is None
+            lost_n += lost
+            estimate += likelihood_ratio.value * lost
+        # the loss is sampled ~10 times more often, but the weighted estimate is unbiased
+        self.assertGreater(lost_n / trials, 5 * p)
+        self.assertAlmostEqual(p, estimate / trials, delta=0.2 * p)
+
+    def test_biased_noise(self):
+        likelihood_ratio = LikelihoodRatio()
+        model = BiasedT1T2NoiseModel(0, 1000, 10, likelihood_ratio)
+        ns.set_random_state(seed=3)
+        qubits = qapi.create_qubits(1)
+        model.error_operation(qubits, delta_time=10)
+        self.assertEqual(1, likelihood_ratio.events)
+
+    def test_models_factory(self):
+        factory = ModelsFactory("combined", bias=10)
+        self.assertTrue(factory.importance_sampling)
+        self.assertFalse(ModelsFactory("combined").importance_sampling)
+        models = factory.get()
+        self.assertIsInstance(models["quantum_loss_model"], BiasedFibreLossModel)
+        self.assertIsInstance(models["quantum_noise_model"], BiasedT1T2NoiseModel)
+        with self.assertRaises(SystemExit):
+            ModelsFactory("combined", bias=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import netsquid as ns
+import numpy as np
+from netsquid.components import T1T2NoiseModel
+from netsquid.qubits import qubitapi as qapi
+
+from src.models.single.CachedT1T2NoiseModel import CachedT1T2NoiseModel
+
+
+class TestModelsSingleCachedT1T2NoiseModel(unittest.TestCase):
+    t1: float = 1000
+    t2: float = 500
+
+    def setUp(self):
+        ns.set_qstate_formalism(ns.QFormalism.DM)
+
+    def test_same_noise_as_t1t2_noise_model(self):
+        cached = CachedT1T2NoiseModel(self.t1, self.t2)
+        reference = T1T2NoiseModel(self.t1, self.t2)
+        for delay in [0, 100, 1000]:
+            q1, q2 = qapi.create_qubits(2)
+            qapi.operate(q1, ns.H)
+            qapi.operate(q2, ns.H)
+            cached.error_operation([q1], delta_time=delay)
+            reference.error_operation([q2], delta_time=delay)
+            np.testing.assert_allclose(qapi.reduced_dm(q2), qapi.reduced_dm(q1), atol=1e-12)
+
+    def test_entangled_qubits(self):
+        cached = CachedT1T2NoiseModel(self.t1, self.t2)
+        reference = T1T2NoiseModel(self.t1, self.t2)
+        pairs = []
+        for _ in range(2):
+            q1, q2 = qapi.create_qubits(2)
+            qapi.operate(q1, ns.H)
+            qapi.operate([q1, q2], ns.CNOT)
+            pairs.append([q1, q2])
+        # the cached operators act on a qubit of the pair, the lost qubits are skipped
+        cached.error_operation([pairs[0][1], None], delta_time=300)
+        reference.error_operation([pairs[1][1]], delta_time=300)
+        np.testing.assert_allclose(qapi.reduced_dm(pairs[1]), qapi.reduced_dm(pairs[0]), atol=1e-12)
+        # without noise the state does not change
+        CachedT1T2NoiseModel(self.t1, self.t2).error_operation(pairs[0], delta_time=0)
+        np.testing.assert_allclose(qapi.reduced_dm(pairs[1]), qapi.reduced_dm(pairs[0]), atol=1e-12)
+
+    def test_kraus_operators(self):
+        model = CachedT1T2NoiseModel(self.t1, self.t2)
+        kraus = model.kraus_operators(300)
+        # the Kraus operators of a channel are complete
+        np.testing.assert_allclose(np.eye(2), sum(k.conj().T @ k for k in kraus), atol=1e-12)
+        gamma, dephase_prob = model.noise_parameters(300)
+        self.assertAlmostEqual(1 - np.exp(-300 / self.t1), gamma)
+        self.assertTrue(0 < dephase_prob < 0.5)
+
+    def test_cache(self):
+        model = CachedT1T2NoiseModel(self.t1, self.t2, max_size=2)
+        self.assertTrue(np.isnan(model.cache_info()["hit_rate"]))
+        model.noise_parameters(100)
+        model.noise_parameters(100)
+        model.noise_parameters(200)
+        model.noise_parameters(100)
+        self.assertEqual({"hits": 2, "misses": 2, "size": 2, "hit_rate": 0.5}, model.cache_info())
+        # 200 is the least recently used delay, so it is removed
+        model.noise_parameters(300)
+        model.noise_parameters(100)
+        self.assertEqual(3, model.cache_info()["hits"])
+        model.noise_parameters(200)
+        self.assertEqual(4, model.cache_info()["misses"])
+        self.assertEqual(2, model.cache_info()["size"])
+        # changing the times does not reuse the old parameters
+        model.T1 = 2000
+        self.assertAlmostEqual(1 - np.exp(-200 / 2000), model.noise_parameters(200)[0])
+
+        model.cache_clear()
+        self.assertEqual({"hits": 0, "misses": 0, "size": 0}, {key: value for key, value in
+                                                               model.cache_info().items() if key != "hit_rate"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from src.models.Combined import Combined
+from src.network.NetworkTemplate import NetworkTemplate
+from src.network.StarNetwork import StarNetwork
+
+
+class TestNetworkNetworkTemplate(unittest.TestCase):
+    template = NetworkTemplate(Combined.models, channels_n=3)
+
+    def test_clone(self):
+        self.assertGreater(self.template.build_time, 0)
+        clone = self.template.clone()
+        self.assertIsInstance(clone, StarNetwork)
+        self.assertIsNot(self.template.network, clone)
+        self.assertEqual(3, clone.channels_n)
+        self.assertEqual(6, clone.repeater_mem_positions)
+        # the copy runs its own trials, without touching the template
+        clone.channels_length = 2
+        self.assertIsInstance(clone.entangle_nodes(1, 4), (list, dict))
+        self.assertEqual(1, self.template.network.channels_length)
+        self.assertIsInstance(self.template.network.entangle_nodes(1, 2), (list, dict))
+
+    def test_snapshot(self):
+        if not self.template.picklable:
+            self.skipTest("The components of this NetSquid build can not be pickled")
+        snapshot = self.template.snapshot()
+        self.assertIs(snapshot, self.template.snapshot())
+        network = NetworkTemplate.restore(snapshot)
+        self.assertEqual({}, network._swap_programs)
+        self.assertIsNone(network.event_tracer)
+        self.assertIsInstance(network.protocol_a(), (list, dict))
@@ -2,7 +2,10 @@ import unittest
 
 from netsquid.nodes import Network
 
+from src.models.Combined import Combined
+from src.models.ModelsFactory import ModelsFactory
 from src.network.StarNetwork import StarNetwork
+from src.protocols.GenerateEntanglement import GenerateEntanglement
 
 
 class TestNetworkStarNetwork(unittest.TestCase):
@@ -25,6 +28,8 @@ class TestNetworkStarNetwork(unittest.TestCase):
         self.assertEqual(1, old_channels_length)
         self.star_network.channels_length = 2
         self.assertEqual(2 / 1000, self.star_network.channels_length)
+        # the length of the connected channels changes too
+        self.assertEqual([2 / 1000] * 7, [channel.length for channel in self.star_network._quantum_channels])
 
         old_models = self.star_network.models
         self.assertIsNone(old_models)
@@ -36,3 +41,141 @@ class TestNetworkStarNetwork(unittest.TestCase):
         self.assertEqual(1, self.star_network.node_mem_positions)
 
         self.assertEqual(2, self.star_network.remote_node_mem_positions)
+
+    def test_clear_memories(self):
+        star_network = StarNetwork({})
+        star_network.entangle_nodes(1, 2)
+        star_network.protocol_a()
+        star_network.clear_memories()
+        for name in ["Node1", "Node2", "Node3", "Repeater", "RemoteNode"]:
+            qmemory = star_network.network.subcomponents[name].qmemory
+            self.assertEqual([], qmemory.used_positions)
+
+    def test_sim_time_horizon(self):
+        star_network = StarNetwork()
+        self.assertEqual(0, star_network.sim_time_horizon)
+        self.assertEqual(0, star_network.wall_time_limit)
+        with self.assertRaises(AssertionError):
+            star_network.sim_time_horizon = -1
+        # the qubits are emitted after the delay of the source, long after the horizon
+        star_network.sim_time_horizon = 1
+        result = star_network.entangle_nodes(1, 2)
+        self.assertEqual({"message": "The trial timed out (sim_time limit)", "error": True, "timeout": "sim_time"},
+                         result)
+        # the next trials are not affected by the stopped one
+        star_network.sim_time_horizon = 0
+        star_network.wall_time_limit = 60
+        self.assertIsInstance(star_network.entangle_nodes(1, 2), list)
+
+    def test_harvest_entangle_nodes(self):
+        star_network = StarNetwork()
+        results = []
+        self.assertEqual(50, star_network.harvest_entangle_nodes(1, 4, 50, 1e5, results.append))
+        self.assertEqual(50, len(results))
+        # without models no qubit is lost, and every pair is |00> + |11> after the corrections
+        for result in results:
+            self.assertEqual(1, len(result))
+            self.assertAlmostEqual(1, result[0].fidelity)
+        # the sources are triggered again by the next trials
+        self.assertIsInstance(star_network.entangle_nodes(1, 4), list)
+        with self.assertRaises(AssertionError):
+            star_network.harvest_entangle_nodes(1, 2)
+        # the period of 1 ns is shorter than the delay of the channels
+        star_network.models = Combined.models
+        with self.assertRaises(SystemExit):
+            star_network.harvest_entangle_nodes(1, 4, 10, 1e9)
+
+    def test_repeat_until_success(self):
+        star_network = StarNetwork(Combined.models)
+        self.assertFalse(star_network.repeat_until_success)
+        # after 100 km most of the qubits are lost
+        star_network.channels_length = 100000
+        star_network.repeat_until_success = True
+        for _ in range(5):
+            results = star_network.entangle_nodes(1, 4)
+            self.assertIsInstance(results, list)
+            # the source and the remote source succeed after at least 1 attempt each
+            self.assertGreaterEqual(star_network.attempts, 2)
+        # the loss models of the channels are restored after every trial
+        self.assertTrue(all(channel.models["quantum_loss_model"] is not None
+                            for channel in star_network.quantum_channels))
+        self.assertEqual({}, StarNetwork()._attempt_parameters([]))
+
+    def test_multiplexed_entangle_nodes(self):
+        star_network = StarNetwork(channels_n=3)
+        self.assertEqual(3, star_network.channels_n)
+        self.assertEqual(6, star_network.repeater_mem_positions)
+        self.assertEqual(3, star_network.remote_node_mem_positions)
+        # 3 pairs are generated and swapped during the same run, without models they are all |00> + |11>
+        results = star_network.multiplexed_entangle_nodes([1, 2, 3, 4])
+        self.assertEqual(3, len(results))
+        for result in results:
+            self.assertAlmostEqual(1, result.fidelity)
+        self.assertEqual(2, len(star_network.multiplexed_entangle_nodes([2, 4])) + 1)
+        # the fixed circuits still work on the multiplexed network
+        self.assertEqual(2, len(star_network.protocol_a()))
+        self.assertEqual(1, len(star_network.entangle_nodes(1, 4)))
+        with self.assertRaises(AssertionError):
+            star_network.multiplexed_entangle_nodes([1, 2])
+        # protocol_a needs 2 channels
+        with self.assertRaises(AssertionError):
+            StarNetwork(channels_n=1).protocol_a()
+
+    def test_lazy_construction(self):
+        star_network = StarNetwork(Combined.models)
+        self.assertEqual([], star_network.quantum_channels)
+        # entangle_nodes 1,4 builds only the first channels of Node 1, of the Repeater and of the Remote Node
+        star_network.channels_length = 2
+        self.assertIsInstance(star_network.entangle_nodes(1, 4), (list, dict))
+        self.assertEqual(["Source", "Node1", "Repeater", "RemoteNode"], list(star_network._network.nodes.keys()))
+        self.assertEqual(["QC_Source->Node0", "QC_Source->Repeater", "QC_RemoteNode->Repeater"],
+                         [channel.name for channel in star_network.quantum_channels])
+        self.assertEqual([2 / 1000] * 3, [channel.length for channel in star_network.quantum_channels])
+        # the channels built later have the same length, and the network property builds all the components
+        self.assertEqual(5, len(star_network.network.nodes) - 1)
+        self.assertEqual(7, len(star_network.quantum_channels))
+        self.assertEqual([2 / 1000] * 7, [channel.length for channel in star_network.quantum_channels])
+        self.assertIsInstance(star_network.protocol_a(), (list, dict))
+        with self.assertRaises(AssertionError):
+            star_network.build([5])
+
+    def test_reset_trial(self):
+        star_network = StarNetwork(Combined.models)
+        star_network.entangle_nodes(1, 4)
+        self.assertGreater(star_network._state_checksum(), 0)
+        # the clock of every trial starts from 0, and nothing is left of the previous trial
+        self.assertEqual(0, star_network.reset_trial(debug=True))
+        results = star_network.protocol_a()
+        if isinstance(results, list):
+            self.assertLess(results[0].sim_time, 1e6)
+        self.assertEqual(0, star_network.reset_trial(debug=True))
+        self.assertEqual(0, star_network._state_checksum())
+        # the list of the input ports shared by the protocols does not grow
+        self.assertLessEqual(len(GenerateEntanglement._qmem_input_ports), 2)
+
+    def test_swap_models(self):
+        factory = ModelsFactory.from_string("combined:seed=1")
+        star_network = StarNetwork(factory)
+        star_network.build([1, 2])
+        built = star_network.channel_models
+        self.assertEqual(len(star_network.quantum_channels), len(built))
+        star_network.models = {}
+        self.assertEqual([{}] * len(built), star_network.channel_models)
+        self.assertIsNone(star_network.quantum_channels[0].models["quantum_loss_model"])
+        # the models already built are put back on their channels, without building new ones
+        star_network.swap_models(factory, built)
+        self.assertEqual(factory, star_network.models)
+        for models, channel in zip(built, star_network.quantum_channels):
+            self.assertIs(models["quantum_loss_model"], channel.models["quantum_loss_model"])
+        with self.assertRaises(AssertionError):
+            star_network.swap_models(factory, built[1:])
+
+    def test_pauli_frame(self):
+        star_network = StarNetwork()
+        self.assertFalse(star_network.pauli_frame)
+        star_network.pauli_frame = True
+        # without models the uncorrected pairs have the Bell states of the frames, with fidelity 1
+        for _ in range(5):
+            for result in star_network.entangle_nodes(1, 4) + star_network.protocol_a():
+                self.assertEqual(result.bell_state, result.pauli_frame)
+                self.assertAlmostEqual(1, result.fidelity)
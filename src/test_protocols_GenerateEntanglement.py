@@ -1,5 +1,6 @@
 import unittest
 
+import netsquid as ns
 from netsquid.components import QSource
 from netsquid.nodes import Node
 
@@ -37,3 +38,17 @@ class TestProtocolsGenerateEntanglement(unittest.TestCase):
 
         self.assertTrue(ps.is_connected)
         self.assertTrue(ps1.is_connected)
+
+    def test_sample_failed_attempts(self):
+        node = Node("node_w_source")
+        node.subcomponents["source"] = QSource("source")
+        self.assertEqual(0, GenerateEntanglement(node, "p", is_source=True)._sample_failed_attempts())
+        with self.assertRaises(AssertionError):
+            GenerateEntanglement(node, "p", is_source=True, success_probability=0)
+
+        ns.set_random_state(seed=42)
+        protocol = GenerateEntanglement(node, "p", is_source=True, success_probability=0.2, attempt_period=10)
+        failed_attempts = [protocol._sample_failed_attempts() for _ in range(2000)]
+        # geometric distribution, (1 - p) / p failed attempts on average
+        self.assertAlmostEqual(4, sum(failed_attempts) / len(failed_attempts), delta=0.3)
+        self.assertEqual(0, min(failed_attempts))